@@ -0,0 +1,91 @@
+"""
+Deterministic synthetic Vietnamese legal corpus for offline benchmarks.
+
+Documents follow the structure the chunker expects (Chương → Điều → Khoản → điểm)
+and are split with ``chunk_legal_document``, so chunk lengths and vocabulary
+match what the sparse encoders see in the pipelines. Words are drawn from a
+Zipf distribution over legal-domain syllables, with a small rate of OCR-like
+noise tokens that gives the vocabulary a realistic long tail.
+"""
+import random
+import string
+
+from llm_engineering.application.preprocessing.operations.chunking import chunk_legal_document
+
+SYLLABLES = list(dict.fromkeys([
+    "quy", "định", "điều", "khoản", "điểm", "chương", "mục", "luật", "nghị", "quyết", "thông", "tư",
+    "bộ", "trưởng", "chính", "phủ", "ủy", "ban", "nhân", "dân", "tỉnh", "thành", "phố", "huyện", "xã",
+    "cơ", "quan", "tổ", "chức", "cá", "có", "trách", "nhiệm", "thẩm", "quyền", "thực", "hiện", "theo",
+    "lao", "động", "người", "sử", "dụng", "hợp", "đồng", "tiền", "lương", "bảo", "hiểm", "y", "tế",
+    "thời", "giờ", "làm", "việc", "nghỉ", "ngơi", "phụ", "cấp", "trợ", "thuế", "thu", "nhập", "doanh",
+    "nghiệp", "đất", "đai", "xây", "dựng", "giấy", "phép", "đăng", "ký", "hồ", "sơ", "thủ", "tục",
+    "hành", "vi", "phạm", "xử", "lý", "phạt", "cảnh", "cáo", "mức", "từ", "đến", "đồng", "đối",
+    "với", "trường", "hợp", "được", "không", "phải", "các", "những", "này", "của", "và", "hoặc",
+    "trong", "khi", "sau", "trước", "ngày", "tháng", "năm", "kể", "hiệu", "lực", "thi", "hành",
+    "cán", "công", "viên", "giáo", "dục", "đào", "tạo", "môi", "trường", "tài", "nguyên", "nước",
+    "giao", "vận", "tải", "đường", "an", "toàn", "phòng", "cháy", "chữa", "hình", "sự", "tố", "tụng",
+    "kinh", "tế", "ngân", "sách", "kế", "toán", "kiểm", "toán", "đầu", "tư", "công", "ty", "cổ",
+    "phần", "vốn", "điều", "lệ", "quản", "trị", "giám", "đốc", "hội", "đồng", "thành", "viên",
+]))
+
+DOCUMENT_TYPES = ["LUẬT", "NGHỊ ĐỊNH", "THÔNG TƯ", "QUYẾT ĐỊNH", "NGHỊ QUYẾT"]
+ROMAN = ["I", "II", "III", "IV", "V", "VI", "VII", "VIII", "IX", "X"]
+POINT_LABELS = "abcdđeghik"
+
+
+class LegalCorpusGenerator:
+    """Seeded generator of synthetic legal documents, chunks and queries.
+
+    Args:
+        seed: Random seed, identical seeds give identical corpora
+        noise_rate: Fraction of words replaced by random OCR-like tokens
+    """
+
+    def __init__(self, seed: int = 0, noise_rate: float = 0.005) -> None:
+        self.rng = random.Random(seed)
+        self.noise_rate = noise_rate
+        self._weights = [1.0 / rank for rank in range(1, len(SYLLABLES) + 1)]
+
+    def words(self, count: int) -> str:
+        words = self.rng.choices(SYLLABLES, weights=self._weights, k=count)
+        for i in range(count):
+            if self.rng.random() < self.noise_rate:
+                words[i] = "".join(self.rng.choices(string.ascii_lowercase, k=self.rng.randint(4, 10)))
+        return " ".join(words)
+
+    def document(self, index: int) -> str:
+        rng = self.rng
+        document_type = rng.choice(DOCUMENT_TYPES)
+        lines = [f"{document_type} số {index + 1}/{rng.randint(2010, 2024)}", self.words(rng.randint(10, 30)).capitalize()]
+
+        article = 0
+        for chapter in range(rng.randint(1, 5)):
+            lines.append(f"Chương {ROMAN[chapter]}: {self.words(rng.randint(3, 8)).upper()}")
+
+            for _ in range(rng.randint(2, 8)):
+                article += 1
+                lines.append(f"Điều {article}: {self.words(rng.randint(3, 10)).capitalize()}")
+
+                for clause in range(1, rng.randint(1, 5) + 1):
+                    lines.append(f"Khoản {clause}. {self.words(rng.randint(15, 60)).capitalize()}.")
+                    for label in POINT_LABELS[: rng.choice([0, 0, 2, 3, 4])]:
+                        lines.append(f"{label}) {self.words(rng.randint(8, 25))};")
+
+        return "\n".join(lines)
+
+    def documents(self, num_documents: int) -> list[str]:
+        return [self.document(i) for i in range(num_documents)]
+
+    def chunks(self, num_chunks: int) -> list[str]:
+        """Chunks produced by ``chunk_legal_document`` until ``num_chunks`` are collected."""
+        chunks: list[str] = []
+        index = 0
+        while len(chunks) < num_chunks:
+            chunks.extend(chunk_legal_document(self.document(index)))
+            index += 1
+        return chunks[:num_chunks]
+
+    def queries(self, num_queries: int) -> list[str]:
+        """Short user-style questions."""
+        prefixes = ["Quy định về", "Mức phạt", "Thủ tục", "Thời hạn", "Điều kiện", "Trách nhiệm của"]
+        return [f"{self.rng.choice(prefixes)} {self.words(self.rng.randint(3, 12))}?" for _ in range(num_queries)]
@@ -0,0 +1,150 @@
+"""
+Accuracy and speed of the ONNX Runtime embedding backends against eager PyTorch.
+
+Every variant encodes the same synthetic legal chunks and queries. Accuracy is
+the cosine similarity of each vector with the PyTorch one and the overlap of
+the top-10 chunks retrieved per query; speed is model load time, single-query
+latency and batch throughput. The command fails if a variant's mean cosine
+agreement falls below ``--min-cosine``.
+
+Runs offline once the model is in the Hugging Face cache (the ONNX exports are
+written to ``settings.EMBEDDING_ONNX_DIR`` on the first run):
+
+    HF_HUB_OFFLINE=1 python -m benchmarks.embedding_backends --quantization avx2 --intra-op-threads 4
+"""
+import json
+import sys
+import time
+from pathlib import Path
+
+import click
+import numpy as np
+from loguru import logger
+
+from benchmarks.corpus import LegalCorpusGenerator
+from llm_engineering.application.networks.onnx_backend import QUANTIZATION_CONFIGS, load_onnx_model
+from llm_engineering.settings import settings
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def top_k(queries: np.ndarray, chunks: np.ndarray, k: int) -> np.ndarray:
+    return np.argsort(-(normalize(queries) @ normalize(chunks).T), axis=1)[:, :k]
+
+
+def measure(model, chunks: list[str], queries: list[str], batch_size: int) -> tuple[dict, np.ndarray, np.ndarray]:
+    model.encode(queries[:8], show_progress_bar=False)  # warm-up
+
+    latencies = np.empty(len(queries))
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        model.encode(query, show_progress_bar=False)
+        latencies[i] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    chunk_vectors = model.encode(chunks, batch_size=batch_size, show_progress_bar=False)
+    batch_seconds = time.perf_counter() - start
+    query_vectors = model.encode(queries, batch_size=batch_size, show_progress_bar=False)
+
+    metrics = {
+        "query_p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "query_p99_ms": float(np.percentile(latencies, 99) * 1000),
+        "chunks_per_second": len(chunks) / batch_seconds,
+    }
+    return metrics, np.asarray(chunk_vectors), np.asarray(query_vectors)
+
+
+@click.command()
+@click.option("--model-id", default=settings.TEXT_EMBEDDING_MODEL_ID, show_default=True)
+@click.option("--quantization", type=click.Choice(QUANTIZATION_CONFIGS), default=None, help="Also benchmark an int8 ONNX model.")
+@click.option("--intra-op-threads", type=int, default=None)
+@click.option("--inter-op-threads", type=int, default=None)
+@click.option("--num-chunks", default=500, show_default=True)
+@click.option("--num-queries", default=200, show_default=True)
+@click.option("--batch-size", default=32, show_default=True)
+@click.option("--k", default=10, show_default=True)
+@click.option("--min-cosine", default=0.98, show_default=True, help="Minimum mean cosine agreement with PyTorch.")
+@click.option("--output", type=click.Path(dir_okay=False), default=None, help="Write results as JSON.")
+def main(
+    model_id: str,
+    quantization: str | None,
+    intra_op_threads: int | None,
+    inter_op_threads: int | None,
+    num_chunks: int,
+    num_queries: int,
+    batch_size: int,
+    k: int,
+    min_cosine: float,
+    output: str | None,
+) -> None:
+    from sentence_transformers.SentenceTransformer import SentenceTransformer
+
+    generator = LegalCorpusGenerator(seed=0)
+    chunks = generator.chunks(num_chunks)
+    queries = generator.queries(num_queries)
+
+    variants = {"torch": None, "onnx": None}
+    if quantization:
+        variants[f"onnx-int8-{quantization}"] = quantization
+
+    results = {}
+    reference = None
+    for name, variant_quantization in variants.items():
+        start = time.perf_counter()
+        if name == "torch":
+            model = SentenceTransformer(model_id, device="cpu")
+        else:
+            model = load_onnx_model(
+                model_id,
+                export_root=settings.EMBEDDING_ONNX_DIR,
+                quantization=variant_quantization,
+                intra_op_threads=intra_op_threads,
+                inter_op_threads=inter_op_threads,
+            )
+        load_seconds = time.perf_counter() - start
+
+        metrics, chunk_vectors, query_vectors = measure(model, chunks, queries, batch_size)
+        metrics["load_seconds"] = load_seconds
+
+        if reference is None:
+            reference = (chunk_vectors, query_vectors, top_k(query_vectors, chunk_vectors, k))
+        else:
+            reference_chunks, reference_queries, reference_top_k = reference
+            cosines = np.concatenate([
+                np.sum(normalize(chunk_vectors) * normalize(reference_chunks), axis=1),
+                np.sum(normalize(query_vectors) * normalize(reference_queries), axis=1),
+            ])
+            variant_top_k = top_k(query_vectors, chunk_vectors, k)
+            overlap = np.mean([len(set(a) & set(b)) / k for a, b in zip(variant_top_k, reference_top_k)])
+
+            metrics["mean_cosine"] = float(cosines.mean())
+            metrics["min_cosine"] = float(cosines.min())
+            metrics[f"top{k}_overlap"] = float(overlap)
+
+        results[name] = metrics
+        accuracy = (
+            f", cosine mean {metrics['mean_cosine']:.5f} / min {metrics['min_cosine']:.5f}, top-{k} overlap {metrics[f'top{k}_overlap']:.3f}"
+            if "mean_cosine" in metrics
+            else ""
+        )
+        logger.info(
+            f"{name}: load {load_seconds:.1f}s, query p50 {metrics['query_p50_ms']:.1f} ms / p99 {metrics['query_p99_ms']:.1f} ms, "
+            f"{metrics['chunks_per_second']:,.0f} chunks/s{accuracy}"
+        )
+
+    if output:
+        config = {"model_id": model_id, "num_chunks": num_chunks, "num_queries": num_queries, "batch_size": batch_size,
+                  "intra_op_threads": intra_op_threads, "inter_op_threads": inter_op_threads}
+        Path(output).write_text(json.dumps({"config": config, "variants": results}, indent=2) + "\n")
+        logger.info(f"Results written to {output}")
+
+    failed = [name for name, metrics in results.items() if metrics.get("mean_cosine", 1.0) < min_cosine]
+    if failed:
+        logger.error(f"Mean cosine agreement below {min_cosine} for: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
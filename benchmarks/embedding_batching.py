@@ -0,0 +1,109 @@
+"""
+Padding efficiency and throughput of dense chunk embedding: fixed-count batches in
+document order (the old ``batch_size=10`` loop) against length-sorted batches under
+a token budget (``EmbeddingModelSingleton.encode_bucketed``).
+
+Padding efficiency is the share of real tokens in the padded batches the model
+runs on. ``--num-workers`` also runs the token-budget batches on an
+``EmbeddingProcessPool`` of that many processes, to check scaling with cores.
+Runs offline once the model is in the Hugging Face cache:
+
+    HF_HUB_OFFLINE=1 python -m benchmarks.embedding_batching --max-batch-tokens 8192 --num-workers 2 --num-workers 4
+"""
+import json
+import time
+from pathlib import Path
+
+import click
+import numpy as np
+from loguru import logger
+
+from benchmarks.corpus import LegalCorpusGenerator
+from llm_engineering.application.networks.batching import padding_efficiency, token_budget_batches
+from llm_engineering.application.networks.embedding_pool import EmbeddingProcessPool
+from llm_engineering.settings import settings
+
+
+def run(model, chunks: list[str], batches: list[np.ndarray], lengths: np.ndarray, pool: EmbeddingProcessPool | None = None) -> dict:
+    text_batches = [[chunks[i] for i in batch] for batch in batches]
+
+    start = time.perf_counter()
+    if pool is not None:
+        for _ in pool.map(text_batches):
+            pass
+    else:
+        for texts in text_batches:
+            model.encode(texts, batch_size=len(texts), show_progress_bar=False)
+    seconds = time.perf_counter() - start
+
+    return {
+        "batches": len(batches),
+        "padding_efficiency": padding_efficiency(lengths, batches),
+        "chunks_per_second": len(chunks) / seconds,
+        "tokens_per_second": float(lengths.sum()) / seconds,
+    }
+
+
+@click.command()
+@click.option("--model-id", default=settings.TEXT_EMBEDDING_MODEL_ID, show_default=True)
+@click.option("--num-chunks", default=2000, show_default=True)
+@click.option("--batch-size", default=10, show_default=True, help="Chunks per batch of the document-order baseline.")
+@click.option("--max-batch-tokens", default=settings.EMBEDDING_MAX_BATCH_TOKENS, show_default=True)
+@click.option("--max-batch-size", default=settings.EMBEDDING_MAX_BATCH_SIZE, show_default=True)
+@click.option("--num-workers", type=int, multiple=True, help="Also run the token-budget batches on this many worker processes.")
+@click.option("--output", type=click.Path(dir_okay=False), default=None, help="Write results as JSON.")
+def main(
+    model_id: str,
+    num_chunks: int,
+    batch_size: int,
+    max_batch_tokens: int,
+    max_batch_size: int,
+    num_workers: tuple[int, ...],
+    output: str | None,
+) -> None:
+    from sentence_transformers.SentenceTransformer import SentenceTransformer
+
+    chunks = LegalCorpusGenerator(seed=0).chunks(num_chunks)
+    model = SentenceTransformer(model_id, device=settings.RAG_MODEL_DEVICE)
+    model.encode(chunks[:8], show_progress_bar=False)  # warm-up
+
+    encoded = model.tokenizer(chunks, truncation=True, max_length=model.max_seq_length, return_attention_mask=False)
+    lengths = np.array([len(ids) for ids in encoded["input_ids"]], dtype=np.int64)
+    logger.info(f"{num_chunks} chunks, {lengths.mean():.0f} tokens on average (min {lengths.min()}, max {lengths.max()})")
+
+    strategies = {
+        f"document_order_{batch_size}": [np.arange(i, min(i + batch_size, num_chunks)) for i in range(0, num_chunks, batch_size)],
+        "token_budget": token_budget_batches(lengths, max_batch_tokens, max_batch_size),
+    }
+
+    results = {}
+    for name, batches in strategies.items():
+        results[name] = metrics = run(model, chunks, batches, lengths)
+        logger.info(
+            f"{name}: {metrics['batches']} batches, padding efficiency {metrics['padding_efficiency']:.1%}, "
+            f"{metrics['chunks_per_second']:.1f} chunks/s, {metrics['tokens_per_second']:.0f} tokens/s"
+        )
+
+    for workers in num_workers:
+        pool = EmbeddingProcessPool(workers, model_id=model_id)
+        try:
+            for _ in pool.map([chunks[:8]] * workers):  # model load and warm-up in every worker
+                pass
+            name = f"token_budget_{workers}_workers"
+            results[name] = metrics = run(model, chunks, strategies["token_budget"], lengths, pool=pool)
+        finally:
+            pool.close()
+        logger.info(
+            f"{name}: {metrics['chunks_per_second']:.1f} chunks/s "
+            f"({metrics['chunks_per_second'] / results['token_budget']['chunks_per_second']:.2f}x one process)"
+        )
+
+    if output:
+        config = {"model_id": model_id, "num_chunks": num_chunks, "batch_size": batch_size,
+                  "max_batch_tokens": max_batch_tokens, "max_batch_size": max_batch_size, "num_workers": list(num_workers)}
+        Path(output).write_text(json.dumps({"config": config, "strategies": results}, indent=2) + "\n")
+        logger.info(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
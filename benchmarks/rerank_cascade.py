@@ -0,0 +1,115 @@
+"""
+Cross-encoder pairs and MRR of the rerank cascade on the retrieval evaluation set.
+
+Each test query is retrieved once (self-query, expansion, hybrid search). The
+candidates are then reranked twice: first through ``RerankCascade`` with the
+given margin and latency budget, then all of them, as with
+``RERANK_CASCADE_ENABLED=false``. Relevance is judged by ``document_number``,
+as in ``RetrievalEvaluator``. The score cache is disabled so both passes run
+the model. Needs the same services as the evaluation notebook (Qdrant, the
+LLM APIs and the models):
+
+    uv run python -m benchmarks.rerank_cascade --test-data data/test_queries_evaluation.json --k 10 --expand-to-n-queries 5
+"""
+import json
+import statistics
+import time
+from pathlib import Path
+
+import click
+from loguru import logger
+
+from llm_engineering.application.evaluation.rag_evaluation import RetrievalEvaluator
+from llm_engineering.application.rag.cascade import RerankCascade
+from llm_engineering.application.rag.retriever import ContextRetriever
+from llm_engineering.settings import settings
+
+
+@click.command()
+@click.option("--test-data", type=click.Path(exists=True, dir_okay=False), default="data/test_queries_evaluation.json", show_default=True)
+@click.option("--k", default=10, show_default=True)
+@click.option("--expand-to-n-queries", default=3, show_default=True)
+@click.option("--use-sparse/--dense-only", default=True, show_default=True)
+@click.option("--min-candidates", default=settings.RERANK_CASCADE_MIN_CANDIDATES, show_default=True)
+@click.option("--margin", default=settings.RERANK_CASCADE_MARGIN, show_default=True)
+@click.option("--budget-ms", type=float, default=settings.RERANK_LATENCY_BUDGET_MS, show_default=True)
+@click.option("--output", type=click.Path(dir_okay=False), default=None, help="Write results as JSON.")
+def main(
+    test_data: str,
+    k: int,
+    expand_to_n_queries: int,
+    use_sparse: bool,
+    min_candidates: int,
+    margin: float,
+    budget_ms: float | None,
+    output: str | None,
+) -> None:
+    settings.RERANK_SCORE_CACHE_ENABLED = False
+    test_queries = json.loads(Path(test_data).read_text(encoding="utf-8"))
+
+    retriever = ContextRetriever()
+    cascade = RerankCascade(min_candidates=min_candidates, margin=margin, latency_budget_ms=budget_ms)
+
+    runs = {"full": {"pairs": [], "ms": [], "mrr": []}, "cascade": {"pairs": [], "ms": [], "mrr": []}}
+    for i, test_case in enumerate(test_queries):
+        query = test_case["query"]
+        searches = retriever.retrieve(query, k=k, expand_to_n_queries=expand_to_n_queries, use_sparse=use_sparse)
+        candidates = retriever.candidates(searches)
+        if not candidates:
+            logger.warning(f"No candidates for '{query[:40]}...'")
+            continue
+
+        selected = cascade.select(candidates, retriever.cheap_scores(searches, candidates), k)
+        # The cascade runs first: the full pass then finds the chunk token cache warm, which only favours it
+        for name, chunks in (("cascade", selected), ("full", candidates)):
+            start = time.perf_counter()
+            reranked = retriever.rerank(query, chunks=chunks, keep_top_k=k)
+            seconds = time.perf_counter() - start
+            if name == "cascade":
+                cascade.observe(len(chunks), seconds)
+
+            metrics = RetrievalEvaluator.evaluate_query(
+                query_id=f"q_{i}",
+                retrieved_doc_ids=[chunk.document_number for chunk in reranked if chunk.document_number],
+                relevant_doc_ids=test_case["relevant_doc_ids"],
+                k=k,
+            )
+            runs[name]["pairs"].append(len(chunks))
+            runs[name]["ms"].append(seconds * 1000)
+            runs[name]["mrr"].append(metrics["mrr"])
+
+    results = {
+        name: {
+            "num_queries": len(run["pairs"]),
+            "pairs": sum(run["pairs"]),
+            "mean_pairs_per_query": statistics.mean(run["pairs"]),
+            "mean_rerank_ms": statistics.mean(run["ms"]),
+            "mrr": statistics.mean(run["mrr"]),
+        }
+        for name, run in runs.items()
+        if run["pairs"]
+    }
+    if not results:
+        logger.error("No query returned candidates")
+        return
+
+    for name, metrics in results.items():
+        logger.info(
+            f"{name}: {metrics['mean_pairs_per_query']:.1f} pairs/query ({metrics['pairs']} total), "
+            f"rerank {metrics['mean_rerank_ms']:.1f} ms/query, MRR {metrics['mrr']:.4f}"
+        )
+    full, cascaded = results["full"], results["cascade"]
+    logger.info(
+        f"Cascade sends {1 - cascaded['pairs'] / full['pairs']:.1%} fewer pairs to the cross-encoder, "
+        f"MRR {cascaded['mrr'] - full['mrr']:+.4f}"
+    )
+
+    if output:
+        config = {"test_data": test_data, "k": k, "expand_to_n_queries": expand_to_n_queries, "use_sparse": use_sparse,
+                  "min_candidates": min_candidates, "margin": margin, "budget_ms": budget_ms}
+        Path(output).write_text(json.dumps({"config": config, "runs": results}, indent=2) + "\n")
+        logger.info(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Reranking latency under concurrent load, with and without cross-request batching.
+
+``--concurrency`` client threads each send rerank requests of ``--pairs``
+(query, chunk) pairs back to back. ``direct`` calls ``CrossEncoder.predict``
+from every client thread, as ``Reranker`` does with ``RERANK_BATCHING=false``;
+``batched`` submits the pairs to a ``MicroBatcher`` that merges the pairs of
+concurrent requests into batches of at most ``--max-batch-size`` on one
+inference thread. Every backend (PyTorch, ONNX and, with ``--quantization``,
+ONNX int8) runs both modes:
+
+    HF_HUB_OFFLINE=1 python -m benchmarks.rerank_load --concurrency 16 --pairs 20 --quantization avx2
+"""
+import json
+import threading
+import time
+from collections.abc import Callable
+from functools import partial
+from pathlib import Path
+
+import click
+import numpy as np
+from loguru import logger
+
+from benchmarks.corpus import LegalCorpusGenerator
+from llm_engineering.application.networks.batching import MicroBatcher
+from llm_engineering.application.networks.onnx_backend import QUANTIZATION_CONFIGS, load_onnx_model
+from llm_engineering.settings import settings
+
+
+def run_clients(score: Callable[[list[tuple[str, str]]], object], requests: list[list[tuple[str, str]]], concurrency: int) -> dict:
+    """Send ``requests`` from ``concurrency`` closed-loop client threads; latency of each request in seconds."""
+    latencies = np.empty(len(requests))
+    next_request = iter(range(len(requests)))
+    lock = threading.Lock()
+
+    def client() -> None:
+        while True:
+            with lock:
+                index = next(next_request, None)
+            if index is None:
+                return
+            start = time.perf_counter()
+            score(requests[index])
+            latencies[index] = time.perf_counter() - start
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_seconds = time.perf_counter() - start
+
+    num_pairs = sum(len(pairs) for pairs in requests)
+    return {
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p95_ms": float(np.percentile(latencies, 95) * 1000),
+        "p99_ms": float(np.percentile(latencies, 99) * 1000),
+        "requests_per_second": len(requests) / wall_seconds,
+        "pairs_per_second": num_pairs / wall_seconds,
+    }
+
+
+def _predict(model, batch_size: int, batch: list[tuple[str, str]]) -> np.ndarray:
+    return model.predict(batch, batch_size=batch_size, show_progress_bar=False)
+
+
+@click.command()
+@click.option("--model-id", default=settings.RERANKING_CROSS_ENCODER_MODEL_ID, show_default=True)
+@click.option("--quantization", type=click.Choice(QUANTIZATION_CONFIGS), default=None, help="Also benchmark an int8 ONNX model.")
+@click.option("--intra-op-threads", type=int, default=None)
+@click.option("--inter-op-threads", type=int, default=None)
+@click.option("--concurrency", default=16, show_default=True, help="Client threads sending requests.")
+@click.option("--num-requests", default=400, show_default=True)
+@click.option("--pairs", default=20, show_default=True, help="(query, chunk) pairs per request, the retrieved candidates.")
+@click.option("--max-batch-size", default=settings.RERANK_MAX_BATCH_SIZE, show_default=True)
+@click.option("--max-wait-ms", default=settings.RERANK_MAX_WAIT_MS, show_default=True)
+@click.option("--output", type=click.Path(dir_okay=False), default=None, help="Write results as JSON.")
+def main(
+    model_id: str,
+    quantization: str | None,
+    intra_op_threads: int | None,
+    inter_op_threads: int | None,
+    concurrency: int,
+    num_requests: int,
+    pairs: int,
+    max_batch_size: int,
+    max_wait_ms: float,
+    output: str | None,
+) -> None:
+    from sentence_transformers.cross_encoder import CrossEncoder
+
+    generator = LegalCorpusGenerator(seed=0)
+    chunks = generator.chunks(pairs * 25)
+    queries = generator.queries(num_requests)
+    requests = [
+        [(query, chunks[(i * pairs + j) % len(chunks)]) for j in range(pairs)] for i, query in enumerate(queries)
+    ]
+
+    variants = {"torch": None, "onnx": None}
+    if quantization:
+        variants[f"onnx-int8-{quantization}"] = quantization
+
+    results = {}
+    for name, variant_quantization in variants.items():
+        if name == "torch":
+            model = CrossEncoder(model_id, device="cpu")
+            model.model.eval()
+        else:
+            model = load_onnx_model(
+                model_id,
+                export_root=settings.EMBEDDING_ONNX_DIR,
+                quantization=variant_quantization,
+                intra_op_threads=intra_op_threads,
+                inter_op_threads=inter_op_threads,
+                model_cls=CrossEncoder,
+            )
+
+        predict = partial(_predict, model, max_batch_size)
+        predict(requests[0])  # warm-up
+
+        batcher = MicroBatcher(predict, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms, name=f"rerank-{name}")
+        results[name] = {
+            "direct": run_clients(predict, requests, concurrency),
+            "batched": run_clients(batcher.map, requests, concurrency),
+        }
+        batcher_stats = batcher.stats()
+        batcher.close()
+        results[name]["batched"]["mean_batch_size"] = batcher_stats["mean_batch_size"]
+        results[name]["batched"]["mean_queue_wait_ms"] = batcher_stats["mean_queue_wait_ms"]
+
+        for mode, metrics in results[name].items():
+            batching = (
+                f", mean batch {metrics['mean_batch_size']:.1f} pairs, queue wait {metrics['mean_queue_wait_ms']:.1f} ms"
+                if mode == "batched"
+                else ""
+            )
+            logger.info(
+                f"{name} {mode}: p50 {metrics['p50_ms']:.1f} ms / p95 {metrics['p95_ms']:.1f} ms / p99 {metrics['p99_ms']:.1f} ms, "
+                f"{metrics['requests_per_second']:.1f} req/s ({metrics['pairs_per_second']:,.0f} pairs/s){batching}"
+            )
+
+    if output:
+        config = {"model_id": model_id, "concurrency": concurrency, "num_requests": num_requests, "pairs": pairs,
+                  "max_batch_size": max_batch_size, "max_wait_ms": max_wait_ms,
+                  "intra_op_threads": intra_op_threads, "inter_op_threads": inter_op_threads}
+        Path(output).write_text(json.dumps({"config": config, "variants": results}, indent=2) + "\n")
+        logger.info(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Tokenization time per rerank request, with and without cached chunk token ids.
+
+``text`` tokenizes every (query, chunk) text pair, as ``CrossEncoder.predict``
+does. ``cached`` tokenizes only the query and assembles the model inputs from
+chunk token ids tokenized beforehand (``ChunkTokenCache``, warm). The command
+checks that both give the same input ids and reports the largest score
+difference over the requests:
+
+    HF_HUB_OFFLINE=1 python -m benchmarks.rerank_tokenization --pairs 20
+"""
+import json
+import sys
+import time
+from pathlib import Path
+
+import click
+import numpy as np
+import torch
+from loguru import logger
+
+from benchmarks.corpus import LegalCorpusGenerator
+from llm_engineering.application.networks.cross_encoder import CrossEncoderModelSingleton
+
+
+@click.command()
+@click.option("--num-requests", default=200, show_default=True)
+@click.option("--pairs", default=20, show_default=True, help="(query, chunk) pairs per request, the retrieved candidates.")
+@click.option("--output", type=click.Path(dir_okay=False), default=None, help="Write results as JSON.")
+def main(num_requests: int, pairs: int, output: str | None) -> None:
+    model = CrossEncoderModelSingleton()
+    if not model.supports_token_ids:
+        raise click.UsageError(f"The {model.backend} reranker backend does not score token ids, set RERANKER_BACKEND=torch")
+
+    generator = LegalCorpusGenerator(seed=0)
+    chunks = generator.chunks(pairs * 25)
+    queries = generator.queries(num_requests)
+    requests = [[(chunks[(i * pairs + j) % len(chunks)]) for j in range(pairs)] for i in range(num_requests)]
+    chunk_ids = dict(zip(chunks, model.tokenize(chunks)))
+
+    text_seconds = np.empty(num_requests)
+    cached_seconds = np.empty(num_requests)
+    max_score_diff = 0.0
+    for i, (query, request) in enumerate(zip(queries, requests)):
+        start = time.perf_counter()
+        text_features = model.tokenizer(
+            [[query, chunk] for chunk in request],
+            padding=True,
+            truncation=True,
+            max_length=model.max_length,
+            return_tensors="pt",
+        )
+        text_seconds[i] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        query_ids = model.tokenize([query])[0]
+        token_pairs = [(query_ids, chunk_ids[chunk]) for chunk in request]
+        cached_features = model.token_features(token_pairs)
+        cached_seconds[i] = time.perf_counter() - start
+
+        if not torch.equal(text_features["input_ids"], cached_features["input_ids"]):
+            logger.error(f"Request {i}: input ids differ from tokenizing the text pairs")
+            sys.exit(1)
+
+        if i < 20:
+            text_scores = np.asarray(model([(query, chunk) for chunk in request]))
+            max_score_diff = max(max_score_diff, float(np.abs(text_scores - model.score_token_ids(token_pairs)).max()))
+
+    results = {
+        "text_ms_per_request": float(text_seconds.mean() * 1000),
+        "cached_ms_per_request": float(cached_seconds.mean() * 1000),
+        "saved_ms_per_request": float((text_seconds.mean() - cached_seconds.mean()) * 1000),
+        "max_score_diff": max_score_diff,
+    }
+    logger.info(
+        f"Tokenization per request of {pairs} pairs: text {results['text_ms_per_request']:.2f} ms, "
+        f"cached chunk ids {results['cached_ms_per_request']:.2f} ms, "
+        f"{results['saved_ms_per_request']:.2f} ms saved ({text_seconds.mean() / cached_seconds.mean():.1f}x); "
+        f"max score difference {max_score_diff:.2e}"
+    )
+
+    if output:
+        config = {"model_id": model.model_id, "num_requests": num_requests, "pairs": pairs}
+        Path(output).write_text(json.dumps({"config": config, "results": results}, indent=2) + "\n")
+        logger.info(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Throughput of the vectorized batch path against the per-text sparse encoding loop.
+
+Usage:
+    python -m benchmarks.sparse_batch_encode --num-chunks 100000 --batch-size 1000
+"""
+import random
+import time
+from collections import Counter
+
+import click
+from loguru import logger
+
+from llm_engineering.application.networks.sparse_encoder import BM25SparseEncoder
+
+SYLLABLES = [
+    "lao", "động", "người", "tiền", "lương", "quy", "định", "điều", "khoản", "chương", "quyết", "nghị",
+    "thông", "tư", "hợp", "đồng", "bảo", "hiểm", "xã", "hội", "thời", "giờ", "làm", "việc", "nghỉ",
+    "ngơi", "phụ", "cấp", "trợ", "ủy", "ban", "nhân", "dân", "tỉnh", "cán", "bộ", "công", "chức",
+]
+
+
+def synthetic_chunks(num_chunks: int, seed: int = 0) -> list[str]:
+    """Chunks drawn from a Zipf-distributed vocabulary of syllables and syllable pairs."""
+    rng = random.Random(seed)
+    vocabulary = SYLLABLES + [f"{a}{b}" for a in SYLLABLES for b in SYLLABLES if a != b]
+    rng.shuffle(vocabulary)
+    weights = [1.0 / rank for rank in range(1, len(vocabulary) + 1)]
+
+    chunks = []
+    for i in range(num_chunks):
+        words = rng.choices(vocabulary, weights=weights, k=rng.randint(20, 250))
+        chunks.append(f"Điều {i % 200 + 1}: " + " ".join(words))
+    return chunks
+
+
+def per_text_encode(encoder: BM25SparseEncoder, vocab: dict, idf: dict, text: str) -> dict:
+    """The dict/Counter/sorted() loop the encoders used before the batch engine."""
+    tokens = encoder.tokenizer(text)
+    doc_len = len(tokens)
+    scores = {}
+    for term, freq in Counter(tokens).items():
+        if term in vocab:
+            norm_factor = 1.0 - encoder.b + encoder.b * (doc_len / encoder.avgdl) if encoder.avgdl > 0 else 1.0
+            scores[term] = idf[term] * (freq * (encoder.k1 + 1.0)) / (freq + encoder.k1 * norm_factor)
+
+    top_items = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:encoder.max_terms]
+    return {"indices": [vocab[term] for term, _ in top_items], "values": [score for _, score in top_items]}
+
+
+@click.command()
+@click.option("--num-chunks", default=100_000, show_default=True)
+@click.option("--batch-size", default=1_000, show_default=True)
+def main(num_chunks: int, batch_size: int) -> None:
+    chunks = synthetic_chunks(num_chunks)
+
+    encoder = BM25SparseEncoder()
+    encoder.fit(chunks)
+
+    vocab = dict(encoder.vocab)
+    idf = {term: float(encoder.idf[term_id]) for term, term_id in vocab.items()}
+    encoder.tokenizer.cache_clear()
+
+    start = time.perf_counter()
+    for text in chunks:
+        per_text_encode(encoder, vocab, idf, text)
+    per_text_seconds = time.perf_counter() - start
+    encoder.tokenizer.cache_clear()
+
+    start = time.perf_counter()
+    for i in range(0, num_chunks, batch_size):
+        encoder.encode_batch(chunks[i : i + batch_size])
+    batch_seconds = time.perf_counter() - start
+    encoder.tokenizer.cache_clear()
+
+    start = time.perf_counter()
+    for i in range(0, num_chunks, batch_size):
+        encoder.encode(chunks[i : i + batch_size])
+    dicts_seconds = time.perf_counter() - start
+
+    logger.info(f"per-text loop:         {num_chunks / per_text_seconds:,.0f} chunks/s ({per_text_seconds:.2f}s)")
+    logger.info(f"batch engine (arrays): {num_chunks / batch_seconds:,.0f} chunks/s ({batch_seconds:.2f}s)")
+    logger.info(f"batch engine (dicts):  {num_chunks / dicts_seconds:,.0f} chunks/s ({dicts_seconds:.2f}s)")
+    logger.info(f"speedup (arrays): {per_text_seconds / batch_seconds:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
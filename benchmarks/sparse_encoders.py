@@ -0,0 +1,209 @@
+"""
+Offline benchmark suite for the sparse encoders, with JSON output and baseline comparison.
+
+Each algorithm runs in a fresh process on the synthetic legal corpus from
+``benchmarks.corpus``, so its peak RSS is not inflated by the previous one and
+nothing is downloaded or read from Qdrant/MongoDB.
+
+Usage:
+    python -m benchmarks.sparse_encoders --num-chunks 20000 --output results.json
+    python -m benchmarks.sparse_encoders --baseline benchmarks/baselines/sparse_encoders.json
+"""
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import click
+import numpy as np
+from loguru import logger
+
+from benchmarks.corpus import LegalCorpusGenerator
+
+ALGORITHMS = ("bm25", "tfidf")
+
+# Whether a larger value of the metric is an improvement
+HIGHER_IS_BETTER = {
+    "fit_seconds": False,
+    "fit_docs_per_second": True,
+    "encode_single_per_second": True,
+    "encode_query_p50_ms": False,
+    "encode_query_p99_ms": False,
+    "encode_batch_per_second": True,
+    "save_seconds": False,
+    "load_seconds": False,
+    "model_bytes": False,
+    "peak_rss_mb": False,
+}
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def run_algorithm(algorithm: str, num_chunks: int, num_queries: int, batch_size: int, seed: int) -> dict:
+    """Benchmark one algorithm; meant to run in its own process."""
+    from llm_engineering.application.networks.sparse_encoder.registry import create_sparse_encoder
+
+    generator = LegalCorpusGenerator(seed=seed)
+    chunks = generator.chunks(num_chunks)
+    queries = generator.queries(num_queries)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = str(Path(tmp_dir) / f"sparse_{algorithm}_model")
+        encoder = create_sparse_encoder(algorithm, model_path=model_path)
+
+        start = time.perf_counter()
+        encoder.fit(chunks)
+        fit_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for chunk in chunks:
+            encoder.encode(chunk)
+        single_seconds = time.perf_counter() - start
+
+        # Queries repeat in production, but every query here is distinct: measure the uncached path
+        encoder.tokenizer.cache_clear()
+        latencies = np.empty(len(queries))
+        for i, query in enumerate(queries):
+            start = time.perf_counter()
+            encoder.encode(query)
+            latencies[i] = time.perf_counter() - start
+        encoder.tokenizer.cache_clear()
+
+        start = time.perf_counter()
+        for i in range(0, len(chunks), batch_size):
+            encoder.encode_batch(chunks[i : i + batch_size])
+        batch_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        encoder.save(model_path)
+        save_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        loaded = create_sparse_encoder(algorithm, model_path=model_path)
+        load_seconds = time.perf_counter() - start
+        if not loaded._is_fitted:
+            raise RuntimeError(f"{algorithm.upper()} model did not load back from {model_path}")
+
+        model_bytes = sum(path.stat().st_size for path in Path(model_path).iterdir())
+
+    return {
+        "fit_seconds": fit_seconds,
+        "fit_docs_per_second": len(chunks) / fit_seconds,
+        "encode_single_per_second": len(chunks) / single_seconds,
+        "encode_query_p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "encode_query_p99_ms": float(np.percentile(latencies, 99) * 1000),
+        "encode_batch_per_second": len(chunks) / batch_seconds,
+        "save_seconds": save_seconds,
+        "load_seconds": load_seconds,
+        "model_bytes": model_bytes,
+        "vocab_size": len(encoder.vocab),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def best_of(runs: list[dict]) -> dict:
+    """Best value of every metric over repeated runs, which filters out scheduling noise."""
+    best = dict(runs[0])
+    for metric, higher_is_better in HIGHER_IS_BETTER.items():
+        values = [run[metric] for run in runs]
+        best[metric] = max(values) if higher_is_better else min(values)
+    return best
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Metrics that are worse than the baseline by more than ``tolerance`` (a fraction)."""
+    regressions = []
+    for algorithm, metrics in results["algorithms"].items():
+        baseline_metrics = baseline.get("algorithms", {}).get(algorithm, {})
+
+        for metric, higher_is_better in HIGHER_IS_BETTER.items():
+            reference = baseline_metrics.get(metric)
+            if not reference or metric not in metrics:
+                continue
+
+            change = (metrics[metric] - reference) / reference
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(f"{algorithm}.{metric}: {metrics[metric]:,.4g} vs baseline {reference:,.4g} ({change:+.1%})")
+
+    return regressions
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": multiprocessing.cpu_count(),
+    }
+
+
+@click.command()
+@click.option("--algorithm", "algorithms", multiple=True, type=click.Choice(ALGORITHMS), default=ALGORITHMS)
+@click.option("--num-chunks", default=20_000, show_default=True)
+@click.option("--num-queries", default=5_000, show_default=True)
+@click.option("--batch-size", default=256, show_default=True)
+@click.option("--seed", default=0, show_default=True)
+@click.option("--repeats", default=3, show_default=True, help="Fresh-process runs per algorithm, best value kept.")
+@click.option("--output", type=click.Path(dir_okay=False), default=None, help="Write results as JSON.")
+@click.option("--baseline", type=click.Path(exists=True, dir_okay=False), default=None, help="Fail on regressions against this JSON.")
+@click.option("--tolerance", default=0.2, show_default=True, help="Allowed relative regression per metric.")
+def main(
+    algorithms: tuple[str, ...],
+    num_chunks: int,
+    num_queries: int,
+    batch_size: int,
+    seed: int,
+    repeats: int,
+    output: str | None,
+    baseline: str | None,
+    tolerance: float,
+) -> None:
+    config = {"num_chunks": num_chunks, "num_queries": num_queries, "batch_size": batch_size, "seed": seed, "repeats": repeats}
+    results = {"config": config, "environment": environment(), "algorithms": {}}
+
+    for algorithm in algorithms:
+        runs = []
+        for _ in range(repeats):
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                runs.append(pool.submit(run_algorithm, algorithm, num_chunks, num_queries, batch_size, seed).result())
+
+        metrics = best_of(runs)
+        results["algorithms"][algorithm] = metrics
+        logger.info(
+            f"{algorithm.upper()}: fit {metrics['fit_seconds']:.2f}s ({metrics['fit_docs_per_second']:,.0f} docs/s), "
+            f"single {metrics['encode_single_per_second']:,.0f}/s (p50 {metrics['encode_query_p50_ms']:.3f} ms, "
+            f"p99 {metrics['encode_query_p99_ms']:.3f} ms), batch {metrics['encode_batch_per_second']:,.0f}/s, "
+            f"load {metrics['load_seconds'] * 1000:.1f} ms, {metrics['model_bytes'] / 1024:.0f} KB on disk, "
+            f"peak RSS {metrics['peak_rss_mb']:.0f} MB"
+        )
+
+    if output:
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        Path(output).write_text(json.dumps(results, indent=2) + "\n")
+        logger.info(f"Results written to {output}")
+
+    if baseline:
+        baseline_results = json.loads(Path(baseline).read_text())
+        if baseline_results.get("config") != config:
+            logger.warning(f"Baseline was recorded with {baseline_results.get('config')}, not {config}")
+
+        regressions = compare(results, baseline_results, tolerance)
+        if regressions:
+            for regression in regressions:
+                logger.error(f"Regression: {regression}")
+            sys.exit(1)
+
+        logger.info(f"No regressions beyond {tolerance:.0%} against {baseline}")
+
+
+if __name__ == "__main__":
+    main()
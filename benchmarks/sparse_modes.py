@@ -0,0 +1,153 @@
+"""
+Retrieval quality and latency of the fitted sparse encoders against the stateless mode.
+
+Documents are scored the way the ``text`` vector of the Qdrant collection scores
+them (``Modifier.IDF`` applied to the query), using the in-process
+``InvertedIndex``, which implements the same formula, so the comparison runs
+offline. Every query is built from the words of one chunk, which is its only
+relevant result.
+
+Modes:
+    bm25 / tfidf     fitted model, IDF in the vectors and again from the collection (current setup)
+    *_no_modifier    the same vectors scored without the collection IDF
+    stateless_bm25   hashed term frequencies, IDF only from the collection
+
+Usage:
+    python -m benchmarks.sparse_modes --num-chunks 20000 --num-queries 2000
+"""
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import click
+import numpy as np
+from loguru import logger
+
+from benchmarks.corpus import LegalCorpusGenerator
+from llm_engineering.application.networks.sparse_encoder import InvertedIndex
+from llm_engineering.application.networks.sparse_encoder.batch import SparseBatch
+from llm_engineering.application.networks.sparse_encoder.registry import create_sparse_encoder
+
+MODES = {
+    # mode: (algorithm, collection IDF modifier)
+    "bm25": ("bm25", True),
+    "bm25_no_modifier": ("bm25", False),
+    "tfidf": ("tfidf", True),
+    "stateless_bm25": ("stateless_bm25", True),
+}
+
+
+def known_item_queries(chunks: list[str], num_queries: int, seed: int = 0) -> tuple[list[str], list[int]]:
+    """Queries made of a few distinct words of a random chunk, and the index of that chunk."""
+    rng = random.Random(seed)
+    queries, targets = [], []
+    while len(queries) < num_queries:
+        target = rng.randrange(len(chunks))
+        words = list(dict.fromkeys(chunks[target].lower().split()))
+        if len(words) < 8:
+            continue
+        queries.append(" ".join(rng.sample(words, rng.randint(3, 8))))
+        targets.append(target)
+    return queries, targets
+
+
+def evaluate_mode(
+    mode: str, chunks: list[str], queries: list[str], targets: list[int], k: int, batch_size: int
+) -> dict:
+    algorithm, idf_modifier = MODES[mode]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = str(Path(tmp_dir) / f"sparse_{algorithm}_model")
+        encoder = create_sparse_encoder(algorithm, model_path=model_path)
+
+        fit_seconds = 0.0
+        if not encoder.stateless:
+            start = time.perf_counter()
+            encoder.fit(chunks)
+            fit_seconds = time.perf_counter() - start
+            encoder.save(model_path)
+
+        # What API startup pays before the first query
+        start = time.perf_counter()
+        encoder = create_sparse_encoder(algorithm, model_path=model_path)
+        load_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        vectors = [encoder.encode_batch(chunks[i : i + batch_size]) for i in range(0, len(chunks), batch_size)]
+        encode_seconds = time.perf_counter() - start
+
+        doc_vectors = [row for batch in vectors for row in batch.to_dicts()]
+        index = InvertedIndex.build(
+            [str(i) for i in range(len(chunks))],
+            SparseBatch.from_dicts(doc_vectors),
+            num_terms=encoder.dim,
+            idf_modifier=idf_modifier,
+        )
+
+        encoder.tokenizer.cache_clear()
+        query_latencies = np.empty(len(queries))
+        search_latencies = np.empty(len(queries))
+        reciprocal_ranks = np.zeros(len(queries))
+        hits = np.zeros(len(queries))
+
+        for i, (query, target) in enumerate(zip(queries, targets)):
+            start = time.perf_counter()
+            query_vector = encoder.encode_queries([query])[0]
+            query_latencies[i] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            results = index.search(query_vector["indices"], query_vector["values"], k=k)
+            search_latencies[i] = time.perf_counter() - start
+
+            ranked = [int(doc_id) for doc_id, _ in results]
+            if target in ranked:
+                reciprocal_ranks[i] = 1.0 / (ranked.index(target) + 1)
+                hits[i] = 1.0
+
+    return {
+        f"mrr@{k}": float(reciprocal_ranks.mean()),
+        f"recall@{k}": float(hits.mean()),
+        "fit_seconds": fit_seconds,
+        "load_ms": load_seconds * 1000,
+        "encode_docs_per_second": len(chunks) / encode_seconds,
+        "query_encode_p50_ms": float(np.percentile(query_latencies, 50) * 1000),
+        "search_p50_ms": float(np.percentile(search_latencies, 50) * 1000),
+        "search_p99_ms": float(np.percentile(search_latencies, 99) * 1000),
+    }
+
+
+@click.command()
+@click.option("--mode", "modes", multiple=True, type=click.Choice(list(MODES)), default=list(MODES))
+@click.option("--num-chunks", default=20_000, show_default=True)
+@click.option("--num-queries", default=2_000, show_default=True)
+@click.option("--k", default=10, show_default=True)
+@click.option("--batch-size", default=256, show_default=True)
+@click.option("--seed", default=0, show_default=True)
+@click.option("--output", type=click.Path(dir_okay=False), default=None, help="Write results as JSON.")
+def main(
+    modes: tuple[str, ...], num_chunks: int, num_queries: int, k: int, batch_size: int, seed: int, output: str | None
+) -> None:
+    chunks = LegalCorpusGenerator(seed=seed).chunks(num_chunks)
+    queries, targets = known_item_queries(chunks, num_queries, seed=seed)
+
+    results = {}
+    for mode in modes:
+        metrics = evaluate_mode(mode, chunks, queries, targets, k=k, batch_size=batch_size)
+        results[mode] = metrics
+        logger.info(
+            f"{mode}: MRR@{k} {metrics[f'mrr@{k}']:.4f}, recall@{k} {metrics[f'recall@{k}']:.3f}, "
+            f"fit {metrics['fit_seconds']:.2f}s, load {metrics['load_ms']:.1f} ms, "
+            f"encode {metrics['encode_docs_per_second']:,.0f} docs/s, query encode p50 {metrics['query_encode_p50_ms']:.3f} ms, "
+            f"search p50 {metrics['search_p50_ms']:.2f} ms / p99 {metrics['search_p99_ms']:.2f} ms"
+        )
+
+    if output:
+        config = {"num_chunks": num_chunks, "num_queries": num_queries, "k": k, "seed": seed}
+        Path(output).write_text(json.dumps({"config": config, "modes": results}, indent=2) + "\n")
+        logger.info(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
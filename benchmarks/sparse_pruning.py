@@ -0,0 +1,122 @@
+"""
+Index size and query latency against retrieval quality for mass pruning and weight quantization.
+
+The encoder is fitted once on the synthetic legal corpus; every pruning setting
+re-encodes the chunks, builds the in-process ``InvertedIndex`` (scored like the
+Qdrant ``text`` vector, IDF modifier included) and runs the known-item queries
+of ``benchmarks.sparse_modes``. ``qdrant_mb`` estimates the sparse vector
+storage in Qdrant: 4 bytes per index plus the weight datatype.
+
+Usage:
+    python -m benchmarks.sparse_pruning --algorithm bm25 --weight-mass 1.0 --weight-mass 0.9 --quantization uint8
+"""
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import click
+import numpy as np
+from loguru import logger
+
+from benchmarks.corpus import LegalCorpusGenerator
+from benchmarks.sparse_modes import known_item_queries
+from llm_engineering.application.networks.sparse_encoder import InvertedIndex
+from llm_engineering.application.networks.sparse_encoder.registry import create_sparse_encoder
+
+WEIGHT_BYTES = {"none": 4, "float16": 2, "uint8": 1}
+
+
+def evaluate(encoder, chunks: list[str], queries: list[str], targets: list[int], k: int) -> dict:
+    vectors = encoder.encode_batch(chunks)
+    index = InvertedIndex.build([str(i) for i in range(len(chunks))], vectors, num_terms=encoder.dim)
+
+    search_latencies = np.empty(len(queries))
+    reciprocal_ranks = np.zeros(len(queries))
+    hits = np.zeros(len(queries))
+
+    query_vectors = encoder.encode_queries(queries)
+    for i, (query_vector, target) in enumerate(zip(query_vectors, targets)):
+        start = time.perf_counter()
+        results = index.search(query_vector["indices"], query_vector["values"], k=k)
+        search_latencies[i] = time.perf_counter() - start
+
+        ranked = [int(doc_id) for doc_id, _ in results]
+        if target in ranked:
+            reciprocal_ranks[i] = 1.0 / (ranked.index(target) + 1)
+            hits[i] = 1.0
+
+    num_postings = len(vectors.indices)
+    weight_bytes = WEIGHT_BYTES[encoder.quantization or "none"]
+
+    return {
+        "terms_per_doc": num_postings / len(chunks),
+        "postings": num_postings,
+        "qdrant_mb": num_postings * (4 + weight_bytes) / 1024 / 1024,
+        "local_index_mb": index.nbytes / 1024 / 1024,
+        f"mrr@{k}": float(reciprocal_ranks.mean()),
+        f"recall@{k}": float(hits.mean()),
+        "search_p50_ms": float(np.percentile(search_latencies, 50) * 1000),
+        "search_p99_ms": float(np.percentile(search_latencies, 99) * 1000),
+    }
+
+
+@click.command()
+@click.option("--algorithm", default="bm25", type=click.Choice(["bm25", "tfidf", "stateless_bm25"]), show_default=True)
+@click.option("--weight-mass", "weight_masses", multiple=True, type=float, default=(1.0, 0.95, 0.9, 0.8, 0.7))
+@click.option("--quantization", "quantizations", multiple=True, type=click.Choice(list(WEIGHT_BYTES)), default=("none", "float16", "uint8"))
+@click.option("--min-terms", default=8, show_default=True)
+@click.option("--num-chunks", default=20_000, show_default=True)
+@click.option("--num-queries", default=2_000, show_default=True)
+@click.option("--k", default=10, show_default=True)
+@click.option("--seed", default=0, show_default=True)
+@click.option("--output", type=click.Path(dir_okay=False), default=None, help="Write results as JSON.")
+def main(
+    algorithm: str,
+    weight_masses: tuple[float, ...],
+    quantizations: tuple[str, ...],
+    min_terms: int,
+    num_chunks: int,
+    num_queries: int,
+    k: int,
+    seed: int,
+    output: str | None,
+) -> None:
+    chunks = LegalCorpusGenerator(seed=seed).chunks(num_chunks)
+    queries, targets = known_item_queries(chunks, num_queries, seed=seed)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = str(Path(tmp_dir) / f"sparse_{algorithm}_model")
+        encoder = create_sparse_encoder(algorithm, model_path=model_path)
+        if not encoder.stateless:
+            encoder.fit(chunks)
+            encoder.save(model_path)
+
+        for weight_mass in weight_masses:
+            for quantization in quantizations:
+                encoder = create_sparse_encoder(
+                    algorithm,
+                    model_path=model_path,
+                    weight_mass=weight_mass,
+                    min_terms=min_terms,
+                    quantization=None if quantization == "none" else quantization,
+                )
+                metrics = {"weight_mass": weight_mass, "quantization": quantization, **evaluate(encoder, chunks, queries, targets, k)}
+                results.append(metrics)
+
+                logger.info(
+                    f"mass {weight_mass:.2f} {quantization:>7}: {metrics['terms_per_doc']:.1f} terms/doc, "
+                    f"Qdrant ~{metrics['qdrant_mb']:.1f} MB, local index {metrics['local_index_mb']:.1f} MB, "
+                    f"MRR@{k} {metrics[f'mrr@{k}']:.4f}, recall@{k} {metrics[f'recall@{k}']:.3f}, "
+                    f"search p50 {metrics['search_p50_ms']:.2f} ms / p99 {metrics['search_p99_ms']:.2f} ms"
+                )
+
+    if output:
+        config = {"algorithm": algorithm, "min_terms": min_terms, "num_chunks": num_chunks, "num_queries": num_queries, "k": k, "seed": seed}
+        Path(output).write_text(json.dumps({"config": config, "results": results}, indent=2) + "\n")
+        logger.info(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Microbenchmarks of the shared sparse tokenizer against the per-encoder ``lru_cache`` regex it replaces.
+
+Usage:
+    python -m benchmarks.tokenizer --num-chunks 20000 --num-queries 50000
+"""
+import random
+import re
+import time
+import tracemalloc
+from functools import lru_cache
+
+import click
+from loguru import logger
+
+from benchmarks.sparse_batch_encode import SYLLABLES, synthetic_chunks
+from llm_engineering.application.networks.sparse_encoder.storage import TermTable
+from llm_engineering.application.networks.sparse_encoder.tokenizer import Tokenizer
+
+LEGACY_PATTERN = r'[a-záàảãạăắằẳẵặâấầẩẫậéèẻẽẹêếềểễệíìỉĩịóòỏõọôốồổỗộơớờởỡợúùủũụưứừửữựýỳỷỹỵđ]+'
+
+
+@lru_cache(maxsize=10000)
+def legacy_tokenize(text: str) -> tuple:
+    """The ``_tokenize`` static method both encoders used to carry."""
+    tokens = re.findall(LEGACY_PATTERN, text.lower())
+    return tuple(tokens)
+
+
+def synthetic_queries(num_queries: int, num_distinct: int, seed: int = 0) -> list[str]:
+    """Short queries drawn with a skew, so popular ones repeat like real traffic."""
+    rng = random.Random(seed)
+    distinct = [" ".join(rng.choices(SYLLABLES, k=rng.randint(3, 12))) for _ in range(num_distinct)]
+    weights = [1.0 / rank for rank in range(1, num_distinct + 1)]
+    return rng.choices(distinct, weights=weights, k=num_queries)
+
+
+def timed(tokenize, texts: list[str], cache_clear) -> tuple[float, int]:
+    """Seconds to tokenize ``texts`` and bytes still allocated afterwards (what the cache pins).
+
+    Memory is traced on a second, cold run so tracing does not skew the timing.
+    """
+    cache_clear()
+    start = time.perf_counter()
+    for text in texts:
+        tokenize(text)
+    seconds = time.perf_counter() - start
+
+    cache_clear()
+    tracemalloc.start()
+    for text in texts:
+        tokenize(text)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return seconds, retained
+
+
+@click.command()
+@click.option("--num-chunks", default=20_000, show_default=True)
+@click.option("--num-queries", default=50_000, show_default=True)
+@click.option("--num-distinct-queries", default=2_000, show_default=True)
+def main(num_chunks: int, num_queries: int, num_distinct_queries: int) -> None:
+    chunks = synthetic_chunks(num_chunks)
+    queries = synthetic_queries(num_queries, num_distinct_queries)
+
+    tokenizer = Tokenizer()
+
+    for label, texts, unit in (("chunks", chunks, "chunks"), ("queries", queries, "queries")):
+        legacy_seconds, legacy_bytes = timed(legacy_tokenize, texts, legacy_tokenize.cache_clear)
+        seconds, retained_bytes = timed(tokenizer, texts, tokenizer.cache_clear)
+
+        legacy_info = legacy_tokenize.cache_info()
+        info = tokenizer.cache_info()
+        logger.info(
+            f"{label}: lru_cache regex {len(texts) / legacy_seconds:,.0f} {unit}/s, "
+            f"{legacy_bytes / 1024 / 1024:.1f} MB retained, hit rate {legacy_info.hits / len(texts):.1%}"
+        )
+        logger.info(
+            f"{label}: Tokenizer       {len(texts) / seconds:,.0f} {unit}/s, "
+            f"{retained_bytes / 1024 / 1024:.1f} MB retained, hit rate {info['hits'] / len(texts):.1%}"
+        )
+
+    vocab = TermTable.from_vocab({term: idx for idx, term in enumerate(sorted({*SYLLABLES}))})
+    batch = chunks[:1000]
+
+    start = time.perf_counter()
+    for text in batch:
+        vocab.lookup(tokenizer(text))
+    per_text_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tokenizer.batch_token_ids(batch, vocab)
+    batch_seconds = time.perf_counter() - start
+
+    logger.info(
+        f"token ids: per-text lookup {len(batch) / per_text_seconds:,.0f} chunks/s, "
+        f"batch lookup {len(batch) / batch_seconds:,.0f} chunks/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+CPU time and peak memory of turning embedded chunks into a Qdrant upsert request.
+
+``lists`` is the per-point path: vectors converted to Python lists, validated as
+``EmbeddedChunk.embedding``, dumped with the payload and wrapped in one
+``PointStruct`` per chunk. ``ndarray`` keeps the vectors in one float32 array
+and builds a column-oriented ``Batch`` (``VectorBaseDocument.to_batch``). Both
+end with the JSON body the REST client sends, so no Qdrant server is needed.
+``retained_mb`` is what the embedded chunks hold between the embedding and the
+upload step, ``peak_mb`` includes building the requests of ``--batch-size`` points:
+
+    python -m benchmarks.vector_upload --num-chunks 10000 --dim 768
+"""
+import gc
+import json
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+import click
+import numpy as np
+from loguru import logger
+from qdrant_client.http import models
+
+from llm_engineering.domain.embedded_chunks import EmbeddedChunk
+
+CHUNK_FIELDS = {
+    "document_id": "document",
+    "document_number": "10/2012/QH13",
+    "document_type": "Luật",
+    "link": "https://thuvienphapluat.vn/van-ban/lao-dong",
+    "field": "Lao động - Tiền lương",
+}
+
+
+def sparse_vector(rng: np.random.Generator, num_terms: int = 64) -> dict:
+    indices = np.sort(rng.choice(50_000, size=num_terms, replace=False))
+    return {"indices": indices.tolist(), "values": rng.random(num_terms).tolist()}
+
+
+def build_lists(contents: list[str], sparse: list[dict], embeddings: np.ndarray) -> list[EmbeddedChunk]:
+    return [
+        EmbeddedChunk(content=content, embedding=embedding, sparse_embedding=sparse_embedding, **CHUNK_FIELDS)
+        for content, embedding, sparse_embedding in zip(contents, embeddings.tolist(), sparse)
+    ]
+
+
+def request_lists(chunks: list[EmbeddedChunk], batch_size: int) -> int:
+    body_bytes = 0
+    for start in range(0, len(chunks), batch_size):
+        points = [chunk.to_point() for chunk in chunks[start : start + batch_size]]
+        body_bytes += len(models.PointsList(points=points).model_dump_json())
+    return body_bytes
+
+
+def build_ndarray(contents: list[str], sparse: list[dict], embeddings: np.ndarray) -> tuple[list[EmbeddedChunk], np.ndarray]:
+    chunks = [
+        EmbeddedChunk(content=content, embedding=None, sparse_embedding=sparse_embedding, **CHUNK_FIELDS)
+        for content, sparse_embedding in zip(contents, sparse)
+    ]
+    return chunks, embeddings.copy()  # the array the embedding step returns
+
+
+def request_ndarray(state: tuple[list[EmbeddedChunk], np.ndarray], batch_size: int) -> int:
+    chunks, embeddings = state
+    body_bytes = 0
+    for start in range(0, len(chunks), batch_size):
+        batch = EmbeddedChunk.to_batch(chunks[start : start + batch_size], embeddings[start : start + batch_size])
+        body_bytes += len(models.PointsBatch(batch=batch).model_dump_json())
+    return body_bytes
+
+
+def measure(build: Callable, request: Callable[..., int], batch_size: int, *inputs) -> dict:
+    """CPU time untraced; then memory under tracemalloc (which slows allocation down)."""
+    gc.collect()
+    start = time.process_time()
+    state = build(*inputs)
+    build_seconds = time.process_time() - start
+    start = time.process_time()
+    body_bytes = request(state, batch_size)
+    request_seconds = time.process_time() - start
+    del state
+
+    gc.collect()
+    tracemalloc.start()
+    state = build(*inputs)
+    retained, _ = tracemalloc.get_traced_memory()
+    request(state, batch_size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "build_cpu_seconds": build_seconds,
+        "request_cpu_seconds": request_seconds,
+        "cpu_seconds": build_seconds + request_seconds,
+        "retained_mb": retained / 1024 / 1024,
+        "peak_mb": peak / 1024 / 1024,
+        "body_mb": body_bytes / 1024 / 1024,
+    }
+
+
+@click.command()
+@click.option("--num-chunks", default=10_000, show_default=True)
+@click.option("--dim", default=768, show_default=True)
+@click.option("--batch-size", default=256, show_default=True, help="Points per upsert request, as in load_to_vector_db.")
+@click.option("--output", type=click.Path(dir_okay=False), default=None, help="Write results as JSON.")
+def main(num_chunks: int, dim: int, batch_size: int, output: str | None) -> None:
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((num_chunks, dim)).astype(np.float32)
+    contents = [f"Điều {i}. Người lao động có quyền ..." for i in range(num_chunks)]
+    sparse = [sparse_vector(rng) for _ in range(num_chunks)]
+
+    results = {
+        "lists": measure(build_lists, request_lists, batch_size, contents, sparse, embeddings),
+        "ndarray": measure(build_ndarray, request_ndarray, batch_size, contents, sparse, embeddings),
+    }
+    for name, metrics in results.items():
+        logger.info(
+            f"{name}: {metrics['cpu_seconds']:.2f} s CPU (build {metrics['build_cpu_seconds']:.2f} s, "
+            f"request {metrics['request_cpu_seconds']:.2f} s), retained {metrics['retained_mb']:.0f} MB, "
+            f"peak {metrics['peak_mb']:.0f} MB (request bodies {metrics['body_mb']:.0f} MB)"
+        )
+
+    per_10k = 10_000 / num_chunks
+    lists, ndarray = results["lists"], results["ndarray"]
+    logger.info(
+        f"ndarray path saves {(lists['cpu_seconds'] - ndarray['cpu_seconds']) * per_10k:.2f} s CPU and "
+        f"{(lists['retained_mb'] - ndarray['retained_mb']) * per_10k:.0f} MB retained / "
+        f"{(lists['peak_mb'] - ndarray['peak_mb']) * per_10k:.0f} MB peak memory per 10k chunks "
+        f"({lists['cpu_seconds'] / ndarray['cpu_seconds']:.1f}x less CPU)"
+    )
+
+    if output:
+        config = {"num_chunks": num_chunks, "dim": dim, "batch_size": batch_size}
+        Path(output).write_text(json.dumps({"config": config, "paths": results}, indent=2) + "\n")
+        logger.info(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,19 @@
 from .embedding import EmbeddingModelSingleton
-from .sparse_embedding import get_sparse_encoder, BM25SparseEncoder, TFIDFSparseEncoder
+from .sparse_embedding import (
+    get_sparse_encoder,
+    create_sparse_encoder,
+    sparse_encoder_registry,
+    BM25SparseEncoder,
+    TFIDFSparseEncoder,
+    StatelessBM25SparseEncoder,
+)
 
-__all__ = ["EmbeddingModelSingleton", "get_sparse_encoder", "BM25SparseEncoder", "TFIDFSparseEncoder"]
\ No newline at end of file
+__all__ = [
+    "EmbeddingModelSingleton",
+    "get_sparse_encoder",
+    "create_sparse_encoder",
+    "sparse_encoder_registry",
+    "BM25SparseEncoder",
+    "TFIDFSparseEncoder",
+    "StatelessBM25SparseEncoder",
+]
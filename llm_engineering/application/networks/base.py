@@ -5,13 +5,22 @@ from abc import ABCMeta
 
 class SingletonMeta(ABCMeta):
     _instances: ClassVar = {}
-    _lock: Lock = Lock()
+    _locks: ClassVar = {}
+    _locks_lock: Lock = Lock()
 
     def __call__(cls, *args, **kwds):
-        with cls._lock:
-            if cls not in cls._instances:
-                instance = super().__call__(*args, **kwds)
-                cls._instances[cls] = instance
+        # One lock per class: loading one model does not block constructing another
+        if cls not in cls._instances:
+            with cls._class_lock():
+                if cls not in cls._instances:
+                    instance = super().__call__(*args, **kwds)
+                    cls._instances[cls] = instance
         return cls._instances[cls]
 
+    def instance(cls):
+        """The instance if it was already constructed, else None; never loads it."""
+        return cls._instances.get(cls)
 
+    def _class_lock(cls) -> Lock:
+        with SingletonMeta._locks_lock:
+            return SingletonMeta._locks.setdefault(cls, Lock())
@@ -0,0 +1,308 @@
+"""Batching of model inputs.
+
+``MicroBatcher``: request threads submit single items and block on a future;
+one inference thread drains the queue into batches of at most
+``max_batch_size`` items, waiting at most ``max_wait_ms`` after the first item
+for more to arrive, and runs one forward pass per batch instead of one per caller.
+
+``token_budget_batches``: groups texts of similar token length so that a
+padded batch (``batch size x longest text``) stays under a token budget,
+``encode_token_budget_batches`` embeds texts in such batches and
+``BucketingTotals`` keeps their padding efficiency and throughput.
+"""
+import queue
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import Future
+from typing import Generic, TypeVar
+
+import numpy as np
+from loguru import logger
+from numpy.typing import NDArray
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_STOP = object()
+
+
+class MicroBatcher(Generic[T, R]):
+    """Collects concurrent single-item calls into batched ``batch_fn`` calls on a dedicated thread.
+
+    Args:
+        batch_fn: Maps a list of items to one result per item, in order
+        max_batch_size: Items per batch at most
+        max_wait_ms: How long the first item of a batch waits for others
+        name: Name of the inference thread, used in logs
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[list[T]], Sequence[R]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0,
+        name: str = "micro-batcher",
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be at least 1, got {max_batch_size}")
+
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.name = name
+
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batch_sizes: Counter[int] = Counter()
+        self._items = 0
+        self._max_queue_depth = 0
+        self._queue_wait_seconds = 0.0
+        self._batch_listeners: list[Callable[[int, float], None]] = []
+
+    def add_batch_listener(self, listener: Callable[[int, float], None]) -> None:
+        """Call ``listener(batch size, seconds spent in batch_fn)`` after each successful batch; added once."""
+        with self._stats_lock:
+            if listener not in self._batch_listeners:
+                self._batch_listeners.append(listener)
+
+    def submit(self, item: T) -> Future:
+        """Queue ``item``; the future resolves to its result (or raises the batch's exception)."""
+        self._ensure_started()
+
+        future: Future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+
+        depth = self._queue.qsize()
+        if depth > self._max_queue_depth:
+            self._max_queue_depth = depth
+
+        return future
+
+    def __call__(self, item: T) -> R:
+        return self.submit(item).result()
+
+    def submit_many(self, items: Sequence[T]) -> Future:
+        """Queue ``items``; one future resolves to their results in order, or raises the first failure.
+
+        The items may be split across batches and share them with other callers' items.
+        """
+        request: Future = Future()
+        if not items:
+            request.set_result([])
+            return request
+
+        futures = [self.submit(item) for item in items]
+        remaining = len(futures)
+        lock = threading.Lock()
+
+        def on_done(future: Future) -> None:
+            nonlocal remaining
+            with lock:
+                remaining -= 1
+                if request.done():
+                    return
+                if future.exception() is not None:
+                    request.set_exception(future.exception())
+                elif remaining == 0:
+                    request.set_result([f.result() for f in futures])
+
+        for future in futures:
+            future.add_done_callback(on_done)
+
+        return request
+
+    def map(self, items: Sequence[T]) -> list[R]:
+        """Submit several items at once and wait for all of them."""
+        return self.submit_many(items).result()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            num_batches = sum(self._batch_sizes.values())
+            return {
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self._max_queue_depth,
+                "batches": num_batches,
+                "items": self._items,
+                "mean_batch_size": self._items / num_batches if num_batches else 0.0,
+                "max_batch_size": max(self._batch_sizes, default=0),
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                "mean_queue_wait_ms": self._queue_wait_seconds / self._items * 1000 if self._items else 0.0,
+            }
+
+    def close(self) -> None:
+        """Stop the inference thread after the items already queued."""
+        with self._start_lock:
+            if self._thread is None:
+                return
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+
+            batch = [first]
+            deadline = time.perf_counter() + self.max_wait
+            stop = False
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.perf_counter()
+                try:
+                    entry = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stop = True
+                    break
+                batch.append(entry)
+
+            self._run_batch(batch)
+            if stop:
+                return
+
+    def _run_batch(self, batch: list) -> None:
+        started = time.perf_counter()
+        items = [item for item, _, _ in batch]
+
+        try:
+            results = self.batch_fn(items)
+            seconds = time.perf_counter() - started
+            if len(results) != len(items):
+                raise ValueError(f"{self.name} returned {len(results)} results for {len(items)} items")
+        except Exception as e:
+            logger.error(f"{self.name} batch of {len(items)} failed: {e}")
+            for _, future, _ in batch:
+                future.set_exception(e)
+        else:
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+            for listener in list(self._batch_listeners):
+                try:
+                    listener(len(items), seconds)
+                except Exception as e:
+                    logger.error(f"{self.name} batch listener failed: {e}")
+
+        with self._stats_lock:
+            self._batch_sizes[len(batch)] += 1
+            self._items += len(batch)
+            self._queue_wait_seconds += sum(started - submitted for _, _, submitted in batch)
+
+
+def token_budget_batches(
+    lengths: Sequence[int] | NDArray[np.int64],
+    max_tokens: int,
+    max_batch_size: int | None = None,
+) -> list[NDArray[np.int64]]:
+    """Indices of ``lengths`` grouped into batches sorted by length.
+
+    A batch grows while ``len(batch) * longest <= max_tokens`` (the padded size
+    of the forward pass) and it has fewer than ``max_batch_size`` entries; a text
+    longer than the budget gets a batch of its own.
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    order = np.argsort(lengths, kind="stable")
+
+    batches = []
+    start = 0
+    for end in range(1, len(order) + 1):
+        # Ascending order: the text about to join is the longest of the batch
+        size = end - start
+        full = max_batch_size is not None and size > max_batch_size
+        if size > 1 and (full or size * lengths[order[end - 1]] > max_tokens):
+            batches.append(order[start : end - 1])
+            start = end - 1
+    if start < len(order):
+        batches.append(order[start:])
+
+    return batches
+
+
+def token_lengths(tokenizer, texts: Sequence[str], max_length: int) -> NDArray[np.int64]:
+    """Tokenized length of each text, special tokens included and capped at ``max_length``."""
+    encoded = tokenizer(
+        list(texts),
+        truncation=True,
+        max_length=max_length,
+        return_attention_mask=False,
+        return_token_type_ids=False,
+    )
+    return np.fromiter((len(ids) for ids in encoded["input_ids"]), dtype=np.int64, count=len(texts))
+
+
+def encode_token_budget_batches(
+    texts: Sequence[str],
+    lengths: NDArray[np.int64],
+    embedding_size: int,
+    encode_batches: Callable[[Iterator[list[str]]], Iterable[NDArray[np.float32]]],
+    max_tokens: int,
+    max_batch_size: int | None = None,
+) -> tuple[NDArray[np.float32], list[NDArray[np.int64]]]:
+    """Embeddings of ``texts`` in input order, plus the batches (``token_budget_batches``) they were encoded in.
+
+    ``encode_batches`` maps the stream of text batches to their embeddings, in order.
+    """
+    batches = token_budget_batches(lengths, max_tokens, max_batch_size)
+
+    embeddings = np.empty((len(texts), embedding_size), dtype=np.float32)
+    text_batches = ([texts[i] for i in batch] for batch in batches)
+    for batch, batch_embedding in zip(batches, encode_batches(text_batches)):
+        embeddings[batch] = batch_embedding
+
+    return embeddings, batches
+
+
+class BucketingTotals:
+    """Running totals of texts embedded in token-budget batches."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._totals = {"texts": 0, "batches": 0, "tokens": 0, "padded_tokens": 0, "seconds": 0.0}
+
+    def record(self, lengths: NDArray[np.int64], batches: Sequence[NDArray[np.int64]], seconds: float) -> None:
+        """Add one call's batches (indices into ``lengths``) and the time they took."""
+        with self._lock:
+            totals = self._totals
+            totals["texts"] += len(lengths)
+            totals["batches"] += len(batches)
+            totals["tokens"] += int(lengths.sum())
+            totals["padded_tokens"] += sum(len(batch) * int(lengths[batch].max()) for batch in batches if len(batch))
+            totals["seconds"] += seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            totals = dict(self._totals)
+
+        seconds = totals["seconds"]
+        return {
+            **totals,
+            "mean_batch_size": totals["texts"] / totals["batches"] if totals["batches"] else 0.0,
+            "padding_efficiency": totals["tokens"] / totals["padded_tokens"] if totals["padded_tokens"] else 1.0,
+            "texts_per_second": totals["texts"] / seconds if seconds else 0.0,
+            "tokens_per_second": totals["tokens"] / seconds if seconds else 0.0,
+        }
+
+
+def padding_efficiency(lengths: Sequence[int] | NDArray[np.int64], batches: Sequence[Sequence[int]]) -> float:
+    """Share of the padded batch tokens that are real tokens (1.0 means no padding)."""
+    lengths = np.asarray(lengths, dtype=np.int64)
+    padded = sum(len(batch) * int(lengths[batch].max()) for batch in batches if len(batch))
+    return float(lengths.sum() / padded) if padded else 1.0
@@ -0,0 +1,135 @@
+"""In-process cache of the cross-encoder's chunk token ids.
+
+Chunk texts do not change once indexed, but every rerank call used to tokenize
+all of its candidates again. Token ids (without special tokens, truncated to
+the model's maximum length) are kept per chunk, keyed like the score cache by
+chunk id and a CRC32 of the text, so the reranker only tokenizes the query.
+The time this saves is estimated from the measured cost per token of the
+chunks that were tokenized.
+"""
+import threading
+import time
+import zlib
+from collections.abc import Callable, Sequence
+
+import numpy as np
+from loguru import logger
+from numpy.typing import NDArray
+
+from llm_engineering.application.utils.ttl_cache import TTLCache
+from llm_engineering.domain.embedded_chunks import EmbeddedChunk
+from llm_engineering.settings import settings
+
+
+class ChunkTokenCache:
+    """LRU cache of token ids keyed by ``(chunk id, chunk text CRC32)``.
+
+    Args:
+        max_entries: Chunks kept
+    """
+
+    def __init__(self, max_entries: int = 50_000) -> None:
+        self._cache: TTLCache[tuple[str, int], NDArray[np.int32]] = TTLCache(max_entries)
+        self._model_id: str | None = None
+        self._model_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.hits = 0
+        self.misses = 0
+        self.tokens_tokenized = 0
+        self.tokens_cached = 0
+        self.tokenize_seconds = 0.0
+
+    def token_ids(
+        self,
+        model_id: str,
+        chunks: Sequence[EmbeddedChunk],
+        tokenize: Callable[[list[str]], Sequence[Sequence[int]]],
+    ) -> list[list[int]]:
+        """Token ids of each chunk, calling ``tokenize`` once on the texts that are not cached."""
+        self._check_model(model_id)
+
+        keys = [(str(chunk.id), zlib.crc32(chunk.content.encode("utf-8"))) for chunk in chunks]
+        ids = [self._cache.get(key) for key in keys]
+
+        missing = {key: chunk for key, chunk, chunk_ids in zip(keys, chunks, ids) if chunk_ids is None}
+        tokens_cached = sum(len(chunk_ids) for chunk_ids in ids if chunk_ids is not None)
+        tokens_tokenized = 0
+        tokenize_seconds = 0.0
+
+        if missing:
+            start = time.perf_counter()
+            computed = tokenize([chunk.content for chunk in missing.values()])
+            tokenize_seconds = time.perf_counter() - start
+            if len(computed) != len(missing):
+                raise ValueError(f"Tokenizer returned {len(computed)} sequences for {len(missing)} chunks")
+
+            by_key = {key: np.asarray(chunk_ids, dtype=np.int32) for key, chunk_ids in zip(missing, computed)}
+            for key, chunk_ids in by_key.items():
+                self._cache.put(key, chunk_ids)
+            ids = [by_key[key] if chunk_ids is None else chunk_ids for key, chunk_ids in zip(keys, ids)]
+            tokens_tokenized = sum(len(chunk_ids) for chunk_ids in by_key.values())
+
+        with self._stats_lock:
+            self.requests += 1
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+            self.tokens_cached += tokens_cached
+            self.tokens_tokenized += tokens_tokenized
+            self.tokenize_seconds += tokenize_seconds
+            saved_ms = tokens_cached * self._seconds_per_token() * 1000
+
+        logger.debug(
+            f"Chunk tokens: {len(keys) - len(missing)} of {len(keys)} chunks cached, ~{saved_ms:.2f} ms tokenization saved"
+        )
+
+        return [chunk_ids.tolist() for chunk_ids in ids]
+
+    def _seconds_per_token(self) -> float:
+        return self.tokenize_seconds / self.tokens_tokenized if self.tokens_tokenized else 0.0
+
+    def _check_model(self, model_id: str) -> None:
+        with self._model_lock:
+            previous, self._model_id = self._model_id, model_id
+
+        if previous is not None and previous != model_id:
+            self._cache.clear()
+            logger.info(f"Reranker model changed ({previous} -> {model_id}), dropped cached chunk tokens")
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        cache_stats = self._cache.stats()
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            saved_ms = self.tokens_cached * self._seconds_per_token() * 1000
+            return {
+                "entries": cache_stats["entries"],
+                "max_entries": cache_stats["max_entries"],
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": cache_stats["evictions"],
+                "tokenize_ms": self.tokenize_seconds * 1000,
+                "tokenize_ms_saved": saved_ms,
+                "tokenize_ms_saved_per_request": saved_ms / self.requests if self.requests else 0.0,
+                "model_id": self._model_id,
+            }
+
+
+_chunk_token_cache: ChunkTokenCache | None = None
+_chunk_token_cache_lock = threading.Lock()
+
+
+def get_chunk_token_cache() -> ChunkTokenCache | None:
+    """Process-wide cache configured from settings, ``None`` when disabled."""
+    global _chunk_token_cache
+
+    if not settings.RERANK_TOKEN_CACHE_ENABLED:
+        return None
+
+    with _chunk_token_cache_lock:
+        if _chunk_token_cache is None:
+            _chunk_token_cache = ChunkTokenCache(max_entries=settings.RERANK_TOKEN_CACHE_MAX_ENTRIES)
+        return _chunk_token_cache
@@ -1,34 +1,150 @@
+from collections.abc import Sequence
+from functools import cached_property
+
+import torch
 from sentence_transformers.cross_encoder import CrossEncoder
+from transformers import BatchEncoding
 from numpy.typing import NDArray
 import numpy as np
 
 from llm_engineering.settings import settings
 from llm_engineering.application.networks.base import SingletonMeta
+from llm_engineering.application.networks.batching import MicroBatcher
+from llm_engineering.application.networks.onnx_backend import BACKENDS, load_onnx_model
 
 
 class CrossEncoderModelSingleton(metaclass=SingletonMeta):
     def __init__(
         self,
         model_id: str = settings.RERANKING_CROSS_ENCODER_MODEL_ID,
-        device: str = settings.RAG_MODEL_DEVICE
+        device: str = settings.RAG_MODEL_DEVICE,
+        backend: str = settings.RERANKER_BACKEND,
     ) -> None:
         """
         A singleton class that provides a pre-trained cross-encoder model for scoring pairs of input text.
         """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown reranker backend: {backend}. Use one of {BACKENDS}")
+
         self._model_id = model_id
         self._device = device
+        self._backend = backend
+
+        if backend == "onnx":
+            self._model = load_onnx_model(
+                self._model_id,
+                export_root=settings.EMBEDDING_ONNX_DIR,
+                quantization=settings.RERANKER_ONNX_QUANTIZATION,
+                intra_op_threads=settings.RERANKER_ONNX_INTRA_OP_THREADS,
+                inter_op_threads=settings.RERANKER_ONNX_INTER_OP_THREADS,
+                model_cls=CrossEncoder,
+            )
+        else:
+            self._model = CrossEncoder(
+                model_name=self._model_id,
+                device=self._device,
+            )
+            self._model.model.eval()
+
+    @property
+    def model_id(self) -> str:
+        return self._model_id
+
+    @property
+    def backend(self) -> str:
+        return self._backend
+
+    @property
+    def variant_id(self) -> str:
+        """Model id plus backend and quantization: scores differ slightly between variants."""
+        if self._backend == "torch":
+            return self._model_id
+        quantization = settings.RERANKER_ONNX_QUANTIZATION
+        return f"{self._model_id}@onnx" + (f"-qint8-{quantization}" if quantization else "")
 
-        self._model = CrossEncoder(
-            model_name=self._model_id,
-            device=self._device,
+    @property
+    def supports_token_ids(self) -> bool:
+        """Whether ``score_token_ids`` can be used; the ONNX backend only scores text pairs through ``predict``."""
+        return self._backend == "torch"
+
+    @property
+    def tokenizer(self):
+        return self._model.tokenizer
+
+    @property
+    def max_length(self) -> int:
+        """Maximum tokens of a (query, chunk) pair, special tokens included."""
+        return getattr(self._model, "max_length", None) or self._model.tokenizer.model_max_length
+
+    @cached_property
+    def rerank_batcher(self) -> MicroBatcher[tuple, float]:
+        """Merges the (query, chunk) pairs of concurrent requests into bounded batches on one inference thread.
+
+        Pairs are either texts or token ids (see ``score_token_ids``); all callers use the same form.
+        """
+        return MicroBatcher(
+            self._score_batch,
+            max_batch_size=settings.RERANK_MAX_BATCH_SIZE,
+            max_wait_ms=settings.RERANK_MAX_WAIT_MS,
+            name="rerank-batcher",
         )
-        self._model.model.eval()
 
     def __call__(self, pairs: list[tuple[str, str]], to_list: bool = True) -> NDArray[np.float32] | list[float]:
-        scores = self._model.predict(pairs)
+        scores = self._model.predict(pairs, batch_size=settings.RERANK_MAX_BATCH_SIZE, show_progress_bar=False)
 
         if to_list:
             scores = scores.tolist()
 
         return scores
 
+    def tokenize(self, texts: list[str]) -> list[list[int]]:
+        """Token ids of ``texts`` without special tokens, truncated to ``max_length``."""
+        encoded = self._model.tokenizer(
+            texts,
+            add_special_tokens=False,
+            truncation=True,
+            max_length=self.max_length,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+        )
+        return encoded["input_ids"]
+
+    def token_features(self, pairs: Sequence[tuple[Sequence[int], Sequence[int]]]) -> BatchEncoding:
+        """Padded model inputs of pre-tokenized (query, chunk) pairs.
+
+        Special tokens, token type ids and truncation are the same as tokenizing the text pairs.
+        """
+        tokenizer = self._model.tokenizer
+        encoded = [
+            tokenizer.prepare_for_model(list(query_ids), list(chunk_ids), truncation="longest_first", max_length=self.max_length)
+            for query_ids, chunk_ids in pairs
+        ]
+        return tokenizer.pad(encoded, return_tensors="pt")
+
+    def score_token_ids(self, pairs: Sequence[tuple[Sequence[int], Sequence[int]]]) -> NDArray[np.float32]:
+        """Scores of pre-tokenized (query, chunk) pairs, the same as ``__call__`` on their texts."""
+        if not self.supports_token_ids:
+            raise ValueError(f"Scoring token ids is not supported by the {self._backend} reranker backend")
+
+        activation = getattr(self._model, "activation_fn", None) or self._model.default_activation_function
+
+        scores = []
+        for start in range(0, len(pairs), settings.RERANK_MAX_BATCH_SIZE):
+            features = self.token_features(pairs[start : start + settings.RERANK_MAX_BATCH_SIZE])
+            with torch.inference_mode():
+                logits = self._model.model(**features.to(self._model.model.device), return_dict=True).logits
+                scores.append(activation(logits).float().cpu().numpy())
+
+        if not scores:
+            return np.empty(0, dtype=np.float32)
+
+        scores = np.concatenate(scores)
+        if scores.ndim == 2 and scores.shape[1] == 1:
+            scores = scores[:, 0]
+
+        return scores
+
+    def _score_batch(self, pairs: list[tuple]) -> NDArray[np.float32]:
+        if pairs and isinstance(pairs[0][0], str):
+            return self(pairs, to_list=False)
+        return self.score_token_ids(pairs)
@@ -3,6 +3,7 @@ from pathlib import Path
 from typing import Optional
 import os
 import logging
+import time
 
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
@@ -22,6 +23,8 @@ logging.getLogger("sentence_transformers").setLevel(logging.ERROR)
 from llm_engineering.settings import settings
 
 from .base import SingletonMeta
+from .batching import BucketingTotals, MicroBatcher, encode_token_budget_batches, token_lengths
+from .onnx_backend import BACKENDS, load_onnx_model
 
 class EmbeddingModelSingleton(metaclass=SingletonMeta):
 
@@ -29,23 +32,52 @@ class EmbeddingModelSingleton(metaclass=SingletonMeta):
         self,
         model_id: str = settings.TEXT_EMBEDDING_MODEL_ID,
         device: str = settings.RAG_MODEL_DEVICE,
-        cache_dir: Optional[str] = None
+        cache_dir: Optional[str] = None,
+        backend: str = settings.EMBEDDING_BACKEND,
     ):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown embedding backend: {backend}. Use one of {BACKENDS}")
+
         self._model_id = model_id
         self._device = device
-
-        self._model = SentenceTransformer(
-            self._model_id,
-            device=self._device,
-            cache_folder=str(cache_dir) if cache_dir else None
-        )
+        self._backend = backend
+
+        if backend == "onnx":
+            self._model = load_onnx_model(
+                self._model_id,
+                export_root=settings.EMBEDDING_ONNX_DIR,
+                quantization=settings.EMBEDDING_ONNX_QUANTIZATION,
+                intra_op_threads=settings.EMBEDDING_ONNX_INTRA_OP_THREADS,
+                inter_op_threads=settings.EMBEDDING_ONNX_INTER_OP_THREADS,
+                cache_dir=str(cache_dir) if cache_dir else None,
+            )
+        else:
+            self._model = SentenceTransformer(
+                self._model_id,
+                device=self._device,
+                cache_folder=str(cache_dir) if cache_dir else None
+            )
+
+        self._bucketing_totals = BucketingTotals()
 
     @property
     def model_id(self) -> str:
         return self._model_id
 
     @property
-    def embedding_size(self) -> str:
+    def backend(self) -> str:
+        return self._backend
+
+    @property
+    def variant_id(self) -> str:
+        """Model id plus backend and quantization, for caches of vectors this instance produced."""
+        if self._backend == "torch":
+            return self._model_id
+        quantization = settings.EMBEDDING_ONNX_QUANTIZATION
+        return f"{self._model_id}@onnx" + (f"-qint8-{quantization}" if quantization else "")
+
+    @cached_property
+    def embedding_size(self) -> int:
         dummy_embedding = self._model.encode("")
         return dummy_embedding.shape[0]
 
@@ -53,10 +85,62 @@ class EmbeddingModelSingleton(metaclass=SingletonMeta):
     def max_input_length(self) -> int:
         return self._model.max_seq_length
 
+    @cached_property
+    def query_batcher(self) -> MicroBatcher[str, NDArray[np.float32]]:
+        """Batches concurrent single-query calls into one forward pass on a dedicated thread."""
+        return MicroBatcher(
+            lambda texts: self(texts, to_list=False),
+            max_batch_size=settings.QUERY_EMBEDDING_MAX_BATCH_SIZE,
+            max_wait_ms=settings.QUERY_EMBEDDING_MAX_WAIT_MS,
+            name="query-embedding-batcher",
+        )
+
     @property
     def tokenizer(self) -> AutoTokenizer:
         return self._model.tokenizer
 
+    def token_lengths(self, texts: list[str]) -> NDArray[np.int64]:
+        """Tokenized length of each text, special tokens included and capped at ``max_input_length``."""
+        return token_lengths(self.tokenizer, texts, self.max_input_length)
+
+    def encode_batch(self, texts: list[str]) -> NDArray[np.float32]:
+        """One forward pass over ``texts``."""
+        return self._model.encode(texts, batch_size=len(texts), show_progress_bar=False)
+
+    def encode_bucketed(
+        self,
+        texts: list[str],
+        max_tokens: int = settings.EMBEDDING_MAX_BATCH_TOKENS,
+        max_batch_size: int = settings.EMBEDDING_MAX_BATCH_SIZE,
+    ) -> NDArray[np.float32]:
+        """Embed ``texts`` in batches of similar token length, returned in input order.
+
+        Each forward pass pads its batch to the longest text in it, so batches
+        are formed from length-sorted texts under a budget of ``max_tokens``
+        padded tokens rather than a fixed count.
+        """
+        if not texts:
+            return np.zeros((0, self.embedding_size), dtype=np.float32)
+
+        lengths = self.token_lengths(texts)
+
+        start = time.perf_counter()
+        embeddings, batches = encode_token_budget_batches(
+            texts,
+            lengths,
+            self.embedding_size,
+            lambda text_batches: map(self.encode_batch, text_batches),
+            max_tokens,
+            max_batch_size,
+        )
+        self._bucketing_totals.record(lengths, batches, time.perf_counter() - start)
+
+        return embeddings
+
+    def bucketing_stats(self) -> dict:
+        """Padding efficiency and throughput of ``encode_bucketed`` since the model was loaded."""
+        return self._bucketing_totals.stats()
+
     def __call__(
         self, input_text: str | list[str], to_list: bool=True
     ) -> NDArray[np.float32] | list[float] | list[list[float]]:
@@ -0,0 +1,202 @@
+"""Persistent, content-addressed cache of dense embeddings.
+
+Vectors are keyed by ``(model_id, sha256(text))`` in a single SQLite file, so
+re-running feature engineering over an unchanged corpus only encodes new or
+edited chunks. The file is bounded in size: once the stored vectors exceed
+``max_bytes`` the least recently used ones are deleted.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Sequence
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+from numpy.typing import NDArray
+
+from llm_engineering.settings import settings
+
+DTYPES = {"float32": np.float32, "float16": np.float16}
+
+# SQLite limits the number of bound parameters per statement
+_QUERY_CHUNK = 500
+# Evict down to this fraction of max_bytes, so eviction does not run on every insert
+_EVICT_TO = 0.9
+
+
+class EmbeddingCache:
+    """SQLite-backed embedding cache, safe to share between threads.
+
+    Args:
+        path: SQLite database file, created if missing
+        dtype: Storage type of the vectors, ``"float32"`` (exact) or ``"float16"`` (half the size)
+        max_bytes: Evict least recently used vectors while the stored vectors exceed this many bytes
+    """
+
+    def __init__(self, path: str, dtype: str = "float32", max_bytes: int | None = None) -> None:
+        if dtype not in DTYPES:
+            raise ValueError(f"Unknown dtype: {dtype}. Use one of {sorted(DTYPES)}")
+
+        self.path = path
+        self.dtype = dtype
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model_id TEXT NOT NULL, content_hash BLOB NOT NULL, dtype TEXT NOT NULL, vector BLOB NOT NULL, "
+            "last_access REAL NOT NULL, PRIMARY KEY (model_id, content_hash)) WITHOUT ROWID"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access)")
+
+        self._nbytes = self._connection.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def content_hash(text: str) -> bytes:
+        return hashlib.sha256(text.encode("utf-8")).digest()
+
+    def get_many(self, model_id: str, texts: Sequence[str]) -> list[NDArray[np.float32] | None]:
+        """Cached vectors of ``texts`` (``None`` where missing), as float32."""
+        hashes = [self.content_hash(text) for text in texts]
+        found: dict[bytes, NDArray[np.float32]] = {}
+
+        with self._lock:
+            for start in range(0, len(hashes), _QUERY_CHUNK):
+                chunk = list(dict.fromkeys(hashes[start : start + _QUERY_CHUNK]))
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._connection.execute(
+                    f"SELECT content_hash, dtype, vector FROM embeddings "
+                    f"WHERE model_id = ? AND content_hash IN ({placeholders})",
+                    [model_id, *chunk],
+                ).fetchall()
+                for content_hash, dtype, vector in rows:
+                    found[content_hash] = np.frombuffer(vector, dtype=DTYPES[dtype]).astype(np.float32)
+
+            if found:
+                now = time.time()
+                self._connection.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE model_id = ? AND content_hash = ?",
+                    [(now, model_id, content_hash) for content_hash in found],
+                )
+
+        vectors = [found.get(content_hash) for content_hash in hashes]
+        hits = sum(vector is not None for vector in vectors)
+        self.hits += hits
+        self.misses += len(vectors) - hits
+
+        return vectors
+
+    def put_many(self, model_id: str, texts: Sequence[str], vectors: NDArray[np.floating]) -> None:
+        now = time.time()
+        rows = [
+            (model_id, self.content_hash(text), self.dtype, np.asarray(vector, dtype=DTYPES[self.dtype]).tobytes(), now)
+            for text, vector in zip(texts, vectors, strict=True)
+        ]
+
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                for model, content_hash, dtype, vector, last_access in rows:
+                    previous = self._connection.execute(
+                        "SELECT LENGTH(vector) FROM embeddings WHERE model_id = ? AND content_hash = ?",
+                        (model, content_hash),
+                    ).fetchone()
+                    self._connection.execute(
+                        "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)",
+                        (model, content_hash, dtype, vector, last_access),
+                    )
+                    self._nbytes += len(vector) - (previous[0] if previous else 0)
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+
+            if self.max_bytes is not None and self._nbytes > self.max_bytes:
+                self._evict()
+
+    def get_or_compute(
+        self,
+        model_id: str,
+        texts: Sequence[str],
+        compute: Callable[[list[str]], NDArray[np.floating]],
+    ) -> NDArray[np.float32]:
+        """Vectors of ``texts``, calling ``compute`` once for the distinct texts that are not cached."""
+        vectors = self.get_many(model_id, texts)
+
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing:
+            computed = np.asarray(compute(missing), dtype=np.float32)
+            if len(computed) != len(missing):
+                raise ValueError(f"Embedding model returned {len(computed)} vectors for {len(missing)} texts")
+
+            self.put_many(model_id, missing, computed)
+            by_text = dict(zip(missing, computed))
+            vectors = [by_text[text] if vector is None else vector for text, vector in zip(texts, vectors)]
+
+        return np.stack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": self._nbytes}
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _evict(self) -> None:
+        target = int(self.max_bytes * _EVICT_TO)
+        freed = evicted = 0
+
+        self._connection.execute("BEGIN")
+        rows = self._connection.execute(
+            "SELECT model_id, content_hash, LENGTH(vector) FROM embeddings ORDER BY last_access"
+        )
+        to_delete = []
+        for model_id, content_hash, size in rows:
+            if self._nbytes - freed <= target:
+                break
+            to_delete.append((model_id, content_hash))
+            freed += size
+            evicted += 1
+        rows.close()
+
+        self._connection.executemany("DELETE FROM embeddings WHERE model_id = ? AND content_hash = ?", to_delete)
+        self._connection.execute("COMMIT")
+        self._nbytes -= freed
+
+        logger.info(f"Evicted {evicted} cached embeddings ({freed / 1024 / 1024:.1f} MB) from {self.path}")
+
+
+_embedding_cache: EmbeddingCache | None = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache | None:
+    """Process-wide cache configured from settings, ``None`` when disabled."""
+    global _embedding_cache
+
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return None
+
+    with _embedding_cache_lock:
+        if _embedding_cache is None:
+            max_mb = settings.EMBEDDING_CACHE_MAX_MB
+            _embedding_cache = EmbeddingCache(
+                settings.EMBEDDING_CACHE_PATH,
+                dtype=settings.EMBEDDING_CACHE_DTYPE,
+                max_bytes=max_mb * 1024 * 1024 if max_mb else None,
+            )
+        return _embedding_cache
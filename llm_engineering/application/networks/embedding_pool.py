@@ -0,0 +1,179 @@
+"""Multi-process pool for dense embedding of large corpora.
+
+Each worker process loads its own copy of the embedding model with a fixed
+number of intra-op threads, so ``num_workers x threads`` matches the cores of
+the ingestion box instead of one process's thread pool fighting over them.
+Batches are streamed to the workers with a bounded number in flight and the
+vectors come back in submission order. The parent process only loads the
+tokenizer, to batch texts by token length; the workers report the model's
+embedding size and input length.
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import cached_property
+
+import numpy as np
+from loguru import logger
+from numpy.typing import NDArray
+
+from llm_engineering.settings import settings
+
+from .batching import BucketingTotals, encode_token_budget_batches, token_lengths
+
+_worker_model = None
+
+
+def _init_worker(model_id: str, device: str, backend: str, num_threads: int) -> None:
+    global _worker_model
+
+    # Spawned workers import this package, and torch with it, before the initializer runs, so
+    # OMP_NUM_THREADS would come too late: size the intra-op (OpenMP and MKL) pool through torch
+    import torch
+
+    torch.set_num_threads(num_threads)
+    settings.EMBEDDING_ONNX_INTRA_OP_THREADS = num_threads
+    settings.EMBEDDING_ONNX_INTER_OP_THREADS = 1
+
+    from .embedding import EmbeddingModelSingleton
+
+    _worker_model = EmbeddingModelSingleton(model_id=model_id, device=device, backend=backend)
+
+
+def _encode_batch(texts: list[str]) -> NDArray[np.float32]:
+    return _worker_model.encode_batch(texts)
+
+
+def _model_info() -> dict:
+    return {
+        "model_id": _worker_model.model_id,
+        "variant_id": _worker_model.variant_id,
+        "embedding_size": _worker_model.embedding_size,
+        "max_input_length": _worker_model.max_input_length,
+    }
+
+
+class EmbeddingProcessPool:
+    """Worker processes that each hold the embedding model and encode one batch per task.
+
+    Args:
+        num_workers: Worker processes
+        threads_per_worker: Torch/ONNX Runtime threads per worker, None splits the CPU count evenly
+        model_id: Embedding model loaded by every worker
+        device: Device of the workers' models
+        backend: ``"torch"`` or ``"onnx"``
+    """
+
+    def __init__(
+        self,
+        num_workers: int,
+        threads_per_worker: int | None = None,
+        model_id: str = settings.TEXT_EMBEDDING_MODEL_ID,
+        device: str = settings.RAG_MODEL_DEVICE,
+        backend: str = settings.EMBEDDING_BACKEND,
+    ) -> None:
+        if num_workers < 1:
+            raise ValueError(f"num_workers must be at least 1, got {num_workers}")
+
+        self.num_workers = num_workers
+        self.model_id = model_id
+        self._bucketing_totals = BucketingTotals()
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // num_workers)
+
+        logger.info(
+            f"Starting {num_workers} embedding workers for {model_id} "
+            f"({backend}, {self.threads_per_worker} threads each)"
+        )
+        # Spawn, not fork: the parent may already run torch and inference threads
+        self._executor = ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_id, device, backend, self.threads_per_worker),
+        )
+
+    @cached_property
+    def model_info(self) -> dict:
+        """``model_id``, ``variant_id``, ``embedding_size`` and ``max_input_length`` of the workers' model."""
+        return self._executor.submit(_model_info).result()
+
+    @cached_property
+    def tokenizer(self):
+        from transformers import AutoTokenizer
+
+        return AutoTokenizer.from_pretrained(self.model_id)
+
+    def encode_bucketed(
+        self,
+        texts: list[str],
+        max_tokens: int = settings.EMBEDDING_MAX_BATCH_TOKENS,
+        max_batch_size: int = settings.EMBEDDING_MAX_BATCH_SIZE,
+    ) -> NDArray[np.float32]:
+        """``EmbeddingModelSingleton.encode_bucketed`` with the batches run in the workers."""
+        embedding_size = self.model_info["embedding_size"]
+        if not texts:
+            return np.zeros((0, embedding_size), dtype=np.float32)
+
+        lengths = token_lengths(self.tokenizer, texts, self.model_info["max_input_length"])
+
+        start = time.perf_counter()
+        embeddings, batches = encode_token_budget_batches(
+            texts, lengths, embedding_size, self.map, max_tokens, max_batch_size
+        )
+        self._bucketing_totals.record(lengths, batches, time.perf_counter() - start)
+
+        return embeddings
+
+    def bucketing_stats(self) -> dict:
+        """Padding efficiency and throughput of ``encode_bucketed`` across the workers since the pool started."""
+        return self._bucketing_totals.stats()
+
+    def map(self, batches: Iterable[list[str]], max_in_flight: int | None = None) -> Iterator[NDArray[np.float32]]:
+        """Embeddings of each batch, in order, with at most ``max_in_flight`` batches queued (2 per worker by default)."""
+        max_in_flight = max_in_flight or 2 * self.num_workers
+        in_flight: deque[Future] = deque()
+
+        for batch in batches:
+            in_flight.append(self._executor.submit(_encode_batch, batch))
+            if len(in_flight) >= max_in_flight:
+                yield in_flight.popleft().result()
+
+        while in_flight:
+            yield in_flight.popleft().result()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+_embedding_pool: EmbeddingProcessPool | None = None
+_embedding_pool_lock = threading.Lock()
+
+
+def get_embedding_pool() -> EmbeddingProcessPool | None:
+    """Process-wide pool configured from settings, ``None`` when embedding runs in-process."""
+    global _embedding_pool
+
+    if settings.EMBEDDING_NUM_WORKERS <= 1:
+        return None
+
+    with _embedding_pool_lock:
+        if _embedding_pool is None:
+            _embedding_pool = EmbeddingProcessPool(
+                settings.EMBEDDING_NUM_WORKERS, threads_per_worker=settings.EMBEDDING_WORKER_THREADS
+            )
+            atexit.register(shutdown_embedding_pool)
+        return _embedding_pool
+
+
+def shutdown_embedding_pool() -> None:
+    global _embedding_pool
+
+    with _embedding_pool_lock:
+        if _embedding_pool is not None:
+            _embedding_pool.close()
+            _embedding_pool = None
@@ -0,0 +1,107 @@
+"""ONNX Runtime backend for the sentence-transformers embedding and reranking models.
+
+The first load exports the PyTorch checkpoint to ONNX (and, when asked, a
+dynamically int8-quantized copy) into a local directory. Later loads read the
+exported files directly and never touch PyTorch weights or the network. Needs
+the ``onnx`` extra (``sentence-transformers[onnx]``, which brings optimum and
+onnxruntime); cross-encoders need sentence-transformers 4.1 or later.
+"""
+from pathlib import Path
+
+from loguru import logger
+from sentence_transformers.cross_encoder import CrossEncoder
+from sentence_transformers.SentenceTransformer import SentenceTransformer
+
+# Quantization configs of sentence_transformers.export_dynamic_quantized_onnx_model, by target CPU
+QUANTIZATION_CONFIGS = ("arm64", "avx2", "avx512", "avx512_vnni")
+BACKENDS = ("torch", "onnx")
+
+
+def onnx_file_name(quantization: str | None) -> str:
+    return f"onnx/model_qint8_{quantization}.onnx" if quantization else "onnx/model.onnx"
+
+
+def export_dir_for(model_id: str, root: str) -> Path:
+    return Path(root) / model_id.replace("/", "__")
+
+
+def export_onnx_model(
+    model_id: str,
+    export_dir: Path,
+    quantization: str | None = None,
+    cache_dir: str | None = None,
+    model_cls: type[SentenceTransformer] | type[CrossEncoder] = SentenceTransformer,
+) -> Path:
+    """Export ``model_id`` to ``export_dir`` (and quantize it) unless already done; returns the model file."""
+    if quantization is not None and quantization not in QUANTIZATION_CONFIGS:
+        raise ValueError(f"Unknown quantization: {quantization}. Use one of {QUANTIZATION_CONFIGS}")
+
+    if not (export_dir / onnx_file_name(None)).is_file():
+        logger.info(f"Exporting {model_id} to ONNX in {export_dir}")
+        # sentence-transformers exports on the fly when the checkpoint has no ONNX file
+        model = model_cls(model_id, backend="onnx", device="cpu", cache_folder=cache_dir)
+        model.save_pretrained(str(export_dir))
+
+    model_file = export_dir / onnx_file_name(quantization)
+    if quantization and not model_file.is_file():
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+
+        logger.info(f"Quantizing {model_id} to int8 ({quantization})")
+        model = model_cls(str(export_dir), backend="onnx", device="cpu")
+        export_dynamic_quantized_onnx_model(model, quantization, str(export_dir))
+
+    return model_file
+
+
+def load_onnx_model(
+    model_id: str,
+    export_root: str,
+    quantization: str | None = None,
+    intra_op_threads: int | None = None,
+    inter_op_threads: int | None = None,
+    cache_dir: str | None = None,
+    model_cls: type[SentenceTransformer] | type[CrossEncoder] = SentenceTransformer,
+) -> SentenceTransformer | CrossEncoder:
+    """``SentenceTransformer`` (or ``CrossEncoder``) running on ONNX Runtime's CPU provider.
+
+    Args:
+        model_id: Hugging Face id of the PyTorch model
+        export_root: Directory holding one exported sub-directory per model
+        quantization: Dynamic int8 quantization config (see ``QUANTIZATION_CONFIGS``), None for float32
+        intra_op_threads: Threads used inside an operator, None lets ONNX Runtime pick the core count
+        inter_op_threads: Threads running independent operators in parallel
+        cache_dir: Hugging Face cache of the PyTorch checkpoint
+        model_cls: ``SentenceTransformer`` or ``CrossEncoder``
+    """
+    try:
+        import onnxruntime as ort
+    except ImportError as e:
+        raise ImportError("The ONNX embedding backend needs `sentence-transformers[onnx]` (uv sync --extra onnx)") from e
+
+    export_dir = export_dir_for(model_id, export_root)
+    model_file = export_onnx_model(
+        model_id, export_dir, quantization=quantization, cache_dir=cache_dir, model_cls=model_cls
+    )
+
+    session_options = ort.SessionOptions()
+    session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if intra_op_threads:
+        session_options.intra_op_num_threads = intra_op_threads
+    if inter_op_threads:
+        session_options.inter_op_num_threads = inter_op_threads
+
+    logger.info(
+        f"Loading {model_file.relative_to(export_dir)} of {model_id} with ONNX Runtime "
+        f"(intra-op threads: {intra_op_threads or 'auto'}, inter-op threads: {inter_op_threads or 'auto'})"
+    )
+
+    return model_cls(
+        str(export_dir),
+        backend="onnx",
+        device="cpu",
+        model_kwargs={
+            "file_name": onnx_file_name(quantization),
+            "provider": "CPUExecutionProvider",
+            "session_options": session_options,
+        },
+    )
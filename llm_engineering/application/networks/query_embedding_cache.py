@@ -0,0 +1,128 @@
+"""In-process cache of dense and sparse query encodings.
+
+Repeated and trivially different questions (Unicode composition, extra
+whitespace) map to the same key, so FAQ-style traffic skips the models. Keys
+include the version of the model that produced the value, and entries of a
+kind are dropped as soon as a different model version is seen, e.g. after a
+sparse model hot reload.
+"""
+import re
+import threading
+import unicodedata
+from collections import Counter
+from collections.abc import Callable, Sequence
+from typing import Any
+
+from loguru import logger
+
+from llm_engineering.application.utils.ttl_cache import TTLCache
+from llm_engineering.settings import settings
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """NFC-normalised text with runs of whitespace collapsed to one space."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+class QueryEmbeddingCache:
+    """LRU/TTL cache of query encodings keyed by ``(kind, model version, normalised text)``.
+
+    Args:
+        max_entries: Encodings kept, dense and sparse together
+        ttl_seconds: Maximum age of an entry, None keeps it until evicted
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float | None = None) -> None:
+        self._cache: TTLCache[tuple[str, str, str], Any] = TTLCache(max_entries, ttl_seconds=ttl_seconds)
+        self._versions: dict[str, str] = {}
+        self._versions_lock = threading.Lock()
+        self._hits: Counter[str] = Counter()
+        self._misses: Counter[str] = Counter()
+
+    def get_or_compute(
+        self,
+        kind: str,
+        model_version: str,
+        texts: Sequence[str],
+        compute: Callable[[list[str]], Sequence[Any]],
+    ) -> list[Any]:
+        """Encodings of ``texts``, calling ``compute`` once on the normalised texts that are not cached."""
+        self._check_version(kind, model_version)
+
+        normalized = [normalize_query(text) for text in texts]
+        values = [self._cache.get((kind, model_version, text)) for text in normalized]
+
+        missing = list(dict.fromkeys(text for text, value in zip(normalized, values) if value is None))
+        # Counted per model input: a duplicate within the batch is a hit
+        self._hits[kind] += len(values) - len(missing)
+        self._misses[kind] += len(missing)
+
+        if missing:
+            computed = compute(missing)
+            if len(computed) != len(missing):
+                raise ValueError(f"Got {len(computed)} {kind} encodings for {len(missing)} queries")
+
+            by_text = dict(zip(missing, computed))
+            for text, value in by_text.items():
+                self._cache.put((kind, model_version, text), value)
+            values = [by_text[text] if value is None else value for text, value in zip(normalized, values)]
+
+        return values
+
+    def _check_version(self, kind: str, model_version: str) -> None:
+        with self._versions_lock:
+            previous = self._versions.get(kind)
+            if previous == model_version:
+                return
+            self._versions[kind] = model_version
+
+        if previous is not None:
+            dropped = self._cache.invalidate(lambda key: key[0] == kind and key[1] != model_version)
+            logger.info(f"Query {kind} model changed ({previous} -> {model_version}), dropped {dropped} cached encodings")
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        by_kind = {}
+        for kind in sorted(self._hits.keys() | self._misses.keys()):
+            lookups = self._hits[kind] + self._misses[kind]
+            by_kind[kind] = {
+                "hits": self._hits[kind],
+                "misses": self._misses[kind],
+                "hit_rate": self._hits[kind] / lookups if lookups else 0.0,
+                "model_version": self._versions.get(kind),
+            }
+        cache_stats = self._cache.stats()
+        hits, misses = sum(self._hits.values()), sum(self._misses.values())
+        return {
+            "entries": cache_stats["entries"],
+            "max_entries": cache_stats["max_entries"],
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "evictions": cache_stats["evictions"],
+            "expirations": cache_stats["expirations"],
+            "invalidations": cache_stats["invalidations"],
+            "by_kind": by_kind,
+        }
+
+
+_query_embedding_cache: QueryEmbeddingCache | None = None
+_query_embedding_cache_lock = threading.Lock()
+
+
+def get_query_embedding_cache() -> QueryEmbeddingCache | None:
+    """Process-wide cache configured from settings, ``None`` when disabled."""
+    global _query_embedding_cache
+
+    if not settings.QUERY_EMBEDDING_CACHE_ENABLED:
+        return None
+
+    with _query_embedding_cache_lock:
+        if _query_embedding_cache is None:
+            _query_embedding_cache = QueryEmbeddingCache(
+                max_entries=settings.QUERY_EMBEDDING_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.QUERY_EMBEDDING_CACHE_TTL_SECONDS,
+            )
+        return _query_embedding_cache
@@ -1,21 +1,17 @@
-from .sparse_encoder import BM25SparseEncoder, TFIDFSparseEncoder
+from .sparse_encoder import BM25SparseEncoder, StatelessBM25SparseEncoder, TFIDFSparseEncoder
+from .sparse_encoder.registry import create_sparse_encoder, sparse_encoder_registry
 
 
-def get_sparse_encoder(algorithm: str = "bm25", **kwargs):
-    algorithm = algorithm.lower()
+def get_sparse_encoder(algorithm: str = "bm25", model_path: str | None = None, **kwargs):
+    """Cached encoder for ``algorithm``; parameters left as None keep the values stored with the model."""
+    return sparse_encoder_registry.get(algorithm, model_path=model_path, **kwargs)
 
-    if algorithm == "bm25":
-        return BM25SparseEncoder(
-            max_terms=kwargs.get("max_terms", 128),
-            k1=kwargs.get("k1", 1.5),
-            b=kwargs.get("b", 0.75),
-        )
-    elif algorithm == "tfidf":
-        return TFIDFSparseEncoder(
-            max_terms=kwargs.get("max_terms", 128)
-        )
-    else:
-        raise ValueError(f"Unknown algorithm: {algorithm}. Use 'bm25' or 'tfidf'")
 
-
-__all__ = ["get_sparse_encoder", "BM25SparseEncoder", "TFIDFSparseEncoder"]
+__all__ = [
+    "get_sparse_encoder",
+    "create_sparse_encoder",
+    "sparse_encoder_registry",
+    "BM25SparseEncoder",
+    "TFIDFSparseEncoder",
+    "StatelessBM25SparseEncoder",
+]
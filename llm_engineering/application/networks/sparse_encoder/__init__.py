@@ -1,5 +1,7 @@
 from .base import BaseSparseEncoder
 from .tfidf import TFIDFSparseEncoder
 from .mb25 import BM25SparseEncoder
+from .stateless import StatelessBM25SparseEncoder
+from .inverted_index import InvertedIndex
 
-__all__ = ["BaseSparseEncoder", "TFIDFSparseEncoder", "BM25SparseEncoder"]
+__all__ = ["BaseSparseEncoder", "TFIDFSparseEncoder", "BM25SparseEncoder", "StatelessBM25SparseEncoder", "InvertedIndex"]
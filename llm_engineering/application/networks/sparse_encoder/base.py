@@ -1,8 +1,30 @@
 from abc import ABC, abstractmethod
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+from numpy.typing import NDArray
+
+from .batch import QUANTIZATIONS, SparseBatch, TermCounts, count_terms, prune_by_mass, quantize, top_k_per_row
+from .fitting import CorpusStats, HashedTokenizer, SketchedCorpusStats, count_corpus, prune_vocabulary
+from .storage import HashingVocab, SparseModelState, TermTable, read_model
+from .tokenizer import Tokenizer, default_tokenizer
+
+# Vocabulary options persisted in the model params, so partial_fit() keeps applying them
+VOCAB_PARAMS = ("min_df", "max_df", "max_vocab", "n_features")
+
+# Pruning of encoded document vectors, part of every encoder's hyper-parameters (disabled by default):
+# keep the fewest top terms holding ``weight_mass`` of a vector's weight, at least ``min_terms`` of them
+# (``max_terms`` is the upper bound), then optionally round weights to ``quantization``
+PRUNING_DEFAULTS = {"weight_mass": None, "min_terms": 1, "quantization": None}
+
 
 class BaseSparseEncoder(ABC):
-    @abstractmethod
-    def fit(self, corpus: list[str]) -> None: ...
+    name: str
+    tokenizer: Tokenizer = default_tokenizer
+    # Stateless encoders have no model to fit, save or load
+    stateless: bool = False
 
     @abstractmethod
     def encode(self, text: str) -> dict: ...
@@ -10,6 +32,254 @@ class BaseSparseEncoder(ABC):
     @abstractmethod
     def load(self, model_path: str) -> bool: ...
 
-    @classmethod
     @abstractmethod
-    def save(self, model_path: str) -> bool: ...
\ No newline at end of file
+    def save(self, model_path: str) -> bool: ...
+
+    @abstractmethod
+    def _score(self, counts: TermCounts) -> NDArray[np.float32]:
+        """Weight every (row, term) entry of a batch term-count matrix."""
+
+    @abstractmethod
+    def _apply_state(self, state: SparseModelState) -> None: ...
+
+    @property
+    def params(self) -> dict:
+        """Scoring hyper-parameters, as passed to the constructor."""
+        return {key: getattr(self, key) for key in self.default_params}
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the model arrays (mapped size for memory-mapped models)."""
+        df_nbytes = self.df.nbytes if self.df is not None else 0
+        return int(self.vocab.nbytes + self.idf.nbytes + df_nbytes)
+
+    @property
+    def dim(self) -> int:
+        """Size of the term id space."""
+        return len(self.idf)
+
+    def _load_if_exists(self) -> None:
+        """Load ``model_path`` (or its legacy ``.pkl`` sibling) if present, otherwise stay unfitted."""
+        model_path = next(
+            (path for path in (self.model_path, f"{self.model_path}.pkl") if Path(path).exists()),
+            None,
+        )
+        if model_path is None:
+            logger.warning(f"Model file not found: {self.model_path}")
+            return
+
+        try:
+            self._apply_state(read_model(model_path, algorithm=self.name))
+            logger.info(f"{self.__class__.__name__} loaded from {model_path}")
+        except Exception as e:
+            logger.error(f"Failed to load {self.name.upper()} model: {e}")
+            self._is_fitted = False
+
+    def _override_params(self, **params) -> None:
+        for key, value in params.items():
+            if value is not None:
+                setattr(self, key, value)
+
+    def encode_batch(self, texts: Sequence[str], prune: bool = True) -> SparseBatch:
+        """Encode a batch into CSR index/value arrays, top ``max_terms`` entries per text.
+
+        ``prune=False`` skips the mass pruning and quantization meant for stored vectors.
+        """
+        if not self._is_fitted:
+            raise ValueError("Encoder must be fitted before encoding. Call fit() or load() first.")
+
+        counts = count_terms(texts, self.tokenizer, self.vocab)
+        scores = self._score(counts)
+        indptr, term_ids = counts.indptr, counts.term_ids
+
+        # Hashed ids of terms never seen during fit carry a zero weight
+        non_zero = scores != 0
+        if not non_zero.all():
+            term_ids, scores = term_ids[non_zero], scores[non_zero]
+            indptr = np.searchsorted(counts.rows[non_zero], np.arange(len(texts) + 1)).astype(np.int64)
+
+        batch = top_k_per_row(indptr, term_ids, scores, self.max_terms)
+
+        return self._prune(batch) if prune else batch
+
+    def encode_queries(self, texts: Sequence[str]) -> list[dict]:
+        """Encode search queries; the same weighting as documents unless an encoder overrides it."""
+        return self.encode_batch(list(texts), prune=False).to_dicts()
+
+    @property
+    def pruning_params(self) -> dict:
+        return {key: getattr(self, key) for key in PRUNING_DEFAULTS}
+
+    def _apply_pruning_params(self, params: dict) -> None:
+        for key in PRUNING_DEFAULTS:
+            if key in params:
+                setattr(self, key, params[key])
+
+    def _prune(self, batch: SparseBatch) -> SparseBatch:
+        if self.weight_mass is not None and self.weight_mass < 1.0:
+            batch = prune_by_mass(batch, self.weight_mass, min_terms=self.min_terms)
+        if self.quantization is not None:
+            batch = quantize(batch, self.quantization)
+        return batch
+
+    def _validate_pruning_params(self) -> None:
+        if self.weight_mass is not None and not 0.0 < self.weight_mass <= 1.0:
+            raise ValueError(f"weight_mass must be in (0, 1], got {self.weight_mass}")
+        if self.quantization is not None and self.quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization: {self.quantization}. Use one of {QUANTIZATIONS}")
+
+    def fit(
+        self,
+        corpus: Iterable[str],
+        n_jobs: int = 1,
+        shard_size: int = 1000,
+        min_df: int = 1,
+        max_df: float | int = 1.0,
+        max_vocab: int | None = None,
+        n_features: int | None = None,
+    ) -> None:
+        """Fit from scratch. Term ids follow the sorted vocabulary, so previously stored vectors become invalid.
+
+        Args:
+            corpus: Iterable of chunk texts, consumed once
+            n_jobs: Tokenization/df-counting worker processes
+            shard_size: Texts per worker task
+            min_df: Drop terms found in fewer documents
+            max_df: Drop terms found in more documents (fraction of the corpus if float, count if int)
+            max_vocab: Keep at most this many terms, the most frequent first
+            n_features: Feature-hashing mode: no vocabulary, term id = ``crc32(term) % n_features``.
+                The pruning options do not apply.
+        """
+        self.vocab_params = {"min_df": min_df, "max_df": max_df, "max_vocab": max_vocab, "n_features": n_features}
+        desc = f"Building {self.name.upper()} vocabulary"
+
+        if n_features:
+            stats = self._count(corpus, n_jobs, shard_size, desc=desc)
+            self.vocab = HashingVocab(n_features)
+            self.df = np.zeros(n_features, dtype=np.int64)
+            self.df[list(stats.df)] = list(stats.df.values())
+        else:
+            accumulator = None
+            if min_df > 1 or max_vocab is not None:
+                accumulator = SketchedCorpusStats(
+                    min_df=min_df,
+                    max_tracked=4 * max_vocab if max_vocab is not None else None,
+                )
+            stats = self._count(corpus, n_jobs, shard_size, desc=desc, stats=accumulator)
+            df = prune_vocabulary(stats.df, stats.num_docs, min_df=min_df, max_df=max_df, max_vocab=max_vocab)
+
+            sorted_terms = sorted(df)
+            self.vocab = TermTable.from_vocab({term: idx for idx, term in enumerate(sorted_terms)})
+            self.df = np.array([df[term] for term in sorted_terms], dtype=np.int64)
+
+        self.num_docs = stats.num_docs
+        self.total_doc_len = stats.total_doc_len
+
+        self._refresh_weights()
+
+    def partial_fit(self, corpus: Iterable[str], n_jobs: int = 1, shard_size: int = 1000) -> int:
+        """Add documents to the corpus statistics.
+
+        Existing term ids never change and unseen terms get the next free ids, so
+        sparse vectors already stored in Qdrant keep pointing at the same terms.
+        New terms must reach ``min_df`` within the added documents and are only
+        appended while the vocabulary is below ``max_vocab``; ``max_df`` only
+        applies to full fits.
+
+        Returns:
+            Number of new terms appended to the vocabulary
+        """
+        if not self._is_fitted:
+            self.fit(corpus, n_jobs=n_jobs, shard_size=shard_size, **self.vocab_params)
+            return len(self.vocab)
+
+        self._require_corpus_stats()
+        stats = self._count(corpus, n_jobs, shard_size, desc=f"Updating {self.name.upper()} statistics")
+
+        terms = list(stats.df)
+        counts = np.fromiter(stats.df.values(), dtype=np.int64, count=len(terms))
+        term_ids = self._lookup_counted(terms)
+
+        new_terms = []
+        if isinstance(self.vocab, TermTable):
+            min_df = self.vocab_params.get("min_df") or 1
+            max_vocab = self.vocab_params.get("max_vocab")
+
+            new_positions = np.flatnonzero((term_ids < 0) & (counts >= min_df))
+            if max_vocab is not None and len(new_positions) > max(max_vocab - len(self.vocab), 0):
+                room = max(max_vocab - len(self.vocab), 0)
+                ranked = sorted(new_positions.tolist(), key=lambda i: (-counts[i], terms[i]))
+                new_positions = np.array(sorted(ranked[:room]), dtype=np.int64)
+
+            new_terms = [terms[i] for i in new_positions]
+            if new_terms:
+                new_ids = np.arange(len(self.df), len(self.df) + len(new_terms), dtype=np.int64)
+                self.vocab = self.vocab.extend(new_terms, new_ids)
+                term_ids[new_positions] = new_ids
+
+        known = term_ids >= 0
+        self.df = np.concatenate([self.df, np.zeros(len(new_terms), dtype=np.int64)])
+        np.add.at(self.df, term_ids[known], counts[known])
+        self.num_docs += stats.num_docs
+        self.total_doc_len += stats.total_doc_len
+
+        self._refresh_weights()
+        logger.info(f"Added {stats.num_docs} documents, {len(new_terms)} new terms (vocabulary: {len(self.vocab)})")
+
+        return len(new_terms)
+
+    def remove(self, corpus: Iterable[str], n_jobs: int = 1, shard_size: int = 1000) -> None:
+        """Subtract previously added documents from the corpus statistics.
+
+        Terms whose document frequency drops to zero keep their id, ids are never reused.
+        """
+        if not self._is_fitted:
+            raise ValueError("Encoder must be fitted before removing documents.")
+
+        self._require_corpus_stats()
+        stats = self._count(corpus, n_jobs, shard_size, desc=f"Removing from {self.name.upper()} statistics")
+
+        term_ids = self._lookup_counted(list(stats.df))
+        counts = np.fromiter(stats.df.values(), dtype=np.int64, count=len(term_ids))
+        known = term_ids >= 0
+        if not known.all():
+            logger.warning(f"{int((~known).sum())} removed terms were never part of the vocabulary")
+
+        self.df = np.array(self.df, dtype=np.int64)
+        np.subtract.at(self.df, term_ids[known], counts[known])
+        np.maximum(self.df, 0, out=self.df)
+        self.num_docs = max(self.num_docs - stats.num_docs, 0)
+        self.total_doc_len = max(self.total_doc_len - stats.total_doc_len, 0)
+
+        self._refresh_weights()
+        logger.info(f"Removed {stats.num_docs} documents ({self.num_docs} remaining)")
+
+    def _count(
+        self, corpus: Iterable[str], n_jobs: int, shard_size: int, desc: str, stats: CorpusStats | None = None
+    ) -> CorpusStats:
+        n_features = self.vocab_params.get("n_features")
+        tokenize = HashedTokenizer(self.tokenizer, n_features) if n_features else self.tokenizer
+        return count_corpus(corpus, tokenize, n_jobs=n_jobs, shard_size=shard_size, desc=desc, stats=stats)
+
+    def _lookup_counted(self, terms: list) -> NDArray[np.int64]:
+        """Term ids of ``CorpusStats.df`` keys, which are already ids in feature-hashing mode."""
+        if isinstance(self.vocab, HashingVocab):
+            return np.asarray(terms, dtype=np.int64)
+        return self.vocab.lookup(terms)
+
+    def _require_corpus_stats(self) -> None:
+        if self.df is None:
+            raise ValueError(
+                f"{self.__class__.__name__} was loaded from a model without document frequencies "
+                "(legacy pickle or format 1), incremental updates need a full fit() first."
+            )
+
+    def _refresh_weights(self) -> None:
+        # IDF = log((N - df + 0.5) / (df + 0.5) + 1), indexed by term id
+        doc_freqs = self.df.astype(np.float64)
+        self.idf = np.log((self.num_docs - doc_freqs + 0.5) / (doc_freqs + 0.5) + 1.0).astype(np.float32)
+        # Removed terms and empty hash buckets have no document left to back a weight
+        self.idf[self.df == 0] = 0.0
+
+        self.version = ""
+        self._is_fitted = True
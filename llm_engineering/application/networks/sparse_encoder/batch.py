@@ -0,0 +1,209 @@
+"""Vectorized batch encoding for the sparse encoders.
+
+A batch of texts is turned into a CSR term-count matrix (one row per text),
+weighted for the whole batch at once with NumPy and cut to the top
+``max_terms`` entries per row with ``np.argpartition``, then optionally pruned
+to the terms carrying most of each row's weight and quantized.
+"""
+from collections import Counter
+from collections.abc import Callable, Iterator, Sequence
+from dataclasses import dataclass
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .storage import HashingVocab, TermTable
+
+
+@dataclass
+class SparseBatch:
+    """CSR sparse matrix: row ``i`` spans ``indices[indptr[i]:indptr[i + 1]]``."""
+
+    indptr: NDArray[np.int64]
+    indices: NDArray[np.int64]
+    values: NDArray[np.float32]
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    @classmethod
+    def from_dicts(cls, vectors: Sequence[dict]) -> "SparseBatch":
+        """Inverse of ``to_dicts``."""
+        sizes = np.fromiter((len(vector["indices"]) for vector in vectors), dtype=np.int64, count=len(vectors))
+        indptr = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+
+        indices = [index for vector in vectors for index in vector["indices"]]
+        values = [value for vector in vectors for value in vector["values"]]
+
+        return cls(
+            indptr=indptr,
+            indices=np.asarray(indices, dtype=np.int64),
+            values=np.asarray(values, dtype=np.float32),
+        )
+
+    def row(self, i: int) -> tuple[NDArray[np.int64], NDArray[np.float32]]:
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return self.indices[start:end], self.values[start:end]
+
+    def rows(self) -> Iterator[tuple[NDArray[np.int64], NDArray[np.float32]]]:
+        for i in range(len(self)):
+            yield self.row(i)
+
+    def to_dicts(self) -> list[dict]:
+        """Rows as ``{"indices": [...], "values": [...]}``, the shape used by ``SparseVector``."""
+        return [{"indices": indices.tolist(), "values": values.tolist()} for indices, values in self.rows()]
+
+
+@dataclass
+class TermCounts:
+    """CSR term-frequency matrix of a batch, one entry per distinct term of each row."""
+
+    indptr: NDArray[np.int64]
+    rows: NDArray[np.int64]
+    term_ids: NDArray[np.int64]
+    counts: NDArray[np.float32]
+    doc_lens: NDArray[np.float32]
+
+
+def count_terms(
+    texts: Sequence[str],
+    tokenize: Callable[[str], Sequence[str]],
+    vocab: TermTable | HashingVocab,
+) -> TermCounts:
+    """Tokenize a batch and count in-vocabulary terms per text.
+
+    Terms are counted per text with ``Counter`` and deduplicated across the batch
+    before hitting the term table, so the vocabulary is searched once per
+    distinct term. ``doc_lens`` counts every token, including
+    out-of-vocabulary ones. With a ``HashingVocab``, distinct terms of a text that
+    hash to the same id are merged into one entry, as sparse vectors need unique indices.
+    """
+    terms: list[str] = []
+    counts: list[int] = []
+    row_sizes = np.zeros(len(texts), dtype=np.int64)
+    doc_lens = np.zeros(len(texts), dtype=np.float32)
+
+    for row, text in enumerate(texts):
+        tokens = tokenize(text) if text else ()
+        tf = Counter(tokens)
+
+        doc_lens[row] = len(tokens)
+        row_sizes[row] = len(tf)
+        terms.extend(tf)
+        counts.extend(tf.values())
+
+    # dict.fromkeys and map() deduplicate and resolve in C, without a Python-level loop per entry
+    unique_terms = list(dict.fromkeys(terms))
+    term_to_id = dict(zip(unique_terms, vocab.lookup(unique_terms).tolist()))
+    term_ids = np.fromiter(map(term_to_id.__getitem__, terms), dtype=np.int64, count=len(terms))
+
+    rows = np.repeat(np.arange(len(texts), dtype=np.int64), row_sizes)
+
+    in_vocab = term_ids >= 0
+    rows, term_ids = rows[in_vocab], term_ids[in_vocab]
+    term_counts = np.asarray(counts, dtype=np.float32)[in_vocab]
+
+    if isinstance(vocab, HashingVocab):
+        rows, term_ids, term_counts = _merge_collisions(rows, term_ids, term_counts, vocab.n_features)
+
+    indptr = np.searchsorted(rows, np.arange(len(texts) + 1)).astype(np.int64)
+
+    return TermCounts(
+        indptr=indptr,
+        rows=rows,
+        term_ids=term_ids,
+        counts=term_counts,
+        doc_lens=doc_lens,
+    )
+
+
+def _merge_collisions(
+    rows: NDArray[np.int64], term_ids: NDArray[np.int64], counts: NDArray[np.float32], n_features: int
+) -> tuple[NDArray[np.int64], NDArray[np.int64], NDArray[np.float32]]:
+    """Sum the counts of entries sharing a (row, term id), keeping rows sorted."""
+    keys = rows * n_features + term_ids
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    if len(unique_keys) == len(keys):
+        return rows, term_ids, counts
+
+    merged = np.zeros(len(unique_keys), dtype=np.float32)
+    np.add.at(merged, inverse, counts)
+    return unique_keys // n_features, unique_keys % n_features, merged
+
+
+def top_k_per_row(
+    indptr: NDArray[np.int64],
+    term_ids: NDArray[np.int64],
+    scores: NDArray[np.float32],
+    k: int,
+) -> SparseBatch:
+    """Keep the ``k`` highest scores of every row, ordered by descending score."""
+    keep = np.ones(len(scores), dtype=bool)
+    row_sizes = np.diff(indptr)
+
+    for row in np.flatnonzero(row_sizes > k):
+        start, end = indptr[row], indptr[row + 1]
+        dropped = np.argpartition(-scores[start:end], k - 1)[k:]
+        keep[start + dropped] = False
+
+    rows = np.repeat(np.arange(len(row_sizes), dtype=np.int64), row_sizes)[keep]
+    term_ids, scores = term_ids[keep], scores[keep]
+
+    order = np.lexsort((-scores, rows))
+    new_indptr = np.searchsorted(rows, np.arange(len(row_sizes) + 1)).astype(np.int64)
+
+    return SparseBatch(indptr=new_indptr, indices=term_ids[order], values=scores[order])
+
+
+QUANTIZATIONS = ("float16", "uint8")
+UINT8_LEVELS = 255
+
+
+def prune_by_mass(batch: SparseBatch, weight_mass: float, min_terms: int = 1) -> SparseBatch:
+    """Keep the fewest leading entries of every row that sum to ``weight_mass`` of its total weight.
+
+    Rows must be ordered by descending weight (as ``top_k_per_row`` returns them);
+    at least ``min_terms`` entries of a row are kept when it has them.
+    """
+    if not 0.0 < weight_mass <= 1.0:
+        raise ValueError(f"weight_mass must be in (0, 1], got {weight_mass}")
+
+    row_sizes = np.diff(batch.indptr)
+    rows = np.repeat(np.arange(len(batch), dtype=np.int64), row_sizes)
+
+    cumulative = np.concatenate([[0.0], np.cumsum(batch.values, dtype=np.float64)])
+    row_start = cumulative[batch.indptr[:-1]]
+    row_totals = cumulative[batch.indptr[1:]] - row_start
+
+    # Weight of the entries ranked before each entry of the same row
+    weight_before = cumulative[:-1] - row_start[rows]
+    rank = np.arange(len(rows)) - batch.indptr[rows]
+    keep = (weight_before < weight_mass * row_totals[rows]) | (rank < min_terms)
+
+    return SparseBatch(
+        indptr=np.searchsorted(rows[keep], np.arange(len(batch) + 1)).astype(np.int64),
+        indices=batch.indices[keep],
+        values=batch.values[keep],
+    )
+
+
+def quantize(batch: SparseBatch, quantization: str) -> SparseBatch:
+    """Round weights to what a ``float16`` or ``uint8`` sparse index stores.
+
+    ``uint8`` maps every row linearly onto 1..255 by its largest weight, so the
+    ranking of a row's terms and their relative weights are preserved.
+    """
+    if quantization == "float16":
+        values = batch.values.astype(np.float16).astype(np.float32)
+    elif quantization == "uint8":
+        rows = np.repeat(np.arange(len(batch), dtype=np.int64), np.diff(batch.indptr))
+        row_max = np.zeros(len(batch), dtype=np.float32)
+        np.maximum.at(row_max, rows, batch.values)
+
+        scale = row_max[rows] / UINT8_LEVELS
+        levels = np.clip(np.rint(np.divide(batch.values, scale, out=np.zeros_like(scale), where=scale > 0)), 1, UINT8_LEVELS)
+        values = (levels * scale).astype(np.float32)
+    else:
+        raise ValueError(f"Unknown quantization: {quantization}. Use one of {QUANTIZATIONS}")
+
+    return SparseBatch(indptr=batch.indptr, indices=batch.indices, values=values)
@@ -0,0 +1,222 @@
+"""Streaming, optionally multi-process corpus statistics for fitting sparse encoders.
+
+The corpus is consumed lazily in shards, so ``fit`` accepts any iterable or
+generator and never materialises the full list of chunks. Each shard is
+tokenized and df-counted in a worker process, and the partial counters are
+merged in the parent.
+
+With ``min_df`` or ``max_vocab`` set, the merged counter only tracks terms
+whose count-min-sketch estimate already reaches ``min_df``, so one-off tokens
+(OCR noise, typos) never enter it and memory is bounded by the sketch plus the
+frequent terms. In feature-hashing mode workers count hashed term ids instead
+of strings and the counter is bounded by ``n_features``.
+"""
+import resource
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from itertools import islice
+
+import numpy as np
+from loguru import logger
+from numpy.typing import NDArray
+from tqdm import tqdm
+
+from .storage import hash_terms
+
+
+@dataclass
+class CorpusStats:
+    num_docs: int = 0
+    total_doc_len: int = 0
+    df: Counter = field(default_factory=Counter)
+
+    @property
+    def avgdl(self) -> float:
+        return self.total_doc_len / self.num_docs if self.num_docs > 0 else 0.0
+
+    def merge(self, other: "CorpusStats") -> "CorpusStats":
+        self.num_docs += other.num_docs
+        self.total_doc_len += other.total_doc_len
+        self.df.update(other.df)
+        return self
+
+
+class CountMinSketch:
+    """Fixed-size frequency estimator: ``depth`` rows of ``width`` counters, estimates never undercount.
+
+    Columns come from Python's ``hash``, which is salted per process, so a sketch
+    must only be updated and queried in the process that created it.
+    """
+
+    def __init__(self, width: int = 2**20, depth: int = 4, seed: int = 0) -> None:
+        if width & (width - 1):
+            raise ValueError(f"Sketch width must be a power of two, got {width}")
+
+        self.table = np.zeros((depth, width), dtype=np.uint32)
+        self._shift = np.uint64(64 - width.bit_length() + 1)
+
+        rng = np.random.default_rng(seed)
+        self._multipliers = rng.integers(1, 2**63, size=(depth, 1), dtype=np.uint64) | np.uint64(1)
+        self._offsets = rng.integers(0, 2**63, size=(depth, 1), dtype=np.uint64)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.table.nbytes)
+
+    def _columns(self, keys: Sequence[str]) -> NDArray[np.uint64]:
+        hashes = np.fromiter((hash(key) for key in keys), dtype=np.int64, count=len(keys)).view(np.uint64)
+        # Multiply-shift hashing, one independent function per row (uint64 arithmetic wraps)
+        return (hashes * self._multipliers + self._offsets) >> self._shift
+
+    def add(self, keys: Sequence[str], counts: NDArray[np.int64]) -> None:
+        columns = self._columns(keys)
+        for row, row_columns in enumerate(columns):
+            np.add.at(self.table[row], row_columns, counts.astype(np.uint32))
+
+    def estimate(self, keys: Sequence[str]) -> NDArray[np.int64]:
+        columns = self._columns(keys)
+        rows = np.arange(len(columns))[:, None]
+        return self.table[rows, columns].min(axis=0).astype(np.int64)
+
+
+@dataclass
+class SketchedCorpusStats(CorpusStats):
+    """``CorpusStats`` whose ``df`` counter only admits terms estimated to reach ``min_df``.
+
+    A term enters ``df`` with its sketch estimate (an upper bound of its count so
+    far) and is counted exactly from then on. When ``max_tracked`` is exceeded the
+    least frequent half is evicted; evicted terms are re-admitted later with a
+    fresh estimate, since the sketch keeps their whole history.
+    """
+
+    min_df: int = 1
+    max_tracked: int | None = None
+    sketch: CountMinSketch = field(default_factory=CountMinSketch)
+
+    def merge(self, other: CorpusStats) -> "SketchedCorpusStats":
+        self.num_docs += other.num_docs
+        self.total_doc_len += other.total_doc_len
+
+        terms = list(other.df)
+        self.sketch.add(terms, np.fromiter(other.df.values(), dtype=np.int64, count=len(terms)))
+
+        tracked = {term: count for term, count in other.df.items() if term in self.df}
+        self.df.update(tracked)
+
+        untracked = [term for term in terms if term not in tracked]
+        if untracked:
+            for term, estimate in zip(untracked, self.sketch.estimate(untracked).tolist()):
+                if estimate >= self.min_df:
+                    self.df[term] = estimate
+
+        if self.max_tracked is not None and len(self.df) > self.max_tracked:
+            self.df = Counter(dict(self.df.most_common(self.max_tracked // 2)))
+
+        return self
+
+
+@dataclass(frozen=True)
+class HashedTokenizer:
+    """Picklable ``tokenize`` wrapper that yields hashed term ids instead of strings."""
+
+    tokenize: Callable[[str], Sequence[str]]
+    n_features: int
+
+    def __call__(self, text: str) -> list[int]:
+        return hash_terms(self.tokenize(text), self.n_features).tolist()
+
+
+def prune_vocabulary(
+    df: Counter,
+    num_docs: int,
+    min_df: int = 1,
+    max_df: float | int = 1.0,
+    max_vocab: int | None = None,
+) -> dict:
+    """Drop rare and overly common terms, then keep the ``max_vocab`` most frequent.
+
+    ``max_df`` is a fraction of the corpus when it is a float, an absolute count when it is an int.
+    """
+    max_count = max_df * num_docs if isinstance(max_df, float) else max_df
+    kept = {term: count for term, count in df.items() if min_df <= count <= max_count}
+
+    if max_vocab is not None and len(kept) > max_vocab:
+        # Ties are broken by term so the vocabulary does not depend on counting order
+        kept = dict(sorted(kept.items(), key=lambda item: (-item[1], item[0]))[:max_vocab])
+
+    if len(kept) < len(df):
+        logger.info(f"Pruned vocabulary from {len(df)} to {len(kept)} terms")
+
+    return kept
+
+
+def count_shard(texts: Sequence[str], tokenize: Callable[[str], Sequence[str]]) -> CorpusStats:
+    stats = CorpusStats(num_docs=len(texts))
+    for text in texts:
+        tokens = tokenize(text)
+        stats.total_doc_len += len(tokens)
+        stats.df.update(set(tokens))  # Unique tokens per document
+    return stats
+
+
+def _shards(corpus: Iterable[str], shard_size: int) -> Iterator[list[str]]:
+    iterator = iter(corpus)
+    while shard := list(islice(iterator, shard_size)):
+        yield shard
+
+
+def _peak_rss_mb(who: int) -> float:
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+def count_corpus(
+    corpus: Iterable[str],
+    tokenize: Callable[[str], Sequence[str]],
+    n_jobs: int = 1,
+    shard_size: int = 1000,
+    desc: str = "Counting document frequencies",
+    stats: CorpusStats | None = None,
+) -> CorpusStats:
+    """Tokenize and df-count a corpus, sharded across ``n_jobs`` worker processes.
+
+    At most ``2 * n_jobs`` shards are in flight, so memory stays bounded by the
+    shard size and the merged counter rather than the corpus size.
+    ``tokenize`` must be picklable (a ``Tokenizer`` or a module-level function).
+    Shard counts are merged into ``stats`` (a fresh exact ``CorpusStats`` by default).
+    """
+    total = len(corpus) if hasattr(corpus, "__len__") else None
+    stats = stats if stats is not None else CorpusStats()
+
+    with tqdm(total=total, desc=desc, unit="doc") as progress:
+        if n_jobs <= 1:
+            for shard in _shards(corpus, shard_size):
+                stats.merge(count_shard(shard, tokenize))
+                progress.update(len(shard))
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                in_flight: set[Future] = set()
+                for shard in _shards(corpus, shard_size):
+                    in_flight.add(executor.submit(count_shard, shard, tokenize))
+
+                    if len(in_flight) >= 2 * n_jobs:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            shard_stats = future.result()
+                            stats.merge(shard_stats)
+                            progress.update(shard_stats.num_docs)
+
+                for future in in_flight:
+                    shard_stats = future.result()
+                    stats.merge(shard_stats)
+                    progress.update(shard_stats.num_docs)
+
+    logger.info(
+        f"Counted {stats.num_docs} documents, {len(stats.df)} distinct terms "
+        f"(n_jobs={n_jobs}, peak RSS: main {_peak_rss_mb(resource.RUSAGE_SELF):.0f} MB, "
+        f"workers {_peak_rss_mb(resource.RUSAGE_CHILDREN):.0f} MB)"
+    )
+
+    return stats
@@ -0,0 +1,324 @@
+"""In-process inverted index over sparse document vectors, with MaxScore top-k retrieval.
+
+The index regroups the document vectors stored in Qdrant by term, so a query
+can be scored locally without a network round trip. On disk it is a directory
+of arrays, memory-mapped on load like the sparse models::
+
+    meta.json            format version, corpus size, block size, encoder version
+    doc_ids.npy          external point id of every internal document number
+    term_block_ptr.npy   int64, blocks of term ``t`` are ``term_block_ptr[t]:term_block_ptr[t + 1]``
+    block_ptr.npy        int64, postings of block ``b`` are ``block_ptr[b]:block_ptr[b + 1]``
+    block_first_doc.npy  uint32 first document number of every block
+    block_last_doc.npy   uint32 last document number of every block
+    gaps.npy             document number gaps within a block (0 for the first posting)
+    impacts.npy          uint8 quantized weights, ``weight = impact * term_scale[t]``
+    term_scale.npy       float32 dequantization scale of every term
+
+Posting lists are compressed by delta-coding document numbers into the
+narrowest unsigned dtype that fits and quantizing weights to one byte per
+posting. Blocks of ``BLOCK_SIZE`` postings can be decoded independently, which
+lets the non-essential terms of MaxScore skip every block that holds no
+candidate.
+"""
+import json
+from collections.abc import Sequence
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+from numpy.typing import NDArray
+
+from .batch import SparseBatch
+from .storage import META_FILE, write_arrays, write_meta
+
+INDEX_FORMAT_VERSION = 1
+BLOCK_SIZE = 128
+IMPACT_LEVELS = 255
+
+_ARRAY_FILES = (
+    "doc_ids",
+    "term_block_ptr",
+    "block_ptr",
+    "block_first_doc",
+    "block_last_doc",
+    "gaps",
+    "impacts",
+    "term_scale",
+)
+
+
+class InvertedIndex:
+    """Block-compressed posting lists scored by dot product with a sparse query.
+
+    With ``idf_modifier`` enabled the query weights are multiplied by the IDF of
+    the posting list lengths, which mirrors ``SparseVectorParams(modifier=Modifier.IDF)``
+    on the Qdrant collection, so local and remote sparse scores rank alike.
+    """
+
+    def __init__(
+        self,
+        doc_ids: NDArray[np.str_],
+        term_block_ptr: NDArray[np.int64],
+        block_ptr: NDArray[np.int64],
+        block_first_doc: NDArray[np.uint32],
+        block_last_doc: NDArray[np.uint32],
+        gaps: NDArray[np.unsignedinteger],
+        impacts: NDArray[np.uint8],
+        term_scale: NDArray[np.float32],
+        idf_modifier: bool = True,
+        encoder_version: str = "",
+    ) -> None:
+        self.doc_ids = doc_ids
+        self.term_block_ptr = term_block_ptr
+        self.block_ptr = block_ptr
+        self.block_first_doc = block_first_doc
+        self.block_last_doc = block_last_doc
+        self.gaps = gaps
+        self.impacts = impacts
+        self.term_scale = term_scale
+        self.idf_modifier = idf_modifier
+        self.encoder_version = encoder_version
+
+        self.num_docs = len(doc_ids)
+        self.num_terms = len(term_block_ptr) - 1
+
+        postings_ptr = np.asarray(block_ptr)[np.asarray(term_block_ptr)]
+        self.doc_freqs = np.diff(postings_ptr)
+        self.max_weights = np.asarray(term_scale, dtype=np.float32) * IMPACT_LEVELS
+
+        if idf_modifier:
+            # Same formula as Qdrant's IDF modifier: ln((N - n + 0.5) / (n + 0.5) + 1)
+            doc_freqs = self.doc_freqs.astype(np.float64)
+            self.idf = np.log((self.num_docs - doc_freqs + 0.5) / (doc_freqs + 0.5) + 1.0).astype(np.float32)
+        else:
+            self.idf = np.ones(self.num_terms, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return self.num_docs
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(getattr(self, name).nbytes for name in _ARRAY_FILES))
+
+    @classmethod
+    def build(
+        cls,
+        doc_ids: Sequence[str],
+        vectors: SparseBatch,
+        num_terms: int | None = None,
+        idf_modifier: bool = True,
+        encoder_version: str = "",
+        block_size: int = BLOCK_SIZE,
+    ) -> "InvertedIndex":
+        """Build the index from document vectors, row ``i`` of ``vectors`` belongs to ``doc_ids[i]``."""
+        if len(doc_ids) != len(vectors):
+            raise ValueError(f"Got {len(doc_ids)} document ids for {len(vectors)} vectors")
+
+        rows = np.repeat(np.arange(len(vectors), dtype=np.int64), np.diff(vectors.indptr))
+        terms = np.asarray(vectors.indices, dtype=np.int64)
+        weights = np.asarray(vectors.values, dtype=np.float32)
+
+        # Upper bounds assume non-negative contributions
+        positive = weights > 0
+        rows, terms, weights = rows[positive], terms[positive], weights[positive]
+
+        num_terms = max(num_terms or 0, int(terms.max()) + 1 if len(terms) else 0)
+
+        order = np.lexsort((rows, terms))
+        rows, terms, weights = rows[order], terms[order], weights[order]
+        term_ptr = np.searchsorted(terms, np.arange(num_terms + 1))
+
+        # Per-term quantization: the largest weight of a term maps to IMPACT_LEVELS
+        max_weights = np.zeros(num_terms, dtype=np.float32)
+        non_empty = np.diff(term_ptr) > 0
+        if len(weights):
+            max_weights[non_empty] = np.maximum.reduceat(weights, term_ptr[:-1][non_empty])
+        term_scale = (max_weights / IMPACT_LEVELS).astype(np.float32)
+        impacts = np.clip(np.rint(weights / term_scale[terms]), 1, IMPACT_LEVELS).astype(np.uint8)
+
+        rank_in_term = np.arange(len(terms)) - term_ptr[terms]
+        block_starts = np.flatnonzero(rank_in_term % block_size == 0)
+        block_ptr = np.append(block_starts, len(terms)).astype(np.int64)
+        term_block_ptr = np.searchsorted(terms[block_starts], np.arange(num_terms + 1)).astype(np.int64)
+
+        gaps = np.diff(rows, prepend=0)
+        gaps[block_starts] = 0
+        gaps = gaps.astype(np.min_scalar_type(int(gaps.max()) if len(gaps) else 0))
+
+        index = cls(
+            doc_ids=np.array(list(doc_ids), dtype=str),
+            term_block_ptr=term_block_ptr,
+            block_ptr=block_ptr,
+            block_first_doc=rows[block_starts].astype(np.uint32),
+            block_last_doc=rows[block_ptr[1:] - 1].astype(np.uint32),
+            gaps=gaps,
+            impacts=impacts,
+            term_scale=term_scale,
+            idf_modifier=idf_modifier,
+            encoder_version=encoder_version,
+        )
+
+        logger.info(
+            f"Built inverted index: {index.num_docs} documents, {int(non_empty.sum())} terms, "
+            f"{len(impacts)} postings in {len(block_starts)} blocks ({index.nbytes / 1024 / 1024:.1f} MB)"
+        )
+
+        return index
+
+    def search(self, indices: Sequence[int], values: Sequence[float], k: int = 10) -> list[tuple[str, float]]:
+        """Top ``k`` documents for a sparse query, as ``(doc_id, score)`` by descending score.
+
+        Terms are processed by decreasing upper bound. While documents outside the
+        current candidates could still reach the top ``k`` every posting is
+        scored (essential terms); once the remaining upper bounds drop below the
+        ``k``-th best score only the blocks holding candidates are decoded, and
+        candidates that can no longer reach the threshold are dropped.
+        """
+        terms = np.asarray(indices, dtype=np.int64)
+        weights = np.asarray(values, dtype=np.float32)
+
+        valid = (terms >= 0) & (terms < self.num_terms) & (weights > 0)
+        terms, weights = terms[valid], weights[valid] * self.idf[terms[valid]]
+
+        bounds = weights * self.max_weights[terms]
+        order = np.argsort(-bounds, kind="stable")
+        order = order[bounds[order] > 0]
+        terms, weights, bounds = terms[order], weights[order], bounds[order]
+
+        if len(terms) == 0 or k <= 0:
+            return []
+
+        # Upper bound of everything after term i
+        remaining = np.append(np.cumsum(bounds[::-1])[::-1][1:], 0.0)
+
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        touched = np.zeros(self.num_docs, dtype=bool)
+        threshold = 0.0
+        candidates = None
+
+        for i, (term, weight) in enumerate(zip(terms.tolist(), weights.tolist())):
+            scale = weight * float(self.term_scale[term])
+
+            if candidates is None:
+                docs, impacts = self._decode_term(term)
+                scores[docs] += scale * impacts
+                touched[docs] = True
+                # Partial scores never exceed final ones, so any k-th best is a safe threshold
+                threshold = max(threshold, _kth_largest(scores[docs], k))
+
+                if remaining[i] <= threshold:
+                    candidates = np.flatnonzero(touched & (scores + remaining[i] >= threshold))
+                    candidate_scores = scores[candidates]
+            else:
+                docs, impacts = self._decode_blocks(self._candidate_blocks(term, candidates))
+                if len(docs):
+                    positions = np.minimum(np.searchsorted(docs, candidates), len(docs) - 1)
+                    hit = docs[positions] == candidates
+                    candidate_scores[hit] += scale * impacts[positions[hit]]
+
+                threshold = max(threshold, _kth_largest(candidate_scores, k))
+                keep = candidate_scores + remaining[i] >= threshold
+                candidates, candidate_scores = candidates[keep], candidate_scores[keep]
+
+        if candidates is None:
+            candidates = np.flatnonzero(touched)
+            candidate_scores = scores[candidates]
+
+        if len(candidates) > k:
+            top = np.argpartition(-candidate_scores, k - 1)[:k]
+            candidates, candidate_scores = candidates[top], candidate_scores[top]
+
+        order = np.lexsort((candidates, -candidate_scores))
+
+        return [(str(self.doc_ids[doc]), float(score)) for doc, score in zip(candidates[order], candidate_scores[order])]
+
+    def _decode_term(self, term: int) -> tuple[NDArray[np.int64], NDArray[np.float32]]:
+        first_block, end_block = self.term_block_ptr[term], self.term_block_ptr[term + 1]
+        return self._decode_blocks(np.arange(first_block, end_block))
+
+    def _candidate_blocks(self, term: int, candidates: NDArray[np.int64]) -> NDArray[np.int64]:
+        """Blocks of ``term`` whose document range contains at least one candidate."""
+        first_block, end_block = self.term_block_ptr[term], self.term_block_ptr[term + 1]
+
+        positions = np.searchsorted(self.block_last_doc[first_block:end_block], candidates)
+        inside = positions < end_block - first_block
+        blocks = first_block + positions[inside]
+        blocks = blocks[self.block_first_doc[blocks] <= candidates[inside]]
+
+        return np.unique(blocks)
+
+    def _decode_blocks(self, blocks: NDArray[np.int64]) -> tuple[NDArray[np.int64], NDArray[np.float32]]:
+        """Document numbers (ascending) and impacts of the postings in ``blocks``."""
+        starts, ends = self.block_ptr[blocks], self.block_ptr[blocks + 1]
+        sizes = ends - starts
+        offsets = np.cumsum(sizes) - sizes
+
+        positions = np.arange(int(sizes.sum()), dtype=np.int64) + np.repeat(starts - offsets, sizes)
+        cumulative = np.cumsum(self.gaps[positions], dtype=np.int64)
+
+        # Every block restarts its gaps at 0, so rebase the running sum on each block's first document
+        block_base = np.asarray(self.block_first_doc[blocks], dtype=np.int64) - cumulative[offsets]
+        docs = cumulative + np.repeat(block_base, sizes)
+
+        return docs, self.impacts[positions].astype(np.float32)
+
+    def save(self, index_path: str | Path) -> Path:
+        index_dir = Path(index_path)
+        index_dir.mkdir(parents=True, exist_ok=True)
+
+        write_arrays(index_dir, {f"{name}.npy": np.ascontiguousarray(getattr(self, name)) for name in _ARRAY_FILES})
+        write_meta(
+            index_dir,
+            {
+                "format_version": INDEX_FORMAT_VERSION,
+                "kind": "inverted_index",
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "num_docs": self.num_docs,
+                "num_terms": self.num_terms,
+                "num_postings": len(self.impacts),
+                "idf_modifier": self.idf_modifier,
+                "encoder_version": self.encoder_version,
+            },
+        )
+
+        return index_dir
+
+    @classmethod
+    def load(cls, index_path: str | Path, mmap: bool = True) -> "InvertedIndex":
+        index_dir = Path(index_path)
+        meta = read_index_meta(index_dir)
+        mmap_mode = "r" if mmap else None
+
+        arrays = {
+            name: np.load(index_dir / f"{name}.npy", mmap_mode=mmap_mode, allow_pickle=False)
+            for name in _ARRAY_FILES
+        }
+
+        return cls(
+            **arrays,
+            idf_modifier=meta.get("idf_modifier", True),
+            encoder_version=meta.get("encoder_version", ""),
+        )
+
+
+def read_index_meta(index_path: str | Path) -> dict:
+    with open(Path(index_path) / META_FILE, encoding="utf-8") as f:
+        meta = json.load(f)
+
+    if meta.get("kind") != "inverted_index":
+        raise ValueError(f"{index_path} is not an inverted index")
+
+    if meta.get("format_version", 0) > INDEX_FORMAT_VERSION:
+        raise ValueError(
+            f"Inverted index at {index_path} uses format version {meta['format_version']}, "
+            f"this build only reads up to version {INDEX_FORMAT_VERSION}."
+        )
+
+    return meta
+
+
+def _kth_largest(scores: NDArray[np.float32], k: int) -> float:
+    if len(scores) < k:
+        return 0.0
+    return float(np.partition(scores, len(scores) - k)[len(scores) - k])
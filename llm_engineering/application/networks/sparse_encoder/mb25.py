@@ -1,165 +1,101 @@
-import re
-import math
-import pickle
-from pathlib import Path
-from collections import Counter
-from functools import lru_cache
-from tqdm import tqdm
-from loguru import logger
-
-from .base import BaseSparseEncoder
-from llm_engineering.application.networks.base import SingletonMeta
-from llm_engineering.settings import settings
-
+import numpy as np
 
-class BM25SparseEncoder(BaseSparseEncoder, metaclass=SingletonMeta):
+from .base import PRUNING_DEFAULTS, VOCAB_PARAMS, BaseSparseEncoder
+from .batch import TermCounts
+from .storage import SparseModelState, TermTable, save_model
+from llm_engineering.settings import settings
 
-    def __init__(self, max_terms: int = 128, k1: float = 1.5, b: float = 0.75):
-        # Singleton only calls __init__ once - if already initialized, return
-        if hasattr(self, '_is_fitted'):
-            return
 
+class BM25SparseEncoder(BaseSparseEncoder):
+    name = "bm25"
+    default_params = {"max_terms": 128, "k1": 1.5, "b": 0.75, **PRUNING_DEFAULTS}
+
+    def __init__(
+        self,
+        max_terms: int | None = None,
+        k1: float | None = None,
+        b: float | None = None,
+        weight_mass: float | None = None,
+        min_terms: int | None = None,
+        quantization: str | None = None,
+        model_path: str | None = None,
+    ):
         # Initialize attributes
-        self.vocab = {}
-        self.idf = {}
+        self.vocab = TermTable.from_vocab({})
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.df = None
+        self.num_docs = 0
+        self.total_doc_len = 0
         self.avgdl = 0.0
-        self.max_terms = max_terms
-        self.k1 = k1
-        self.b = b
-
-        self.model_path = settings.SPARSE_MODEL_PATH
+        self.max_terms = self.default_params["max_terms"]
+        self.k1 = self.default_params["k1"]
+        self.b = self.default_params["b"]
+        self._apply_pruning_params(PRUNING_DEFAULTS)
+        self.vocab_params = {}
+        self.version = ""
+
+        self.model_path = model_path or settings.SPARSE_MODEL_PATH
         self._is_fitted = False
 
-        if Path(self.model_path).exists():
-            try:
-                self._load_from_path(self.model_path)
-                self._is_fitted = True
-                logger.info(f"BM25SparseEncoder loaded from {self.model_path}")
-            except Exception as e:
-                logger.error(f"Failed to load BM25 model: {e}")
-                self._is_fitted = False
-        else:
-            logger.warning(f"Model file not found: {self.model_path}")
-
-    @staticmethod
-    @lru_cache(maxsize=10000)
-    def _tokenize(text: str) -> tuple:
-        pattern = r'[a-záàảãạăắằẳẵặâấầẩẫậéèẻẽẹêếềểễệíìỉĩịóòỏõọôốồổỗộơớờởỡợúùủũụưứừửữựýỳỷỹỵđ]+'
-        tokens = re.findall(pattern, text.lower())
-        return tuple(tokens)
-
-    def fit(self, corpus: list[str]) -> None:
-        df = Counter()
-        N = len(corpus)
-        total_doc_len = 0
+        self._load_if_exists()
 
-        for text in tqdm(corpus, desc="Building BM25 vocabulary"):
-            tokens = self._tokenize(text)
-            total_doc_len += len(tokens)
-
-            unique_tokens = set(tokens)  # Unique tokens per document
-            for term in unique_tokens:
-                df[term] += 1
-
-        self.avgdl = total_doc_len / N if N > 0 else 0.0
-
-        sorted_terms = sorted(df.keys())
-        self.vocab = {term: idx for idx, term in enumerate(sorted_terms)}
-
-        self.idf = {
-            term: math.log((N - df[term] + 0.5) / (df[term] + 0.5) + 1.0)
-            for term in df
-        }
-
-        self._is_fitted = True
+        # Explicit arguments win over the hyper-parameters stored with the model
+        self._override_params(
+            max_terms=max_terms, k1=k1, b=b, weight_mass=weight_mass, min_terms=min_terms, quantization=quantization
+        )
+        self._validate_pruning_params()
 
+    def _refresh_weights(self) -> None:
+        super()._refresh_weights()
+        self.avgdl = self.total_doc_len / self.num_docs if self.num_docs > 0 else 0.0
 
     def encode(self, input_text: str | list[str]) -> dict | list[dict]:
-        if not self._is_fitted:
-            raise ValueError("Encoder must be fitted before encoding. Call fit() or load() first.")
-
         if isinstance(input_text, list):
-            return [self._encode(text) for text in input_text]
+            return self.encode_batch(input_text).to_dicts()
         else:
-            return self._encode(input_text)
-
-    def _encode(self, text: str) -> dict:
-        if not text:
-            return {"indices": [], "values": []}
-
-        tokens = self._tokenize(text)
-        doc_len = len(tokens)
-        tf = Counter(tokens)
-
-        scores = {}
-        for term, freq in tf.items():
-            if term in self.vocab:
-                idf = self.idf[term]
+            return self.encode_batch([input_text]).to_dicts()[0]
 
-                # Length normalization factor
-                norm_factor = 1.0 - self.b + self.b * (doc_len / self.avgdl) if self.avgdl > 0 else 1.0
+    def _score(self, counts: TermCounts) -> np.ndarray:
+        freqs = counts.counts
 
-                # BM25 score = IDF * (freq * (k1 + 1)) / (freq + k1 * norm)
-                bm25_score = idf * (freq * (self.k1 + 1.0)) / (freq + self.k1 * norm_factor)
-                scores[term] = bm25_score
-            else:
-                continue
-
-        top_items = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:self.max_terms]
+        # Length normalization factor
+        if self.avgdl > 0:
+            norm_factor = 1.0 - self.b + self.b * (counts.doc_lens[counts.rows] / self.avgdl)
+        else:
+            norm_factor = np.ones_like(freqs)
 
-        return {
-            "indices": [self.vocab[term] for term, _ in top_items],
-            "values": [score for _, score in top_items]
-        }
+        # BM25 score = IDF * (freq * (k1 + 1)) / (freq + k1 * norm)
+        return self.idf[counts.term_ids] * (freqs * (self.k1 + 1.0)) / (freqs + self.k1 * norm_factor)
 
     def save(self, model_path: str) -> bool:
-        Path(model_path).parent.mkdir(parents=True, exist_ok=True)
-
-        state = {
-            "vocab": self.vocab,
-            "idf": self.idf,
-            "avgdl": self.avgdl,
-            "max_terms": self.max_terms,
-            "k1": self.k1,
-            "b": self.b
-        }
-
-        with open(model_path, "wb") as f:
-            pickle.dump(state, f)
+        state = SparseModelState(
+            algorithm=self.name,
+            vocab=self.vocab,
+            idf=self.idf,
+            df=self.df,
+            params={"max_terms": self.max_terms, "k1": self.k1, "b": self.b, **self.pruning_params, **self.vocab_params},
+            stats={"avgdl": self.avgdl, "num_docs": self.num_docs, "total_doc_len": self.total_doc_len},
+        )
+        save_model(model_path, state)
+        self.version = state.version
 
         return True
 
-    def _load_from_path(self, model_path: str) -> None:
-        """Internal method to load state into current instance."""
-        with open(model_path, "rb") as f:
-            state = pickle.load(f)
-
-        self.vocab = state["vocab"]
-        self.idf = state["idf"]
-        self.avgdl = state["avgdl"]
-        self.max_terms = state.get("max_terms", self.max_terms)
-        self.k1 = state.get("k1", self.k1)
-        self.b = state.get("b", self.b)
+    def _apply_state(self, state: SparseModelState) -> None:
+        self.vocab = state.vocab
+        self.idf = state.idf
+        self.df = state.df
+        self.num_docs = state.stats.get("num_docs", 0)
+        self.total_doc_len = state.stats.get("total_doc_len", 0)
+        self.avgdl = state.stats["avgdl"]
+        self.max_terms = state.params.get("max_terms", self.max_terms)
+        self.vocab_params = {key: state.params[key] for key in VOCAB_PARAMS if key in state.params}
+        self.k1 = state.params.get("k1", self.k1)
+        self.b = state.params.get("b", self.b)
+        self._apply_pruning_params(state.params)
+        self.version = state.version
         self._is_fitted = True
 
     @classmethod
-    def load(cls, model_path: str):
-        """Load and return a new instance (deprecated, use __init__ with model_path instead)."""
-        with open(model_path, "rb") as f:
-            state = pickle.load(f)
-
-        instance = cls(
-            max_terms=state["max_terms"],
-            k1=state["k1"],
-            b=state["b"]
-        )
-        instance.vocab = state["vocab"]
-        instance.idf = state["idf"]
-        instance.avgdl = state["avgdl"]
-        instance._is_fitted = True
-
-        return instance
-
-    @classmethod
-    def algorithm(cls) -> "BM25SparseEncoder":
-        return cls.__class__
+    def load(cls, model_path: str) -> "BM25SparseEncoder":
+        return cls(model_path=model_path)
@@ -0,0 +1,213 @@
+"""Process-wide cache of sparse encoders keyed by algorithm, parameters and model.
+
+Unlike a per-class singleton, several encoders can be warm at once (one per
+model version, field or A/B arm), asking for different parameters returns a
+different encoder, and retraining a model in place yields a new key because
+the content version stored in ``meta.json`` changes.
+
+Serving code asks for the *active* encoder of an algorithm (``get(algorithm)``
+without a path or parameters). It only changes through ``activate``/``reload``,
+which load and validate the replacement first and then swap a single reference,
+so a model written to disk mid-traffic is never picked up half-loaded.
+"""
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple
+
+from loguru import logger
+
+from .base import BaseSparseEncoder
+from .mb25 import BM25SparseEncoder
+from .reloader import check_vocabulary_preserved, validate_encoder
+from .stateless import StatelessBM25SparseEncoder
+from .storage import META_FILE, read_meta
+from .tfidf import TFIDFSparseEncoder
+from llm_engineering.settings import settings
+
+ENCODER_CLASSES: dict[str, type[BaseSparseEncoder]] = {
+    BM25SparseEncoder.name: BM25SparseEncoder,
+    TFIDFSparseEncoder.name: TFIDFSparseEncoder,
+    StatelessBM25SparseEncoder.name: StatelessBM25SparseEncoder,
+}
+
+
+class EncoderKey(NamedTuple):
+    algorithm: str
+    model_path: str
+    model_version: str
+    params: tuple
+
+
+def create_sparse_encoder(algorithm: str = "bm25", model_path: str | None = None, **params) -> BaseSparseEncoder:
+    """Build a new, uncached encoder (for training, which mutates it)."""
+    algorithm = algorithm.lower()
+    if algorithm not in ENCODER_CLASSES:
+        raise ValueError(f"Unknown algorithm: {algorithm}. Use one of {sorted(ENCODER_CLASSES)}")
+
+    return ENCODER_CLASSES[algorithm](model_path=model_path, **params)
+
+
+class SparseEncoderRegistry:
+    """LRU cache of loaded encoders, bounded by entry count and by model bytes.
+
+    Args:
+        max_entries: Encoders kept loaded at most
+        max_bytes: Evict least recently used encoders while their arrays exceed this many bytes
+    """
+
+    def __init__(self, max_entries: int = 4, max_bytes: int | None = None) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._encoders: OrderedDict[EncoderKey, BaseSparseEncoder] = OrderedDict()
+        self._active: dict[str, BaseSparseEncoder] = {}
+        self._versions: dict[str, tuple[int, str]] = {}
+        self._lock = threading.RLock()
+        self._reload_lock = threading.Lock()
+
+    def get(self, algorithm: str = "bm25", model_path: str | None = None, **params) -> BaseSparseEncoder:
+        algorithm = algorithm.lower()
+        if model_path is None and all(value is None for value in params.values()):
+            return self.active(algorithm)
+
+        key = self._key(algorithm, model_path, params)
+
+        with self._lock:
+            encoder = self._encoders.get(key)
+            if encoder is not None:
+                self._encoders.move_to_end(key)
+                return encoder
+
+            encoder = create_sparse_encoder(algorithm, model_path=key.model_path, **params)
+            self._encoders[key] = encoder
+            logger.info(
+                f"Registered {algorithm.upper()} encoder (model {key.model_version or 'unversioned'}, "
+                f"{encoder.nbytes / 1024 / 1024:.1f} MB); {len(self._encoders)} encoder(s) loaded"
+            )
+            self._evict()
+
+        return encoder
+
+    def active(self, algorithm: str = "bm25") -> BaseSparseEncoder:
+        """Encoder currently serving ``algorithm``, loaded from settings on first use."""
+        algorithm = algorithm.lower()
+        encoder = self._active.get(algorithm)
+        if encoder is not None:
+            return encoder
+
+        with self._lock:
+            if algorithm not in self._active:
+                self._active[algorithm] = self.get(algorithm, model_path=self.default_model_path(algorithm))
+            return self._active[algorithm]
+
+    def is_loaded(self, algorithm: str = "bm25") -> bool:
+        """Whether the encoder serving ``algorithm`` is loaded; unlike ``active`` this never loads it."""
+        return algorithm.lower() in self._active
+
+    def activate(self, algorithm: str, model_path: str) -> BaseSparseEncoder:
+        """Load, validate and make ``model_path`` the active model of ``algorithm``.
+
+        Meant for pipelines that (re-)encode the corpus with that model, so its vocabulary may differ.
+        """
+        return self.reload(algorithm, model_path=model_path, allow_vocabulary_change=True)
+
+    def reload(
+        self, algorithm: str = "bm25", model_path: str | None = None, allow_vocabulary_change: bool = False
+    ) -> BaseSparseEncoder:
+        """Reload the active model (or switch to ``model_path``) without blocking readers.
+
+        The new encoder is loaded and validated while the current one keeps
+        serving; ``ValueError`` leaves the current one in place. Unless
+        ``allow_vocabulary_change`` is set, the new model must keep the id of
+        every active term, as an incremental fit does.
+        """
+        algorithm = algorithm.lower()
+
+        with self._reload_lock:
+            current = self._active.get(algorithm)
+            if model_path is None:
+                model_path = current.model_path if current is not None else self.default_model_path(algorithm)
+
+            encoder = create_sparse_encoder(algorithm, model_path=str(Path(model_path).resolve()))
+            validate_encoder(encoder)
+            if current is not None and not allow_vocabulary_change:
+                check_vocabulary_preserved(current, encoder)
+
+            key = EncoderKey(algorithm, encoder.model_path, encoder.version, ())
+            with self._lock:
+                self._encoders[key] = encoder
+                self._encoders.move_to_end(key)
+                self._evict()
+
+            # A single reference swap: in-flight requests finish with the encoder they already hold
+            self._active[algorithm] = encoder
+
+        previous_version = current.version if current is not None else None
+        logger.info(f"Activated {algorithm.upper()} model {encoder.version} from {model_path} (was {previous_version})")
+
+        return encoder
+
+    def default_model_path(self, algorithm: str) -> str:
+        if algorithm == settings.SPARSE_ALGORITHM:
+            return settings.SPARSE_MODEL_PATH
+        return str((Path(settings.SPARSE_MODEL_PATH).parent / f"sparse_{algorithm}_model").resolve())
+
+    def memory_usage(self) -> list[dict]:
+        """Loaded encoders, most recently used last, with the size of their model arrays."""
+        with self._lock:
+            return [{**key._asdict(), "nbytes": encoder.nbytes} for key, encoder in self._encoders.items()]
+
+    @property
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(encoder.nbytes for encoder in self._encoders.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._encoders.clear()
+            self._active.clear()
+            self._versions.clear()
+
+    def __len__(self) -> int:
+        return len(self._encoders)
+
+    def _key(self, algorithm: str, model_path: str | None, params: dict) -> EncoderKey:
+        model_path = str(Path(model_path).resolve()) if model_path else self.default_model_path(algorithm)
+        explicit_params = tuple(sorted((name, value) for name, value in params.items() if value is not None))
+        return EncoderKey(algorithm, model_path, self._model_version(model_path), explicit_params)
+
+    def _model_version(self, model_path: str) -> str:
+        """Content version of the model at ``model_path``, re-read only when ``meta.json`` changes."""
+        meta_path = Path(model_path) / META_FILE
+        try:
+            mtime = meta_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            # Legacy pickle (or no model yet): fall back to the file's mtime
+            legacy_path = Path(f"{model_path}.pkl")
+            return f"mtime-{legacy_path.stat().st_mtime_ns}" if legacy_path.is_file() else ""
+
+        cached = self._versions.get(model_path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, read_meta(model_path).get("version", ""))
+            self._versions[model_path] = cached
+
+        return cached[1]
+
+    def _evict(self) -> None:
+        while len(self._encoders) > self.max_entries:
+            self._evict_oldest()
+
+        if self.max_bytes is not None:
+            while len(self._encoders) > 1 and self.nbytes > self.max_bytes:
+                self._evict_oldest()
+
+    def _evict_oldest(self) -> None:
+        key, encoder = self._encoders.popitem(last=False)
+        logger.info(f"Evicted {key.algorithm.upper()} encoder {key.model_version} ({encoder.nbytes / 1024 / 1024:.1f} MB)")
+
+
+sparse_encoder_registry = SparseEncoderRegistry(
+    max_entries=settings.SPARSE_ENCODER_CACHE_SIZE,
+    max_bytes=settings.SPARSE_ENCODER_CACHE_MAX_MB * 1024 * 1024 if settings.SPARSE_ENCODER_CACHE_MAX_MB else None,
+)
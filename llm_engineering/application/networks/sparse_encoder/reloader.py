@@ -0,0 +1,117 @@
+"""Validation and file-watch hot reload of the active sparse model.
+
+A reload loads the new model next to the old one, checks it, and only then
+replaces the registry's reference to the active encoder. Requests that already
+hold the old encoder finish with it, and nothing waits on the load.
+"""
+import threading
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+from .base import BaseSparseEncoder
+from .storage import META_FILE, HashingVocab
+
+PROBE_TEXTS = ("điều khoản hợp đồng lao động", "quyết định của ủy ban nhân dân tỉnh")
+
+
+def validate_encoder(encoder: BaseSparseEncoder) -> None:
+    """Raise ``ValueError`` if ``encoder`` cannot serve queries."""
+    if not encoder._is_fitted:
+        raise ValueError(f"No usable {encoder.name.upper()} model at {encoder.model_path}")
+
+    if len(encoder.vocab) == 0:
+        raise ValueError(f"{encoder.name.upper()} model at {encoder.model_path} has an empty vocabulary")
+
+    if not isinstance(encoder.vocab, HashingVocab) and encoder.vocab.term_ids.max() >= len(encoder.idf):
+        raise ValueError(f"{encoder.name.upper()} model at {encoder.model_path} has term ids outside its IDF table")
+
+    if not np.isfinite(encoder.idf).all():
+        raise ValueError(f"{encoder.name.upper()} model at {encoder.model_path} has non-finite IDF values")
+
+    batch = encoder.encode_batch(list(PROBE_TEXTS))
+    if not np.isfinite(batch.values).all():
+        raise ValueError(f"{encoder.name.upper()} model at {encoder.model_path} produces non-finite weights")
+
+
+def check_vocabulary_preserved(current: BaseSparseEncoder, encoder: BaseSparseEncoder) -> None:
+    """Raise ``ValueError`` unless every term of ``current`` keeps its id in ``encoder``.
+
+    Sparse vectors already stored in Qdrant use the current ids. An incremental
+    fit only appends terms, but a full refit re-sorts the vocabulary and would
+    silently break every stored vector.
+    """
+    current_vocab, vocab = current.vocab, encoder.vocab
+    if isinstance(current_vocab, HashingVocab) or isinstance(vocab, HashingVocab):
+        if not (
+            isinstance(current_vocab, HashingVocab)
+            and isinstance(vocab, HashingVocab)
+            and current_vocab.n_features == vocab.n_features
+        ):
+            raise ValueError(
+                f"{encoder.name.upper()} model at {encoder.model_path} hashes terms differently from the active model"
+            )
+        return
+
+    terms = [term.decode("utf-8") for term in current_vocab.terms]
+    changed = int(np.count_nonzero(vocab.lookup(terms) != current_vocab.term_ids))
+    if changed:
+        raise ValueError(
+            f"{encoder.name.upper()} model at {encoder.model_path} changes the ids of {changed} of {len(terms)} "
+            f"active terms; stored sparse vectors would no longer match (re-index, or reload with "
+            f"allow_vocabulary_change)"
+        )
+
+
+class SparseModelWatcher:
+    """Polls the active model's ``meta.json`` and hot-reloads it when a new model is written.
+
+    ``save_model`` writes ``meta.json`` last, so its mtime changing means the
+    arrays are complete. A model that fails validation, or that changes the ids
+    of active terms (a full refit), is logged and skipped; the previous one
+    keeps serving.
+    """
+
+    def __init__(self, registry, algorithm: str, interval: float = 10.0) -> None:
+        self.registry = registry
+        self.algorithm = algorithm
+        self.interval = interval
+
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._last_mtime: int | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+
+        self._last_mtime = self._meta_mtime()
+        self._thread = threading.Thread(target=self._run, name=f"sparse-{self.algorithm}-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"Watching {self.algorithm.upper()} model for changes every {self.interval:.0f}s")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            mtime = self._meta_mtime()
+            if mtime is None or mtime == self._last_mtime:
+                continue
+
+            self._last_mtime = mtime
+            try:
+                self.registry.reload(self.algorithm)
+            except Exception as e:
+                logger.error(f"Hot reload of the {self.algorithm.upper()} model failed, keeping the current one: {e}")
+
+    def _meta_mtime(self) -> int | None:
+        model_path = self.registry.active(self.algorithm).model_path
+        try:
+            return (Path(model_path) / META_FILE).stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
@@ -0,0 +1,106 @@
+import hashlib
+from collections.abc import Iterable, Sequence
+
+import numpy as np
+
+from .base import PRUNING_DEFAULTS, BaseSparseEncoder
+from .batch import SparseBatch, TermCounts, count_terms
+from .storage import HashingVocab, SparseModelState
+
+
+class StatelessBM25SparseEncoder(BaseSparseEncoder):
+    """BM25 without a fitted model: IDF is left to the Qdrant collection.
+
+    Documents are encoded as BM25-saturated, length-normalised term frequencies
+    (``avgdl`` is a fixed parameter instead of a corpus statistic) and queries as
+    a weight of 1 per distinct term. Term ids are ``crc32(term) % n_features``,
+    so they never change. ``SparseVectorParams(modifier=Modifier.IDF)`` then
+    multiplies each query term by the IDF Qdrant maintains over the collection,
+    which yields the full BM25 score with nothing to train, save or load.
+    """
+
+    name = "stateless_bm25"
+    stateless = True
+    default_params = {
+        "max_terms": 128, "k1": 1.2, "b": 0.75, "avgdl": 128.0, "n_features": 2**20, **PRUNING_DEFAULTS
+    }
+
+    def __init__(
+        self,
+        max_terms: int | None = None,
+        k1: float | None = None,
+        b: float | None = None,
+        avgdl: float | None = None,
+        n_features: int | None = None,
+        weight_mass: float | None = None,
+        min_terms: int | None = None,
+        quantization: str | None = None,
+        model_path: str | None = None,
+    ):
+        for key, value in self.default_params.items():
+            setattr(self, key, value)
+        self._override_params(
+            max_terms=max_terms, k1=k1, b=b, avgdl=avgdl, n_features=n_features,
+            weight_mass=weight_mass, min_terms=min_terms, quantization=quantization,
+        )
+        self._validate_pruning_params()
+
+        self.vocab = HashingVocab(self.n_features)
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.df = None
+        self.vocab_params = {"n_features": self.n_features}
+
+        # Nothing is read from it: kept so registry keys and API metadata look like the fitted encoders'
+        self.model_path = model_path or ""
+        self.version = self._params_version()
+        self._is_fitted = True
+
+    @property
+    def dim(self) -> int:
+        return self.n_features
+
+    def encode(self, input_text: str | list[str]) -> dict | list[dict]:
+        if isinstance(input_text, list):
+            return self.encode_batch(input_text).to_dicts()
+        else:
+            return self.encode_batch([input_text]).to_dicts()[0]
+
+    def encode_queries(self, texts: Sequence[str]) -> list[dict]:
+        return self.encode_query_batch(texts).to_dicts()
+
+    def encode_query_batch(self, texts: Sequence[str]) -> SparseBatch:
+        """A weight of 1 per distinct query term id; Qdrant scales it by the term's IDF."""
+        counts = count_terms(texts, self.tokenizer, self.vocab)
+        return SparseBatch(
+            indptr=counts.indptr,
+            indices=counts.term_ids,
+            values=np.ones(len(counts.term_ids), dtype=np.float32),
+        )
+
+    def _score(self, counts: TermCounts) -> np.ndarray:
+        freqs = counts.counts
+        norm_factor = 1.0 - self.b + self.b * (counts.doc_lens[counts.rows] / self.avgdl)
+        return (freqs * (self.k1 + 1.0)) / (freqs + self.k1 * norm_factor)
+
+    def fit(self, corpus: Iterable[str], *args, **kwargs) -> None:
+        raise ValueError(f"{self.__class__.__name__} is stateless: Qdrant maintains IDF, there is nothing to fit")
+
+    def partial_fit(self, corpus: Iterable[str], *args, **kwargs) -> int:
+        self.fit(corpus)
+
+    def remove(self, corpus: Iterable[str], *args, **kwargs) -> None:
+        self.fit(corpus)
+
+    def save(self, model_path: str) -> bool:
+        return False
+
+    def _apply_state(self, state: SparseModelState) -> None:
+        raise ValueError(f"{self.__class__.__name__} has no model to load")
+
+    def _params_version(self) -> str:
+        params = ",".join(f"{key}={value}" for key, value in sorted(self.params.items()))
+        return f"stateless-{hashlib.sha1(params.encode()).hexdigest()[:12]}"
+
+    @classmethod
+    def load(cls, model_path: str) -> "StatelessBM25SparseEncoder":
+        return cls(model_path=model_path)
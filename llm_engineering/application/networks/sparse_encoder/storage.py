@@ -0,0 +1,306 @@
+"""Array-backed on-disk format for sparse encoder models.
+
+A model is a directory with the following layout::
+
+    meta.json      format version, algorithm, hyper-parameters and corpus statistics
+    terms.npy      sorted UTF-8 term table (fixed-width bytes)
+    term_ids.npy   int32 term id of every row of ``terms.npy``
+    idf.npy        float32 IDF values indexed by term id
+    df.npy         int64 document frequencies indexed by term id (format >= 2)
+
+Models fitted in feature-hashing mode (format >= 3, ``params["n_features"]``)
+store empty term arrays: term ids are ``crc32(term) % n_features``.
+
+Arrays are opened with ``np.load(mmap_mode="r")``, so loading costs a few page
+faults instead of unpickling dicts, and every API worker maps the same pages
+from the page cache instead of holding a private copy.
+"""
+import hashlib
+import json
+import pickle
+import zlib
+from collections.abc import Iterator, Mapping, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+from numpy.typing import NDArray
+
+FORMAT_VERSION = 3
+META_FILE = "meta.json"
+TERMS_FILE = "terms.npy"
+TERM_IDS_FILE = "term_ids.npy"
+IDF_FILE = "idf.npy"
+DF_FILE = "df.npy"
+
+
+class TermTable(Mapping[str, int]):
+    """Read-only ``term -> id`` mapping backed by a sorted fixed-width bytes array.
+
+    Lookups use ``np.searchsorted``, so the table works directly on memory-mapped
+    arrays and a whole batch of tokens is resolved with a single call.
+    """
+
+    def __init__(self, terms: NDArray[np.bytes_], term_ids: NDArray[np.int32]) -> None:
+        if len(terms) != len(term_ids):
+            raise ValueError(f"Term table size mismatch: {len(terms)} terms vs {len(term_ids)} ids")
+
+        self._terms = terms
+        self._term_ids = term_ids
+        self._width = terms.dtype.itemsize
+
+    @classmethod
+    def from_vocab(cls, vocab: Mapping[str, int]) -> "TermTable":
+        sorted_items = sorted(vocab.items())
+        encoded = [term.encode("utf-8") for term, _ in sorted_items]
+        width = max((len(term) for term in encoded), default=1)
+
+        terms = np.array(encoded, dtype=f"S{width}")
+        term_ids = np.array([idx for _, idx in sorted_items], dtype=np.int32)
+
+        return cls(terms, term_ids)
+
+    def extend(self, new_terms: Sequence[str], new_ids: Sequence[int]) -> "TermTable":
+        """Return a new table with extra terms, existing ids are left untouched."""
+        encoded = [term.encode("utf-8") for term in new_terms]
+        width = max([self._width, *(len(term) for term in encoded)])
+
+        terms = np.concatenate([self._terms.astype(f"S{width}"), np.array(encoded, dtype=f"S{width}")])
+        term_ids = np.concatenate([self._term_ids, np.asarray(new_ids, dtype=np.int32)])
+
+        order = np.argsort(terms, kind="stable")
+        return TermTable(terms[order], term_ids[order])
+
+    @property
+    def terms(self) -> NDArray[np.bytes_]:
+        return self._terms
+
+    @property
+    def term_ids(self) -> NDArray[np.int32]:
+        return self._term_ids
+
+    @property
+    def nbytes(self) -> int:
+        return int(self._terms.nbytes + self._term_ids.nbytes)
+
+    def lookup(self, tokens: Sequence[str]) -> NDArray[np.int64]:
+        """Resolve tokens to term ids, ``-1`` for out-of-vocabulary tokens."""
+        if len(tokens) == 0 or len(self._terms) == 0:
+            return np.full(len(tokens), -1, dtype=np.int64)
+
+        encoded = [token.encode("utf-8") for token in tokens]
+        lengths = np.fromiter((len(token) for token in encoded), dtype=np.int64, count=len(encoded))
+
+        # Tokens wider than the table would be truncated by the cast, they can never match
+        keys = np.array(encoded, dtype=self._terms.dtype)
+        positions = np.searchsorted(self._terms, keys)
+        positions = np.minimum(positions, len(self._terms) - 1)
+
+        found = (self._terms[positions] == keys) & (lengths <= self._width)
+
+        return np.where(found, self._term_ids[positions], -1).astype(np.int64, copy=False)
+
+    def __getitem__(self, term: str) -> int:
+        term_id = int(self.lookup([term])[0])
+        if term_id < 0:
+            raise KeyError(term)
+        return term_id
+
+    def __contains__(self, term: object) -> bool:
+        return isinstance(term, str) and self.lookup([term])[0] >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        return (term.decode("utf-8") for term in self._terms)
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+
+class HashingVocab:
+    """Vocabulary-free stand-in for ``TermTable``: ids come from hashing the term itself.
+
+    Nothing but ``n_features`` is stored, so encoder RAM and model size do not grow
+    with the corpus. Distinct terms may share an id.
+    """
+
+    def __init__(self, n_features: int) -> None:
+        if n_features <= 0:
+            raise ValueError(f"n_features must be positive, got {n_features}")
+
+        self.n_features = n_features
+
+    @property
+    def terms(self) -> NDArray[np.bytes_]:
+        return np.zeros(0, dtype="S1")
+
+    @property
+    def term_ids(self) -> NDArray[np.int32]:
+        return np.zeros(0, dtype=np.int32)
+
+    @property
+    def nbytes(self) -> int:
+        return 0
+
+    def lookup(self, tokens: Sequence[str]) -> NDArray[np.int64]:
+        return hash_terms(tokens, self.n_features)
+
+    def __contains__(self, term: object) -> bool:
+        return isinstance(term, str)
+
+    def __len__(self) -> int:
+        return self.n_features
+
+
+def hash_terms(tokens: Sequence[str], n_features: int) -> NDArray[np.int64]:
+    """Stable term ids in ``[0, n_features)``, identical across processes and runs (unlike ``hash``)."""
+    hashes = np.fromiter((zlib.crc32(token.encode("utf-8")) for token in tokens), dtype=np.int64, count=len(tokens))
+    return hashes % n_features
+
+
+@dataclass
+class SparseModelState:
+    algorithm: str
+    vocab: TermTable | HashingVocab
+    idf: NDArray[np.float32]
+    params: dict = field(default_factory=dict)
+    stats: dict = field(default_factory=dict)
+    df: NDArray[np.int64] | None = None
+    version: str = ""
+
+    def __post_init__(self) -> None:
+        if not self.version:
+            self.version = compute_version(self)
+
+
+def compute_version(state: SparseModelState) -> str:
+    """Content hash of a model, identical models get identical versions."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([state.algorithm, state.params, state.stats], sort_keys=True).encode("utf-8"))
+    digest.update(np.ascontiguousarray(state.vocab.terms).tobytes())
+    digest.update(np.ascontiguousarray(state.vocab.term_ids).tobytes())
+    digest.update(np.ascontiguousarray(state.idf, dtype=np.float32).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def is_array_model(model_path: str | Path) -> bool:
+    return (Path(model_path) / META_FILE).is_file()
+
+
+def save_model(model_path: str | Path, state: SparseModelState) -> Path:
+    """Write a model directory. Files are written next to the target and renamed into place."""
+    model_dir = Path(model_path)
+    model_dir.mkdir(parents=True, exist_ok=True)
+
+    arrays = {
+        TERMS_FILE: np.ascontiguousarray(state.vocab.terms),
+        TERM_IDS_FILE: np.ascontiguousarray(state.vocab.term_ids, dtype=np.int32),
+        IDF_FILE: np.ascontiguousarray(state.idf, dtype=np.float32),
+    }
+    if state.df is not None:
+        arrays[DF_FILE] = np.ascontiguousarray(state.df, dtype=np.int64)
+    else:
+        (model_dir / DF_FILE).unlink(missing_ok=True)
+    write_arrays(model_dir, arrays)
+
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "algorithm": state.algorithm,
+        "version": state.version,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "num_terms": len(state.vocab),
+        "params": state.params,
+        "stats": state.stats,
+    }
+    # meta.json goes last: a directory without it is never picked up as a model
+    write_meta(model_dir, meta)
+
+    return model_dir
+
+
+def write_arrays(directory: Path, arrays: dict[str, np.ndarray]) -> None:
+    """Save arrays as ``.npy`` files, each written to a temp file and renamed into place."""
+    for file_name, array in arrays.items():
+        tmp_path = directory / f".{file_name}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, array, allow_pickle=False)
+        tmp_path.replace(directory / file_name)
+
+
+def write_meta(directory: Path, meta: dict) -> None:
+    tmp_meta = directory / f".{META_FILE}.tmp"
+    tmp_meta.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    tmp_meta.replace(directory / META_FILE)
+
+
+def read_meta(model_path: str | Path) -> dict:
+    with open(Path(model_path) / META_FILE, encoding="utf-8") as f:
+        meta = json.load(f)
+
+    if meta.get("format_version", 0) > FORMAT_VERSION:
+        raise ValueError(
+            f"Sparse model at {model_path} uses format version {meta['format_version']}, "
+            f"this build only reads up to version {FORMAT_VERSION}."
+        )
+
+    return meta
+
+
+def load_model(model_path: str | Path, mmap: bool = True) -> SparseModelState:
+    model_dir = Path(model_path)
+    meta = read_meta(model_dir)
+    mmap_mode = "r" if mmap else None
+
+    terms = np.load(model_dir / TERMS_FILE, mmap_mode=mmap_mode, allow_pickle=False)
+    term_ids = np.load(model_dir / TERM_IDS_FILE, mmap_mode=mmap_mode, allow_pickle=False)
+    idf = np.load(model_dir / IDF_FILE, mmap_mode=mmap_mode, allow_pickle=False)
+
+    # Models converted from pickles (and format 1) carry no document frequencies
+    df_path = model_dir / DF_FILE
+    df = np.load(df_path, mmap_mode=mmap_mode, allow_pickle=False) if df_path.is_file() else None
+
+    params = meta.get("params", {})
+    vocab = HashingVocab(params["n_features"]) if params.get("n_features") else TermTable(terms, term_ids)
+
+    return SparseModelState(
+        algorithm=meta["algorithm"],
+        vocab=vocab,
+        idf=idf,
+        params=params,
+        stats=meta.get("stats", {}),
+        df=df,
+        version=meta.get("version", ""),
+    )
+
+
+def read_legacy_pickle(model_path: str | Path, algorithm: str) -> SparseModelState:
+    """Read a pickled ``{"vocab": dict, "idf": dict, ...}`` model into array form."""
+    with open(model_path, "rb") as f:
+        state = pickle.load(f)
+
+    vocab = TermTable.from_vocab(state["vocab"])
+
+    idf = np.zeros(max(state["vocab"].values(), default=-1) + 1, dtype=np.float32)
+    for term, term_id in state["vocab"].items():
+        idf[term_id] = state["idf"][term]
+
+    params = {key: state[key] for key in ("max_terms", "k1", "b") if key in state}
+    stats = {"avgdl": state["avgdl"]} if "avgdl" in state else {}
+
+    return SparseModelState(algorithm=algorithm, vocab=vocab, idf=idf, params=params, stats=stats)
+
+
+def convert_pickle_model(pickle_path: str | Path, model_path: str | Path, algorithm: str) -> Path:
+    state = read_legacy_pickle(pickle_path, algorithm=algorithm)
+    return save_model(model_path, state)
+
+
+def read_model(model_path: str | Path, algorithm: str, mmap: bool = True) -> SparseModelState:
+    """Load either an array model directory or a legacy pickle file."""
+    if is_array_model(model_path):
+        return load_model(model_path, mmap=mmap)
+
+    if Path(model_path).is_file():
+        return read_legacy_pickle(model_path, algorithm=algorithm)
+
+    raise FileNotFoundError(f"No sparse model found at {model_path}")
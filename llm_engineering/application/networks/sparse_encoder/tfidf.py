@@ -1,133 +1,77 @@
-import re
-import math
-import pickle
-from pathlib import Path
-from collections import Counter
-from functools import lru_cache
-from tqdm import tqdm
-from loguru import logger
+import numpy as np
 
-from .base import BaseSparseEncoder
-from llm_engineering.application.networks.base import SingletonMeta
+from .base import PRUNING_DEFAULTS, VOCAB_PARAMS, BaseSparseEncoder
+from .batch import TermCounts
+from .storage import SparseModelState, TermTable, save_model
 from llm_engineering.settings import settings
 
-class TFIDFSparseEncoder(BaseSparseEncoder, metaclass=SingletonMeta):
-
-    def __init__(self, max_terms: int = 128):
-        # Singleton only calls __init__ once - if already initialized, return
-        if hasattr(self, '_is_fitted'):
-            return
-
+class TFIDFSparseEncoder(BaseSparseEncoder):
+    name = "tfidf"
+    default_params = {"max_terms": 128, **PRUNING_DEFAULTS}
+
+    def __init__(
+        self,
+        max_terms: int | None = None,
+        weight_mass: float | None = None,
+        min_terms: int | None = None,
+        quantization: str | None = None,
+        model_path: str | None = None,
+    ):
         # Initialize attributes
-        self.vocab = {}
-        self.idf = {}
-        self.max_terms = max_terms
-        self.model_path = settings.SPARSE_MODEL_PATH
+        self.vocab = TermTable.from_vocab({})
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.df = None
+        self.num_docs = 0
+        self.total_doc_len = 0
+        self.max_terms = self.default_params["max_terms"]
+        self._apply_pruning_params(PRUNING_DEFAULTS)
+        self.vocab_params = {}
+        self.version = ""
+
+        self.model_path = model_path or settings.SPARSE_MODEL_PATH
         self._is_fitted = False
 
-        if Path(self.model_path).exists():
-            try:
-                self._load_from_path(self.model_path)
-                self._is_fitted = True
-                logger.info(f"TFIDFSparseEncoder loaded from {self.model_path}")
-            except Exception as e:
-                logger.error(f"Failed to load TFIDF model: {e}")
-                self._is_fitted = False
-        else:
-            logger.warning(f"Model file not found: {self.model_path}")
-
-    @staticmethod
-    @lru_cache(maxsize=10000)
-    def _tokenize(text: str) -> tuple:
-
-        pattern = r'[a-záàảãạăắằẳẵặâấầẩẫậéèẻẽẹêếềểễệíìỉĩịóòỏõọôốồổỗộơớờởỡợúùủũụưứừửữựýỳỷỹỵđ]+'
-        tokens = re.findall(pattern, text.lower())
-        return tuple(tokens)
-
-    def fit(self, corpus: list[str]) -> None:
+        self._load_if_exists()
 
-        df = Counter()
-        N = len(corpus)
-
-        for text in tqdm(corpus, desc="Building TF-IDF vocabulary"):
-            tokens = set(self._tokenize(text))
-            for term in tokens:
-                df[term] += 1
-
-        sorted_terms = sorted(df.keys())
-        self.vocab = {term: idx for idx, term in enumerate(sorted_terms)}
-
-        # IDF = log((N - df + 0.5) / (df + 0.5) + 1)
-        self.idf = {
-            term: math.log((N - df[term] + 0.5) / (df[term] + 0.5) + 1.0)
-            for term in df
-        }
-
-        self._is_fitted = True
+        # Explicit arguments win over the hyper-parameters stored with the model
+        self._override_params(max_terms=max_terms, weight_mass=weight_mass, min_terms=min_terms, quantization=quantization)
+        self._validate_pruning_params()
 
     def encode(self, input_text: str | list[str]) -> dict | list[dict]:
-
-        if not self._is_fitted:
-            raise ValueError("Encoder must be fitted before encoding. Call fit() or load() first.")
-
         if isinstance(input_text, list):
-            return [self._encode(text) for text in input_text]
+            return self.encode_batch(input_text).to_dicts()
         else:
-            return self._encode(text=input_text)
-
-
-
-    def _encode(self, text):
-        tokens = self._tokenize(text)
-        tf = Counter(tokens)
-
-        scores = {}
-        for term, freq in tf.items():
-            if term in self.vocab:
-                # TF-IDF = TF * IDF
-                tfidf_score = freq * self.idf[term]
-                scores[term] = tfidf_score
-
-        top_items = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:self.max_terms]
+            return self.encode_batch([input_text]).to_dicts()[0]
 
-        return {
-            "indices": [self.vocab[term] for term, _ in top_items],
-            "values": [score for _, score in top_items]
-        }
+    def _score(self, counts: TermCounts) -> np.ndarray:
+        # TF-IDF = TF * IDF
+        return counts.counts * self.idf[counts.term_ids]
 
     def save(self, model_path: str) -> bool:
-        Path(model_path).parent.mkdir(parents=True, exist_ok=True)
-        state = {
-            "vocab": self.vocab,
-            "idf": self.idf,
-            "max_terms": self.max_terms
-        }
-        with open(model_path, "wb") as f:
-            pickle.dump(state, f)
+        state = SparseModelState(
+            algorithm=self.name,
+            vocab=self.vocab,
+            idf=self.idf,
+            df=self.df,
+            params={"max_terms": self.max_terms, **self.pruning_params, **self.vocab_params},
+            stats={"num_docs": self.num_docs, "total_doc_len": self.total_doc_len},
+        )
+        save_model(model_path, state)
+        self.version = state.version
         return True
 
-    def _load_from_path(self, model_path: str) -> None:
-        """Internal method to load state into current instance."""
-        with open(model_path, "rb") as f:
-            state = pickle.load(f)
-
-        self.vocab = state["vocab"]
-        self.idf = state["idf"]
-        self.max_terms = state.get("max_terms", self.max_terms)
+    def _apply_state(self, state: SparseModelState) -> None:
+        self.vocab = state.vocab
+        self.idf = state.idf
+        self.df = state.df
+        self.num_docs = state.stats.get("num_docs", 0)
+        self.total_doc_len = state.stats.get("total_doc_len", 0)
+        self.max_terms = state.params.get("max_terms", self.max_terms)
+        self.vocab_params = {key: state.params[key] for key in VOCAB_PARAMS if key in state.params}
+        self._apply_pruning_params(state.params)
+        self.version = state.version
         self._is_fitted = True
 
     @classmethod
-    def load(cls, model_path: str):
-        with open(model_path, "rb") as f:
-            state = pickle.load(f)
-
-        instance = cls(max_terms=state["max_terms"])
-        instance.vocab = state["vocab"]
-        instance.idf = state["idf"]
-        instance._is_fitted = True
-
-        return instance
-
-    @classmethod
-    def algorithm(cls) -> "TFIDFSparseEncoder":
-        return cls.__class__
\ No newline at end of file
+    def load(cls, model_path: str) -> "TFIDFSparseEncoder":
+        return cls(model_path=model_path)
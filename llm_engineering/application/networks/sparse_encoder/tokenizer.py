@@ -0,0 +1,126 @@
+"""Vietnamese word tokenizer shared by the sparse encoders.
+
+Chunk texts are tokenized once during fitting and indexing and are never
+cached. Only short texts (queries, which repeat across expanded queries and
+users) go through an LRU cache bounded by an approximate byte budget instead of
+an entry count.
+"""
+import re
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+
+import numpy as np
+from numpy.typing import NDArray
+
+TOKEN_PATTERN = re.compile(r"[a-záàảãạăắằẳẵặâấầẩẫậéèẻẽẹêếềểễệíìỉĩịóòỏõọôốồổỗộơớờởỡợúùủũụưứừửữựýỳỷỹỵđ]+")
+
+
+class Tokenizer:
+    """Lowercasing regex tokenizer with a byte-budgeted cache for short texts.
+
+    Instances are callable (``tokenizer(text)``) and picklable; the cache is
+    dropped when pickled, so worker processes start with an empty one.
+
+    Args:
+        max_cached_chars: Texts longer than this bypass the cache
+        cache_budget_bytes: Approximate memory held by cached texts and tokens, 0 disables the cache
+    """
+
+    def __init__(self, max_cached_chars: int = 512, cache_budget_bytes: int = 4 * 1024 * 1024) -> None:
+        self.max_cached_chars = max_cached_chars
+        self.cache_budget_bytes = cache_budget_bytes
+
+        self._cache: OrderedDict[str, tuple[str, ...]] = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, text: str) -> tuple[str, ...]:
+        return self.tokenize(text)
+
+    def tokenize(self, text: str) -> tuple[str, ...]:
+        if len(text) > self.max_cached_chars or self.cache_budget_bytes <= 0:
+            return tuple(TOKEN_PATTERN.findall(text.lower()))
+
+        # Lock-free hit path: single OrderedDict operations are atomic under the GIL
+        tokens = self._cache.get(text)
+        if tokens is not None:
+            self.hits += 1
+            try:
+                self._cache.move_to_end(text)
+            except KeyError:  # evicted by another thread in between
+                pass
+            return tokens
+
+        tokens = tuple(TOKEN_PATTERN.findall(text.lower()))
+        self._store(text, tokens)
+
+        return tokens
+
+    def token_ids(self, text: str, vocab) -> NDArray[np.int64]:
+        """Term ids of every token in order, ``-1`` for out-of-vocabulary tokens.
+
+        ``vocab`` is a ``TermTable`` or ``HashingVocab``.
+        """
+        return vocab.lookup(self.tokenize(text))
+
+    def batch_token_ids(self, texts: Sequence[str], vocab) -> tuple[NDArray[np.int64], NDArray[np.int64]]:
+        """CSR ``(indptr, token_ids)`` of a batch, looked up in a single ``vocab.lookup`` call."""
+        tokenized = [self.tokenize(text) for text in texts]
+        lengths = np.fromiter((len(tokens) for tokens in tokenized), dtype=np.int64, count=len(tokenized))
+
+        indptr = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        token_ids = vocab.lookup([token for tokens in tokenized for token in tokens])
+
+        return indptr, token_ids
+
+    @property
+    def cache_bytes(self) -> int:
+        return self._cache_bytes
+
+    def cache_info(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._cache),
+            "bytes": self._cache_bytes,
+            "budget_bytes": self.cache_budget_bytes,
+        }
+
+    def cache_clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._cache_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def _store(self, text: str, tokens: tuple[str, ...]) -> None:
+        size = _entry_size(text, tokens)
+
+        with self._lock:
+            self.misses += 1
+            if text in self._cache or size > self.cache_budget_bytes:
+                return
+
+            self._cache[text] = tokens
+            self._cache_bytes += size
+
+            while self._cache_bytes > self.cache_budget_bytes:
+                evicted_text, evicted_tokens = self._cache.popitem(last=False)
+                self._cache_bytes -= _entry_size(evicted_text, evicted_tokens)
+
+    def __getstate__(self) -> dict:
+        return {"max_cached_chars": self.max_cached_chars, "cache_budget_bytes": self.cache_budget_bytes}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+
+def _entry_size(text: str, tokens: tuple[str, ...]) -> int:
+    return sys.getsizeof(text) + sys.getsizeof(tokens) + sum(sys.getsizeof(token) for token in tokens)
+
+
+default_tokenizer = Tokenizer()
@@ -0,0 +1,121 @@
+"""Concurrent model warmup for API startup.
+
+The embedding model, the cross-encoder and the active sparse encoder load in
+parallel threads (each singleton class has its own construction lock) and
+run one dummy input through a forward pass, so the first request pays
+neither the load nor the lazy initialisation of the runtime. ``ModelWarmup``
+keeps each model's state and logs its cold-start time. Readiness is read from
+the models actually loaded, so it holds whether they were loaded by the warmup
+or by the first requests.
+"""
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from loguru import logger
+
+from llm_engineering.application.networks.cross_encoder import CrossEncoderModelSingleton
+from llm_engineering.application.networks.embedding import EmbeddingModelSingleton
+from llm_engineering.application.networks.sparse_embedding import get_sparse_encoder, sparse_encoder_registry
+
+WARMUP_QUERY = "Quy định về thời giờ làm việc?"
+WARMUP_TEXT = "Điều 1. Phạm vi điều chỉnh"
+
+
+def _warm_embedding() -> tuple[float, float]:
+    start = time.perf_counter()
+    model = EmbeddingModelSingleton()
+    loaded = time.perf_counter()
+    model.encode_batch([WARMUP_QUERY])
+    return loaded - start, time.perf_counter() - loaded
+
+
+def _warm_cross_encoder() -> tuple[float, float]:
+    start = time.perf_counter()
+    model = CrossEncoderModelSingleton()
+    loaded = time.perf_counter()
+    model([(WARMUP_QUERY, WARMUP_TEXT)])
+    return loaded - start, time.perf_counter() - loaded
+
+
+def _warm_sparse_encoder(algorithm: str) -> tuple[float, float]:
+    start = time.perf_counter()
+    encoder = get_sparse_encoder(algorithm)
+    loaded = time.perf_counter()
+    encoder.encode_queries([WARMUP_QUERY])
+    return loaded - start, time.perf_counter() - loaded
+
+
+class ModelWarmup:
+    """Loads and warms up the serving models concurrently.
+
+    Args:
+        sparse_algorithm: Sparse encoder to warm up, None to skip it
+    """
+
+    def __init__(self, sparse_algorithm: str | None = None) -> None:
+        self._tasks: dict[str, Callable[[], tuple[float, float]]] = {
+            "embedding": _warm_embedding,
+            "cross_encoder": _warm_cross_encoder,
+        }
+        self._loaded: dict[str, Callable[[], bool]] = {
+            "embedding": lambda: EmbeddingModelSingleton.instance() is not None,
+            "cross_encoder": lambda: CrossEncoderModelSingleton.instance() is not None,
+        }
+        if sparse_algorithm:
+            self._tasks["sparse_encoder"] = partial(_warm_sparse_encoder, sparse_algorithm)
+            self._loaded["sparse_encoder"] = partial(sparse_encoder_registry.is_loaded, sparse_algorithm)
+
+        self._lock = threading.Lock()
+        self._models = {
+            name: {"status": "pending", "load_seconds": None, "forward_seconds": None, "error": None}
+            for name in self._tasks
+        }
+        self._seconds: float | None = None
+
+    def run(self) -> dict:
+        """Warm up every model, one thread each; returns ``status()``."""
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(self._tasks), thread_name_prefix="warmup") as executor:
+            for future in [executor.submit(self._warm, name, task) for name, task in self._tasks.items()]:
+                future.result()
+
+        with self._lock:
+            self._seconds = time.perf_counter() - start
+        logger.info(f"Cold start finished in {self._seconds:.2f}s: {'ready' if self.ready else 'not ready'}")
+
+        return self.status()
+
+    def _warm(self, name: str, task: Callable[[], tuple[float, float]]) -> None:
+        with self._lock:
+            self._models[name]["status"] = "loading"
+
+        try:
+            load_seconds, forward_seconds = task()
+        except Exception as e:
+            logger.error(f"Warmup of {name} failed: {e}")
+            with self._lock:
+                self._models[name].update(status="failed", error=str(e))
+            return
+
+        with self._lock:
+            self._models[name].update(status="ready", load_seconds=load_seconds, forward_seconds=forward_seconds)
+        logger.info(f"Cold start of {name}: loaded in {load_seconds:.2f}s, first forward pass {forward_seconds * 1000:.0f} ms")
+
+    @property
+    def ready(self) -> bool:
+        return self.status()["ready"]
+
+    def status(self) -> dict:
+        """Every model is ready once it is loaded and not in the middle of its warmup forward pass."""
+        with self._lock:
+            models = {name: {**model, "loaded": self._loaded[name]()} for name, model in self._models.items()}
+            seconds = self._seconds
+
+        return {
+            "ready": all(model["loaded"] and model["status"] != "loading" for model in models.values()),
+            "seconds": seconds,
+            "models": models,
+        }
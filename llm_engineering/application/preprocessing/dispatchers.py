@@ -1,7 +1,9 @@
 """Preprocessing dispatchers for legal documents
 Simplified version without Factory pattern since we only have one document type.
 """
+import numpy as np
 from loguru import logger
+from numpy.typing import NDArray
 
 from llm_engineering.domain.documents import Document
 from llm_engineering.domain.cleaned_documents import CleanedDocument
@@ -57,6 +59,10 @@ class EmbeddingDispatcher:
         embedded = self._legal_handler.embed_batch(chunks)
         return embedded
 
+    def embed_chunks_array(self, chunks: list[Chunk]) -> tuple[list[EmbeddedChunk], NDArray[np.float32]]:
+        """Embedded chunks without ``embedding``, plus their dense vectors as one float32 array."""
+        return self._legal_handler.embed_batch_array(chunks)
+
     def embed_query(self, query: Query, use_sparse: bool = True) -> EmbeddedQuery:
         embedded = self._query_handler.embed(query, use_sparse=use_sparse)
         logger.info("Query embedded", query_id=str(query.id), use_sparse=use_sparse)
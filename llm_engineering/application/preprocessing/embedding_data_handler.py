@@ -1,8 +1,14 @@
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar, cast
+from typing import Generic, TypeVar
+
+import numpy as np
+from numpy.typing import NDArray
 
 from llm_engineering import settings
 from llm_engineering.application.networks import EmbeddingModelSingleton, get_sparse_encoder
+from llm_engineering.application.networks.embedding_cache import get_embedding_cache
+from llm_engineering.application.networks.embedding_pool import EmbeddingProcessPool, get_embedding_pool
+from llm_engineering.application.networks.query_embedding_cache import get_query_embedding_cache
 from llm_engineering.domain.chunks import Chunk
 from llm_engineering.domain.embedded_chunks import EmbeddedChunk
 from llm_engineering.domain.queries import EmbeddedQuery, Query
@@ -12,7 +18,26 @@ from loguru import logger
 ChunkT = TypeVar("ChunkT", bound=Chunk)
 EmbeddedChunkT = TypeVar("EmbeddedChunkT", bound=EmbeddedChunk)
 
-embedding_model = EmbeddingModelSingleton()
+def _get_embedding_model() -> EmbeddingModelSingleton:
+    # Loaded on first use rather than at import, so importing the handlers never blocks on the model
+    return EmbeddingModelSingleton()
+
+def _embedding_metadata(pool: EmbeddingProcessPool | None = None) -> dict:
+    if pool is not None:
+        # The workers hold the model: the parent never loads a copy of its own
+        info = pool.model_info
+        return {
+            "embedding_model_id": info["model_id"],
+            "embedding_size": info["embedding_size"],
+            "max_input_length": info["max_input_length"],
+        }
+
+    embedding_model = _get_embedding_model()
+    return {
+        "embedding_model_id": embedding_model.model_id,
+        "embedding_size": embedding_model.embedding_size,
+        "max_input_length": embedding_model.max_input_length,
+    }
 
 def _get_sparse_encoder():
     return get_sparse_encoder(algorithm=settings.SPARSE_ALGORITHM)
@@ -24,46 +49,131 @@ class EmbeddingDataHandler(ABC, Generic[ChunkT, EmbeddedChunkT]):
         return self.embed_batch([data_model], use_sparse=use_sparse)[0]
 
     def embed_batch(self, data_models: list[ChunkT], use_sparse: bool = True) -> list[EmbeddedChunkT]:
+        embeddings, sparse_embeddings, sparse_model_version = self._embed(data_models, use_sparse)
+
+        embedded_chunks = [
+            self.map_model(data_model, embedding, sparse_emb, sparse_model_version=sparse_model_version)
+            for data_model, embedding, sparse_emb in zip(data_models, embeddings.tolist(), sparse_embeddings, strict=False)
+        ]
+
+        return embedded_chunks
+
+    def embed_batch_array(
+        self, data_models: list[ChunkT], use_sparse: bool = True
+    ) -> tuple[list[EmbeddedChunkT], NDArray[np.float32]]:
+        """Embedded models without ``embedding``, plus their dense vectors as one ``(n, dim)`` float32 array.
+
+        The vectors are never turned into Python lists and validated float by
+        float; ``VectorBaseDocument.bulk_insert`` takes the array as is.
+        """
+        embeddings, sparse_embeddings, sparse_model_version = self._embed(data_models, use_sparse)
+
+        embedded_chunks = [
+            self.map_model(data_model, None, sparse_emb, sparse_model_version=sparse_model_version)
+            for data_model, sparse_emb in zip(data_models, sparse_embeddings, strict=True)
+        ]
+
+        return embedded_chunks, embeddings
+
+    def _embed(
+        self, data_models: list[ChunkT], use_sparse: bool
+    ) -> tuple[NDArray[np.float32], list[dict | None], str | None]:
+        """Dense vectors, sparse vectors and the version of the sparse encoder that produced them."""
         embedding_model_input = [model.content for model in data_models]
-        embeddings = embedding_model(embedding_model_input, to_list=True)
+        embeddings = self.embed_dense(embedding_model_input)
 
         if use_sparse:
             sparse_encoder = _get_sparse_encoder()  # Lazy load
-            sparse_embeddings = sparse_encoder.encode(embedding_model_input)
-            if not isinstance(sparse_embeddings, list):
-                sparse_embeddings = [sparse_embeddings]
+            sparse_embeddings = self.encode_sparse(sparse_encoder, embedding_model_input)
+            # Taken from the instance that encoded: a hot reload may swap the active encoder meanwhile
+            sparse_model_version = sparse_encoder.version
         else:
             sparse_embeddings = [None] * len(data_models)
+            sparse_model_version = None
 
-        embedded_chunks = [
-            self.map_model(data_model, cast(list[float], embedding), sparse_emb)
-            for data_model, embedding, sparse_emb in zip(data_models, embeddings, sparse_embeddings, strict=False)
-        ]
+        return embeddings, sparse_embeddings, sparse_model_version
 
-        return embedded_chunks
+    def embed_dense(self, texts: list[str]) -> NDArray[np.float32]:
+        return _get_embedding_model()(texts, to_list=False)
+
+    def encode_sparse(self, sparse_encoder, texts: list[str]) -> list[dict]:
+        sparse_embeddings = sparse_encoder.encode(texts)
+        if not isinstance(sparse_embeddings, list):
+            sparse_embeddings = [sparse_embeddings]
+        return sparse_embeddings
 
     @abstractmethod
-    def map_model(self, data_model: ChunkT, embedding: list[float], sparse_embedding: dict | None) -> EmbeddedChunkT:
+    def map_model(
+        self,
+        data_model: ChunkT,
+        embedding: list[float] | None,
+        sparse_embedding: dict | None,
+        sparse_model_version: str | None = None,
+    ) -> EmbeddedChunkT:
         pass
 
 
 class QueryEmbeddingHandler(EmbeddingDataHandler):
-    def map_model(self, data_model: Query, embedding: list[float], sparse_embedding: dict | None) -> EmbeddedQuery:
+    def embed_dense(self, texts: list[str]) -> NDArray[np.float32]:
+        cache = get_query_embedding_cache()
+        if cache is None:
+            return self._embed_dense_uncached(texts)
+
+        embeddings = cache.get_or_compute("dense", _get_embedding_model().variant_id, texts, self._embed_dense_uncached)
+        return np.stack(embeddings)
+
+    def _embed_dense_uncached(self, texts: list[str]) -> NDArray[np.float32]:
+        # Each retriever thread embeds one query: let the batcher merge concurrent ones
+        if not settings.QUERY_EMBEDDING_BATCHING:
+            return super().embed_dense(texts)
+        return np.stack(_get_embedding_model().query_batcher.map(texts))
+
+    def encode_sparse(self, sparse_encoder, texts: list[str]) -> list[dict]:
+        cache = get_query_embedding_cache()
+        if cache is None:
+            return sparse_encoder.encode_queries(texts)
+
+        # Models fitted in-process have no version yet: fall back to the instance
+        model_version = f"{sparse_encoder.name}:{sparse_encoder.version or id(sparse_encoder)}"
+        return cache.get_or_compute("sparse", model_version, texts, sparse_encoder.encode_queries)
+
+    def map_model(
+        self,
+        data_model: Query,
+        embedding: list[float],
+        sparse_embedding: dict | None,
+        sparse_model_version: str | None = None,
+    ) -> EmbeddedQuery:
         return EmbeddedQuery(
             id=data_model.id,
             content=data_model.content,
             embedding=embedding,
             sparse_embedding=sparse_embedding,
-            metadata={
-                "embedding_model_id": embedding_model.model_id,
-                "embedding_size": embedding_model.embedding_size,
-                "max_input_length": embedding_model.max_input_length,
-            },
+            metadata={**_embedding_metadata(), "sparse_model_version": sparse_model_version},
         )
 
 
 class LegalEmbeddingHandler(EmbeddingDataHandler):
-    def map_model(self, data_model: Chunk, embedding: list[float], sparse_embedding: dict | None) -> EmbeddedChunk:
+    def embed_dense(self, texts: list[str]) -> NDArray[np.float32]:
+        # Chunk lengths vary widely: batch by token length so little compute goes to padding
+        pool = get_embedding_pool()
+        encoder = pool if pool is not None else _get_embedding_model()
+
+        cache = get_embedding_cache()
+        if cache is None:
+            return encoder.encode_bucketed(texts)
+
+        # Chunks mostly repeat between feature engineering runs: only encode the new ones
+        variant_id = pool.model_info["variant_id"] if pool is not None else encoder.variant_id
+        return cache.get_or_compute(variant_id, texts, encoder.encode_bucketed)
+
+    def map_model(
+        self,
+        data_model: Chunk,
+        embedding: list[float] | None,
+        sparse_embedding: dict | None,
+        sparse_model_version: str | None = None,
+    ) -> EmbeddedChunk:
         return EmbeddedChunk(
             id=data_model.id,
             content=data_model.content,
@@ -75,9 +185,5 @@ class LegalEmbeddingHandler(EmbeddingDataHandler):
             document_type=data_model.document_type,
             link=data_model.link,
             field=data_model.field,
-            metadata={
-                "embedding_model_id": embedding_model.model_id,
-                "embedding_size": embedding_model.embedding_size,
-                "max_input_length": embedding_model.max_input_length,
-            },
+            metadata=_embedding_metadata(get_embedding_pool()),
         )
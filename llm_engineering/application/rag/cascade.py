@@ -0,0 +1,135 @@
+"""Cheap first stage in front of the cross-encoder.
+
+Candidates of all expanded queries are ranked by a cheap score (cosine with
+the query embeddings, or the fused rank when some candidates have no dense
+vector). Only the top N go to the cross-encoder. N covers every candidate
+whose cheap score is within a margin of the k-th best one. It is capped by
+the latency budget of the request divided by the measured cross-encoder cost
+per pair, and it is never below ``k``.
+"""
+import threading
+
+import numpy as np
+from loguru import logger
+from numpy.typing import NDArray
+
+from llm_engineering.domain.embedded_chunks import EmbeddedChunk
+from llm_engineering.settings import settings
+
+
+class RerankCascade:
+    """Picks the candidates worth a cross-encoder pass.
+
+    Args:
+        min_candidates: Candidates always reranked (at least ``k``)
+        margin: Candidates within this fraction of the cheap-score range below the k-th best are kept
+        latency_budget_ms: Default reranking budget of a request, None for no cap
+        smoothing: Weight of the latest measurement in the moving average of the cost per pair
+    """
+
+    def __init__(
+        self,
+        min_candidates: int = 5,
+        margin: float = 0.25,
+        latency_budget_ms: float | None = None,
+        smoothing: float = 0.2,
+    ) -> None:
+        self.min_candidates = min_candidates
+        self.margin = margin
+        self.latency_budget_ms = latency_budget_ms
+        self.smoothing = smoothing
+
+        self._lock = threading.Lock()
+        self._ms_per_pair: float | None = None
+        self.requests = 0
+        self.candidates = 0
+        self.pairs = 0
+        self.budget_capped = 0
+
+    def budget(self, cheap_scores: NDArray[np.float32], k: int, latency_budget_ms: float | None = None) -> int:
+        """How many of the candidates, best cheap score first, to send to the cross-encoder."""
+        num_candidates = len(cheap_scores)
+        if num_candidates <= k:
+            return num_candidates
+
+        ranked = np.sort(cheap_scores)[::-1]
+        spread = ranked[0] - ranked[-1]
+        normalized = (ranked - ranked[-1]) / spread if spread > 0 else np.ones_like(ranked)
+        within_margin = int(np.count_nonzero(normalized >= normalized[k - 1] - self.margin))
+        n = max(within_margin, self.min_candidates, k)
+
+        latency_budget_ms = latency_budget_ms if latency_budget_ms is not None else self.latency_budget_ms
+        ms_per_pair = self._ms_per_pair
+        if latency_budget_ms is not None and ms_per_pair:
+            affordable = max(int(latency_budget_ms / ms_per_pair), k)
+            if affordable < n:
+                n = affordable
+                with self._lock:
+                    self.budget_capped += 1
+
+        return min(n, num_candidates)
+
+    def select(
+        self,
+        chunks: list[EmbeddedChunk],
+        cheap_scores: NDArray[np.float32],
+        k: int,
+        latency_budget_ms: float | None = None,
+    ) -> list[EmbeddedChunk]:
+        """The ``budget`` best candidates by cheap score, best first."""
+        n = self.budget(cheap_scores, k, latency_budget_ms=latency_budget_ms)
+        order = np.argsort(-cheap_scores, kind="stable")[:n]
+
+        with self._lock:
+            self.requests += 1
+            self.candidates += len(chunks)
+            self.pairs += n
+
+        logger.info(f"Rerank cascade: {n} of {len(chunks)} candidates sent to the cross-encoder")
+
+        return [chunks[i] for i in order]
+
+    def observe(self, num_pairs: int, seconds: float) -> None:
+        """Record how long the cross-encoder took for ``num_pairs`` pairs."""
+        if num_pairs == 0:
+            return
+
+        ms_per_pair = seconds * 1000 / num_pairs
+        with self._lock:
+            if self._ms_per_pair is None:
+                self._ms_per_pair = ms_per_pair
+            else:
+                self._ms_per_pair += self.smoothing * (ms_per_pair - self._ms_per_pair)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "candidates": self.candidates,
+                "pairs": self.pairs,
+                "mean_pairs_per_request": self.pairs / self.requests if self.requests else 0.0,
+                "pairs_skipped_rate": 1 - self.pairs / self.candidates if self.candidates else 0.0,
+                "budget_capped": self.budget_capped,
+                "ms_per_pair": self._ms_per_pair,
+            }
+
+
+_rerank_cascade: RerankCascade | None = None
+_rerank_cascade_lock = threading.Lock()
+
+
+def get_rerank_cascade() -> RerankCascade | None:
+    """Process-wide cascade configured from settings, ``None`` when disabled."""
+    global _rerank_cascade
+
+    if not settings.RERANK_CASCADE_ENABLED:
+        return None
+
+    with _rerank_cascade_lock:
+        if _rerank_cascade is None:
+            _rerank_cascade = RerankCascade(
+                min_candidates=settings.RERANK_CASCADE_MIN_CANDIDATES,
+                margin=settings.RERANK_CASCADE_MARGIN,
+                latency_budget_ms=settings.RERANK_LATENCY_BUDGET_MS,
+            )
+        return _rerank_cascade
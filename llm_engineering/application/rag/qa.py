@@ -1,6 +1,10 @@
+from loguru import logger
+
 from llm_engineering.application.rag.retriever import ContextRetriever
 from llm_engineering.domain.embedded_chunks import EmbeddedChunk
+from llm_engineering.domain.queries import EmbeddedQuery
 from llm_engineering.infrastructure.llm.cohere_client import CohereLLMClient
+from llm_engineering.settings import settings
 
 
 class CohereInference:
@@ -14,14 +18,12 @@ class CohereInference:
         k: int = 3,
         temperature: float = 0.3,
         use_sparse: bool = True,
-        expand_to_n_queries: int = 3
+        expand_to_n_queries: int = 3,
+        rerank_budget_ms: float | None = None,
     ) -> dict:
-        documents = self.retriever.search(
-            query,
-            k=k,
-            use_sparse=use_sparse,
-            expand_to_n_queries=expand_to_n_queries
-        )
+        searches = self.retriever.retrieve(query, k=k, expand_to_n_queries=expand_to_n_queries, use_sparse=use_sparse)
+        documents = self.retriever.rank(query, searches, k=k, rerank_budget_ms=rerank_budget_ms)
+        sparse_model_version = self._sparse_model_version(searches) if use_sparse else None
         context = EmbeddedChunk.to_context(documents)
 
         prompt = f"""Dựa vào ngữ cảnh sau để trả lời câu hỏi.
@@ -49,5 +51,25 @@ class CohereInference:
         return {
             "answer": answer,
             "sources": sources,
-            "metadata": {"query": query, "k": k, "temperature": temperature}
+            "metadata": {
+                "query": query,
+                "k": k,
+                "temperature": temperature,
+                "sparse_algorithm": settings.SPARSE_ALGORITHM if use_sparse else None,
+                "sparse_model_version": sparse_model_version,
+            }
         }
+
+    @staticmethod
+    def _sparse_model_version(searches: list[tuple[EmbeddedQuery, list[EmbeddedChunk]]]) -> str | None:
+        """Version of the sparse encoder that encoded the expanded queries of this search."""
+        versions = sorted({
+            embedded_query.metadata.get("sparse_model_version")
+            for embedded_query, _ in searches
+            if embedded_query.sparse_embedding
+        } - {None})
+        if len(versions) > 1:
+            # A hot reload landed between the expanded queries
+            logger.warning(f"Expanded queries were encoded by several sparse model versions: {versions}")
+
+        return ", ".join(versions) if versions else None
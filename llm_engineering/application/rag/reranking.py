@@ -1,21 +1,33 @@
+import time
+
+from llm_engineering.application.networks.chunk_token_cache import get_chunk_token_cache
 from llm_engineering.application.networks.cross_encoder import CrossEncoderModelSingleton
 from llm_engineering.application.rag.base import RAGStep
+from llm_engineering.application.rag.cascade import get_rerank_cascade
+from llm_engineering.application.rag.score_cache import get_rerank_score_cache
 from llm_engineering.domain.embedded_chunks import EmbeddedChunk
 from llm_engineering.domain.queries import Query
+from llm_engineering.settings import settings
 
 
 class Reranker(RAGStep):
     def __init__(self, mock: bool = False) -> None:
         super().__init__(mock=mock)
 
-        self._model = CrossEncoderModelSingleton()
+    @property
+    def _model(self) -> CrossEncoderModelSingleton:
+        # Loaded on first use (or by the API's warmup), not when the retriever is built
+        return CrossEncoderModelSingleton()
 
     def generate(self, query: Query, chunks: list[EmbeddedChunk], top_k: int) -> list[EmbeddedChunk]:
         if self._mock:
             return chunks
 
-        query_doc_tuples = [(query.content, chunk.content) for chunk in chunks]
-        scores = self._model(query_doc_tuples)
+        score_cache = get_rerank_score_cache()
+        if score_cache is None:
+            scores = self._score_chunks(query.content, chunks)
+        else:
+            scores = score_cache.score(self._model.variant_id, query.content, chunks, self._score_chunks)
 
         scored_query_doc_tuples = list(zip(scores, chunks, strict=False))
         scored_query_doc_tuples.sort(key=lambda x: x[0], reverse=True)
@@ -23,4 +35,31 @@ class Reranker(RAGStep):
         reranked_documents = scored_query_doc_tuples[:top_k]
         reranked_documents = [doc for _, doc in reranked_documents]
 
-        return reranked_documents
\ No newline at end of file
+        return reranked_documents
+
+    def _score_chunks(self, query: str, chunks: list[EmbeddedChunk]) -> list[float]:
+        token_cache = get_chunk_token_cache() if self._model.supports_token_ids else None
+        if token_cache is None:
+            pairs = [(query, chunk.content) for chunk in chunks]
+        else:
+            # Chunk texts do not change once indexed: only the query is tokenized per request
+            query_ids = self._model.tokenize([query])[0]
+            chunk_ids = token_cache.token_ids(self._model.model_id, chunks, self._model.tokenize)
+            pairs = [(query_ids, ids) for ids in chunk_ids]
+
+        # The cascade's cost per pair covers forward passes only: no cached scores, tokenization or queueing
+        cascade = get_rerank_cascade()
+
+        # Concurrent /rag requests share forward passes instead of competing for cores
+        if settings.RERANK_BATCHING:
+            batcher = self._model.rerank_batcher
+            if cascade is not None:
+                batcher.add_batch_listener(cascade.observe)
+            return batcher.submit_many(pairs).result()
+
+        start = time.perf_counter()
+        scores = self._model(pairs) if token_cache is None else self._model.score_token_ids(pairs).tolist()
+        if cascade is not None:
+            cascade.observe(len(pairs), time.perf_counter() - start)
+
+        return scores
@@ -1,14 +1,24 @@
 from loguru import logger
 import concurrent.futures
+
+import numpy as np
+from numpy.typing import NDArray
 from qdrant_client.models import FieldCondition, Filter, MatchValue
 
+from llm_engineering.application.rag.cascade import get_rerank_cascade
 from llm_engineering.application.rag.query_expansion import QueryExpansion
 from llm_engineering.application.rag.reranking import Reranker
 from llm_engineering.application.rag.self_query import SelfQuery
 from llm_engineering.application.preprocessing.dispatchers import EmbeddingDispatcher
 from llm_engineering.domain.queries import EmbeddedQuery, Query
-from llm_engineering.application import utils
+from llm_engineering.application.networks import get_sparse_encoder
+from llm_engineering.application.networks.sparse_encoder import InvertedIndex
 from llm_engineering.domain.embedded_chunks import EmbeddedChunk
+from llm_engineering.settings import settings
+
+# Sparse hits fetched per requested chunk when metadata filters run after the local index lookup
+SPARSE_FILTER_OVERFETCH = 4
+RRF_K = 60
 
 
 class ContextRetriever:
@@ -17,14 +27,88 @@ class ContextRetriever:
         self._metadata_extractor = SelfQuery(mock=mock)
         self._reranker = Reranker(mock=mock)
         self._embedding_dispatcher = EmbeddingDispatcher()
+        self._sparse_index = self._load_sparse_index()
+        self._stale_sparse_versions: tuple[str, str] | None = None
+
+    @staticmethod
+    def _load_sparse_index() -> InvertedIndex | None:
+        if settings.SPARSE_RETRIEVAL_BACKEND != "local":
+            return None
+
+        try:
+            sparse_index = InvertedIndex.load(settings.SPARSE_INDEX_PATH)
+        except FileNotFoundError:
+            logger.warning(f"No local sparse index at {settings.SPARSE_INDEX_PATH}, using Qdrant for sparse search")
+            return None
+
+        logger.info(
+            f"Loaded local sparse index with {len(sparse_index)} chunks from {settings.SPARSE_INDEX_PATH}"
+            f" (encoder version {sparse_index.encoder_version or 'unknown'})"
+        )
+        return sparse_index
+
+    def _usable_sparse_index(self) -> InvertedIndex | None:
+        """The local sparse index, or None when it was built with another version of the active sparse encoder."""
+        if self._sparse_index is None:
+            return None
+
+        # Checked on every search so that a registry swap is picked up; the encoder lookup is cached
+        index_version = self._sparse_index.encoder_version
+        encoder_version = get_sparse_encoder(settings.SPARSE_ALGORITHM).version
+        if index_version == encoder_version:
+            return self._sparse_index
+
+        if self._stale_sparse_versions != (index_version, encoder_version):
+            self._stale_sparse_versions = (index_version, encoder_version)
+            logger.warning(
+                f"Local sparse index was built with encoder version {index_version or 'unknown'}"
+                f" but the active encoder is {encoder_version}, using Qdrant for sparse search"
+            )
+        return None
 
     def search(
         self,
         query: str,
         k: int = 3,
         expand_to_n_queries: int = 3,
-        use_sparse: bool = True
+        use_sparse: bool = True,
+        rerank_budget_ms: float | None = None,
     ) -> list:
+        searches = self.retrieve(query, k=k, expand_to_n_queries=expand_to_n_queries, use_sparse=use_sparse)
+
+        return self.rank(query, searches, k=k, rerank_budget_ms=rerank_budget_ms)
+
+    def rank(
+        self,
+        query: str,
+        searches: list[tuple[EmbeddedQuery, list[EmbeddedChunk]]],
+        k: int = 3,
+        rerank_budget_ms: float | None = None,
+    ) -> list[EmbeddedChunk]:
+        """The ``k`` best results of ``retrieve``, reranked by the cross-encoder."""
+        n_k_documents = self.candidates(searches)
+
+        logger.info(f"{len(n_k_documents)} documents retrieved successfully")
+
+        if len(n_k_documents) == 0:
+            return []
+
+        cascade = get_rerank_cascade()
+        if cascade is not None:
+            n_k_documents = cascade.select(
+                n_k_documents, self.cheap_scores(searches, n_k_documents), k, latency_budget_ms=rerank_budget_ms
+            )
+
+        return self.rerank(query, chunks=n_k_documents, keep_top_k=k)
+
+    def retrieve(
+        self,
+        query: str,
+        k: int = 3,
+        expand_to_n_queries: int = 3,
+        use_sparse: bool = True
+    ) -> list[tuple[EmbeddedQuery, list[EmbeddedChunk]]]:
+        """Each expanded query with its ranked results, before deduplication and reranking."""
         query_model = Query.from_str(query)
         query_model = self._metadata_extractor.generate(query_model)
 
@@ -40,20 +124,30 @@ class ContextRetriever:
                 self._search, _query_model, k, use_sparse) for _query_model in n_generated_queries
             ]
 
-            n_k_documents = [task.result() for task in concurrent.futures.as_completed(search_tasks)]
-            n_k_documents = utils.misc.flatten(n_k_documents)
-            n_k_documents = list(set(n_k_documents))
+            return [task.result() for task in search_tasks]
 
-        logger.info(f"{len(n_k_documents)} documents retrieved successfully")
+    @staticmethod
+    def candidates(searches: list[tuple[EmbeddedQuery, list[EmbeddedChunk]]]) -> list[EmbeddedChunk]:
+        """Results of all expanded queries, deduplicated."""
+        return list(dict.fromkeys(chunk for _, results in searches for chunk in results))
 
-        if len(n_k_documents) > 0:
-            k_documents = self.rerank(query, chunks=n_k_documents, keep_top_k=k)
-        else:
-            k_documents = []
+    @staticmethod
+    def cheap_scores(
+        searches: list[tuple[EmbeddedQuery, list[EmbeddedChunk]]], candidates: list[EmbeddedChunk]
+    ) -> NDArray[np.float32]:
+        """Best cosine of each candidate with the expanded queries, or its fused rank if a dense vector is missing."""
+        # Local sparse hits are fetched without vectors
+        if all(chunk.embedding is not None for chunk in candidates):
+            queries = np.asarray([embedded_query.embedding for embedded_query, _ in searches], dtype=np.float32)
+            vectors = np.asarray([chunk.embedding for chunk in candidates], dtype=np.float32)
+            queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+            return (vectors @ queries.T).max(axis=1)
 
-        return k_documents
+        scores = _rrf_scores([results for _, results in searches])
+        return np.asarray([scores[chunk] for chunk in candidates], dtype=np.float32)
 
-    def _search(self, query: Query, k: int = 3, use_sparse: bool = True) -> list[EmbeddedChunk]:
+    def _search(self, query: Query, k: int = 3, use_sparse: bool = True) -> tuple[EmbeddedQuery, list[EmbeddedChunk]]:
         assert k >= 3, "k should be >= 3"
 
         # Embed query using EmbeddingDispatcher
@@ -62,44 +156,67 @@ class ContextRetriever:
         # Build Qdrant filters from metadata
         query_filter = self._build_filter(query.metadata)
 
+        search_results = self._run_search(embedded_query, limit=k // 3, query_filter=query_filter)
+
+        # FALLBACK: If filter returns 0 chunks, retry without filter
+        if len(search_results) == 0 and query_filter is not None:
+            logger.warning(f"Metadata filter returned 0 chunks, retrying without filter")
+            search_results = self._run_search(embedded_query, limit=k // 3, query_filter=None)
+
+        logger.info(
+            f"Found {len(search_results)} chunks for query",
+        )
+
+        return embedded_query, search_results
+
+    def _run_search(self, embedded_query: EmbeddedQuery, limit: int, query_filter: Filter | None) -> list[EmbeddedChunk]:
         # Use hybrid search if sparse embedding available
+        if embedded_query.sparse_embedding and self._usable_sparse_index() is not None:
+            return self._local_hybrid_search(embedded_query, limit=limit, query_filter=query_filter)
+
         if embedded_query.sparse_embedding:
-            search_results = EmbeddedChunk.hybrid_search(
+            return EmbeddedChunk.hybrid_search(
                 query_vector=embedded_query.embedding,
                 sparse_query_vector=embedded_query.sparse_embedding,
-                limit=k // 3,
-                query_filter=query_filter
-            )
-        else:
-            # Fallback to dense-only search
-            search_results = EmbeddedChunk.search(
-                query_vector=embedded_query.embedding,
-                limit=k // 3,
+                limit=limit,
                 query_filter=query_filter
             )
 
-        # FALLBACK: If filter returns 0 chunks, retry without filter
-        if len(search_results) == 0 and query_filter is not None:
-            logger.warning(f"Metadata filter returned 0 chunks, retrying without filter")
-            if embedded_query.sparse_embedding:
-                search_results = EmbeddedChunk.hybrid_search(
-                    query_vector=embedded_query.embedding,
-                    sparse_query_vector=embedded_query.sparse_embedding,
-                    limit=k // 3,
-                    query_filter=None
-                )
-            else:
-                search_results = EmbeddedChunk.search(
-                    query_vector=embedded_query.embedding,
-                    limit=k // 3,
-                    query_filter=None
-                )
+        # Fallback to dense-only search
+        return EmbeddedChunk.search(
+            query_vector=embedded_query.embedding,
+            limit=limit,
+            query_filter=query_filter
+        )
 
-        logger.info(
-            f"Found {len(search_results)} chunks for query",
+    def _local_hybrid_search(
+        self, embedded_query: EmbeddedQuery, limit: int, query_filter: Filter | None
+    ) -> list[EmbeddedChunk]:
+        """Dense search in Qdrant, sparse search in the in-process index, fused with RRF."""
+        dense_results = EmbeddedChunk.search(
+            query_vector=embedded_query.embedding,
+            limit=limit,
+            query_filter=query_filter
+        )
+
+        # The local index has no payloads, so metadata filters are applied after fetching the hits
+        sparse_limit = limit if query_filter is None else limit * SPARSE_FILTER_OVERFETCH
+        hits = self._sparse_index.search(
+            embedded_query.sparse_embedding["indices"],
+            embedded_query.sparse_embedding["values"],
+            k=sparse_limit,
         )
+        sparse_results = EmbeddedChunk.bulk_retrieve([doc_id for doc_id, _ in hits])
+        sparse_results = [chunk for chunk in sparse_results if self._matches_filter(chunk, query_filter)][:limit]
 
-        return search_results
+        return _reciprocal_rank_fusion([sparse_results, dense_results], limit=limit)
+
+    @staticmethod
+    def _matches_filter(chunk: EmbeddedChunk, query_filter: Filter | None) -> bool:
+        if query_filter is None:
+            return True
+
+        return all(getattr(chunk, condition.key, None) == condition.match.value for condition in query_filter.must)
 
     def _build_filter(self, metadata: dict | None) -> Filter | None:
 
@@ -143,3 +260,18 @@ class ContextRetriever:
         logger.info(f"{len(reranked_documents)} documents reranked successfully.")
 
         return reranked_documents
+
+
+def _rrf_scores(result_lists: list[list[EmbeddedChunk]]) -> dict[EmbeddedChunk, float]:
+    scores: dict[EmbeddedChunk, float] = {}
+    for results in result_lists:
+        for rank, chunk in enumerate(results):
+            scores[chunk] = scores.get(chunk, 0.0) + 1.0 / (RRF_K + rank + 1)
+
+    return scores
+
+
+def _reciprocal_rank_fusion(result_lists: list[list[EmbeddedChunk]], limit: int) -> list[EmbeddedChunk]:
+    scores = _rrf_scores(result_lists)
+
+    return sorted(scores, key=scores.__getitem__, reverse=True)[:limit]
@@ -0,0 +1,119 @@
+"""In-process cache of cross-encoder scores.
+
+Repeated questions, and expanded queries retrieving the same chunks again,
+reuse the scores of (query, chunk) pairs already seen. Keys hold the
+normalised query, the chunk id and a CRC32 of the chunk text, since chunk ids
+are derived from the document and chunk position and survive re-ingestion of
+an edited document. A different reranker model id drops every entry.
+"""
+import threading
+import zlib
+from collections.abc import Callable, Sequence
+
+from loguru import logger
+
+from llm_engineering.application.networks.query_embedding_cache import normalize_query
+from llm_engineering.application.utils.ttl_cache import TTLCache
+from llm_engineering.domain.embedded_chunks import EmbeddedChunk
+from llm_engineering.settings import settings
+
+
+class RerankScoreCache:
+    """LRU/TTL cache of scores keyed by ``(normalised query, chunk id, chunk text CRC32)``.
+
+    Args:
+        max_entries: Scores kept
+        ttl_seconds: Maximum age of a score, None keeps it until evicted
+    """
+
+    def __init__(self, max_entries: int = 100_000, ttl_seconds: float | None = None) -> None:
+        self._cache: TTLCache[tuple[str, str, int], float] = TTLCache(max_entries, ttl_seconds=ttl_seconds)
+        self._model_id: str | None = None
+        self._model_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def score(
+        self,
+        model_id: str,
+        query: str,
+        chunks: Sequence[EmbeddedChunk],
+        score_chunks: Callable[[str, list[EmbeddedChunk]], Sequence[float]],
+    ) -> list[float]:
+        """Scores of ``query`` against ``chunks``, sending only the uncached chunks to ``score_chunks``, in one batch.
+
+        Queries that only differ in whitespace or Unicode normalisation share cached scores.
+        """
+        self._check_model(model_id)
+
+        # Normalised for the key only: the model scores the query as given, cached or not
+        normalized = normalize_query(query)
+        keys = [(normalized, str(chunk.id), zlib.crc32(chunk.content.encode("utf-8"))) for chunk in chunks]
+        scores = [self._cache.get(key) for key in keys]
+
+        missing = {key: chunk for key, chunk, score in zip(keys, chunks, scores) if score is None}
+        with self._stats_lock:
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            computed = score_chunks(query, list(missing.values()))
+            if len(computed) != len(missing):
+                raise ValueError(f"Reranker returned {len(computed)} scores for {len(missing)} pairs")
+
+            by_key = dict(zip(missing, (float(score) for score in computed)))
+            for key, score in by_key.items():
+                self._cache.put(key, score)
+            scores = [by_key[key] if score is None else score for key, score in zip(keys, scores)]
+
+        logger.debug(f"Rerank scores: {len(keys) - len(missing)} of {len(keys)} pairs cached")
+
+        return scores
+
+    def _check_model(self, model_id: str) -> None:
+        with self._model_lock:
+            previous, self._model_id = self._model_id, model_id
+
+        if previous is not None and previous != model_id:
+            self._cache.clear()
+            logger.info(f"Reranker model changed ({previous} -> {model_id}), dropped cached scores")
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        cache_stats = self._cache.stats()
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": cache_stats["entries"],
+                "max_entries": cache_stats["max_entries"],
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": cache_stats["evictions"],
+                "expirations": cache_stats["expirations"],
+                "invalidations": cache_stats["invalidations"],
+                "model_id": self._model_id,
+            }
+
+
+_rerank_score_cache: RerankScoreCache | None = None
+_rerank_score_cache_lock = threading.Lock()
+
+
+def get_rerank_score_cache() -> RerankScoreCache | None:
+    """Process-wide cache configured from settings, ``None`` when disabled."""
+    global _rerank_score_cache
+
+    if not settings.RERANK_SCORE_CACHE_ENABLED:
+        return None
+
+    with _rerank_score_cache_lock:
+        if _rerank_score_cache is None:
+            _rerank_score_cache = RerankScoreCache(
+                max_entries=settings.RERANK_SCORE_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.RERANK_SCORE_CACHE_TTL_SECONDS,
+            )
+        return _rerank_score_cache
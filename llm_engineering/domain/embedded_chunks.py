@@ -18,6 +18,22 @@ class EmbeddedChunk(VectorBaseDocument):
         use_vector_index = True
         use_sparse_vector_index = True
 
+        # Dense index and storage (None keeps Qdrant's defaults, see VectorBaseDocument.get_vector_params)
+        quantization = None  # "scalar" (int8, 4x less RAM) or "binary" (32x less, needs rescoring)
+        quantization_quantile = None  # scalar only, e.g. 0.99: clip outliers when computing the int8 range
+        quantization_always_ram = True
+        quantization_rescore = True
+        quantization_oversampling = None  # e.g. 2.0: fetch 2x limit candidates by quantized score, rescore them
+        hnsw_m = None
+        hnsw_ef_construct = None
+        hnsw_ef = None  # search-time beam width
+        on_disk_vectors = None
+        on_disk_payload = None
+
+        # Sparse index (datatype falls back to settings.SPARSE_VECTOR_DATATYPE)
+        sparse_datatype = None
+        sparse_on_disk = None
+
     @classmethod
     def to_context(cls, chunks: list["EmbeddedChunk"]) -> str:
         context = ""
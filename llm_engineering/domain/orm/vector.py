@@ -8,14 +8,36 @@ from llm_engineering.application.networks.embedding import EmbeddingModelSinglet
 from loguru import logger
 
 from qdrant_client.http import exceptions
-from qdrant_client.http.models import Distance, VectorParams, SparseVectorParams, Modifier, Fusion
-from qdrant_client.models import PointStruct, Record, SparseVector, FusionQuery
+from qdrant_client.http.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    CollectionParamsDiff,
+    Datatype,
+    Distance,
+    Fusion,
+    HnswConfigDiff,
+    Modifier,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    SparseIndexParams,
+    SparseVectorParams,
+    VectorParams,
+    VectorParamsDiff,
+)
+from numpy.typing import NDArray
+from qdrant_client.models import Batch, PointStruct, Record, SparseVector, FusionQuery
 
 from llm_engineering.infrastructure.db.qdrant import connection
 from llm_engineering.domain.exceptions import ImproperlyConfigured
+from llm_engineering.settings import settings
 
 T = TypeVar("T", bound="VectorBaseDocument")
 
+QUANTIZATIONS = ("scalar", "binary")
+
 class VectorBaseDocument(BaseModel, Generic[T], ABC):
     id: UUID4 = Field(default_factory=uuid.uuid4)
 
@@ -87,9 +109,40 @@ class VectorBaseDocument(BaseModel, Generic[T], ABC):
         return item
 
     @classmethod
-    def bulk_insert(cls: Type[T], documents: list["VectorBaseDocument"]) -> bool:
+    def to_batch(cls: Type[T], documents: list[T], vectors: NDArray[np.float32]) -> Batch:
+        """Column-oriented points of ``documents``, whose dense vectors are the rows of ``vectors``.
+
+        Payloads are dumped without the vector fields and the array is converted
+        to lists once, at the serialisation boundary, instead of going through
+        ``embedding: list[float]`` and one ``PointStruct`` per document.
+        """
+        if len(documents) != len(vectors):
+            raise ValueError(f"Got {len(vectors)} vectors for {len(documents)} documents")
+
+        ids = [str(document.id) for document in documents]
+        payloads = [document.model_dump(exclude={"id", "embedding", "sparse_embedding"}) for document in documents]
+        dense = np.asarray(vectors, dtype=np.float32).tolist()
+
+        if cls.get_use_sparse_vector_index():
+            sparse = [
+                SparseVector(
+                    indices=document.sparse_embedding.get("indices", []) if document.sparse_embedding else [],
+                    values=document.sparse_embedding.get("values", []) if document.sparse_embedding else [],
+                )
+                for document in documents
+            ]
+            batch_vectors = {"dense": dense, "text": sparse}
+        else:
+            batch_vectors = dense
+
+        # Built from trusted values: skip pydantic re-validating every float
+        return Batch.model_construct(ids=ids, vectors=batch_vectors, payloads=payloads)
+
+    @classmethod
+    def bulk_insert(cls: Type[T], documents: list["VectorBaseDocument"], vectors: NDArray[np.float32] | None = None) -> bool:
+        """Upsert ``documents``; with ``vectors`` their dense vectors are taken from the array rows instead of ``embedding``."""
         try:
-            cls._bulk_insert(documents)
+            cls._bulk_insert(documents, vectors)
         except exceptions.UnexpectedResponse:
             logger.info(
                 f"Collection '{cls.get_collection_name()}' does not exist. "
@@ -97,7 +150,7 @@ class VectorBaseDocument(BaseModel, Generic[T], ABC):
             )
             cls.create_collection()
             try:
-                cls._bulk_insert(documents)
+                cls._bulk_insert(documents, vectors)
             except exceptions.UnexpectedResponse:
                 logger.error(f"Failed to insert documents in '{cls.get_collection_name()}'.")
                 return False
@@ -105,25 +158,16 @@ class VectorBaseDocument(BaseModel, Generic[T], ABC):
 
     @classmethod
     def create_collection(cls: Type[T]) -> bool:
+        """Create the collection with the vector, quantization and storage settings declared in ``Config``."""
         collection_name = cls.get_collection_name()
         use_vector_index = cls.get_use_vector_index()
         use_sparse_vector_index = cls.get_use_sparse_vector_index()
 
         if use_sparse_vector_index is True:
-            vectors_config = {
-                "dense": VectorParams(
-                    size=EmbeddingModelSingleton().embedding_size,
-                    distance=Distance.COSINE
-                )
-            }
-
-            sparse_vectors_config = {"text": SparseVectorParams(modifier=Modifier.IDF)}
-
+            vectors_config = {"dense": cls.get_vector_params()}
+            sparse_vectors_config = {"text": cls.get_sparse_vector_params()}
         elif use_vector_index is True:
-            vectors_config = VectorParams(
-                size=EmbeddingModelSingleton().embedding_size,
-                distance=Distance.COSINE
-            )
+            vectors_config = cls.get_vector_params()
             sparse_vectors_config = None
         else:
             vectors_config = {}
@@ -132,9 +176,113 @@ class VectorBaseDocument(BaseModel, Generic[T], ABC):
         return connection.create_collection(
             collection_name=collection_name,
             vectors_config=vectors_config,
-            sparse_vectors_config=sparse_vectors_config
+            sparse_vectors_config=sparse_vectors_config,
+            on_disk_payload=cls._get_config("on_disk_payload"),
+        )
+
+    @classmethod
+    def get_vector_params(cls: Type[T]) -> VectorParams:
+        """Dense vector params from ``Config``: ``hnsw_m``, ``hnsw_ef_construct``, ``on_disk_vectors`` and ``quantization``.
+
+        Unset options keep Qdrant's defaults (float32 vectors in RAM, ``m=16``, ``ef_construct=100``).
+        """
+        hnsw_m = cls._get_config("hnsw_m")
+        hnsw_ef_construct = cls._get_config("hnsw_ef_construct")
+        hnsw_config = None
+        if hnsw_m is not None or hnsw_ef_construct is not None:
+            hnsw_config = HnswConfigDiff(m=hnsw_m, ef_construct=hnsw_ef_construct)
+
+        return VectorParams(
+            size=EmbeddingModelSingleton().embedding_size,
+            distance=Distance.COSINE,
+            hnsw_config=hnsw_config,
+            quantization_config=cls.get_quantization_config(),
+            on_disk=cls._get_config("on_disk_vectors"),
         )
 
+    @classmethod
+    def get_quantization_config(cls: Type[T]) -> ScalarQuantization | BinaryQuantization | None:
+        """``Config.quantization``: ``"scalar"`` (int8, 4x smaller) or ``"binary"`` (1 bit per dimension, 32x smaller).
+
+        The quantized copy is kept in RAM unless ``quantization_always_ram`` is False; with
+        ``on_disk_vectors`` the original vectors are then only read from disk for rescoring.
+        """
+        quantization = cls._get_config("quantization")
+        always_ram = cls._get_config("quantization_always_ram", True)
+
+        if quantization is None:
+            return None
+        if quantization == "scalar":
+            return ScalarQuantization(
+                scalar=ScalarQuantizationConfig(
+                    type=ScalarType.INT8,
+                    quantile=cls._get_config("quantization_quantile"),
+                    always_ram=always_ram,
+                )
+            )
+        if quantization == "binary":
+            return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=always_ram))
+
+        raise ImproperlyConfigured(f"Unknown quantization '{quantization}' for {cls.__name__}. Use one of {QUANTIZATIONS}.")
+
+    @classmethod
+    def get_sparse_vector_params(cls: Type[T]) -> SparseVectorParams:
+        """Sparse vector params from ``Config``: ``sparse_datatype`` (else ``settings.SPARSE_VECTOR_DATATYPE``) and ``sparse_on_disk``."""
+        # Stores sparse weights in 2 (float16) or 1 (uint8) bytes instead of 4
+        datatype = cls._get_config("sparse_datatype", settings.SPARSE_VECTOR_DATATYPE)
+        on_disk = cls._get_config("sparse_on_disk")
+
+        sparse_index = None
+        if datatype or on_disk is not None:
+            sparse_index = SparseIndexParams(datatype=Datatype(datatype) if datatype else None, on_disk=on_disk)
+
+        return SparseVectorParams(modifier=Modifier.IDF, index=sparse_index)
+
+    @classmethod
+    def get_search_params(cls: Type[T]) -> SearchParams | None:
+        """Dense search params from ``Config``: ``hnsw_ef`` and, with quantization, ``quantization_rescore`` and ``quantization_oversampling``."""
+        hnsw_ef = cls._get_config("hnsw_ef")
+        quantization = None
+        if cls._get_config("quantization") is not None:
+            quantization = QuantizationSearchParams(
+                rescore=cls._get_config("quantization_rescore", True),
+                oversampling=cls._get_config("quantization_oversampling"),
+            )
+
+        if hnsw_ef is None and quantization is None:
+            return None
+        return SearchParams(hnsw_ef=hnsw_ef, quantization=quantization)
+
+    @classmethod
+    def update_collection(cls: Type[T]) -> bool:
+        """Apply ``Config``'s quantization, HNSW and on-disk settings to an existing collection.
+
+        Qdrant rebuilds the affected indexes in the background; the sparse datatype
+        cannot be changed on an existing collection.
+        """
+        dense_params = cls.get_vector_params()
+        vector_diff = VectorParamsDiff(
+            hnsw_config=dense_params.hnsw_config,
+            quantization_config=dense_params.quantization_config,
+            on_disk=dense_params.on_disk,
+        )
+        vectors_config = {"dense": vector_diff} if cls.get_use_sparse_vector_index() else {"": vector_diff}
+
+        on_disk_payload = cls._get_config("on_disk_payload")
+        return connection.update_collection(
+            collection_name=cls.get_collection_name(),
+            vectors_config=vectors_config,
+            collection_params=CollectionParamsDiff(on_disk_payload=on_disk_payload) if on_disk_payload is not None else None,
+        )
+
+    @classmethod
+    def _get_config(cls: Type[T], name: str, default: Any = None) -> Any:
+        if not hasattr(cls, "Config"):
+            return default
+        # Config attributes declared as None are unset: they must not shadow a settings fallback
+        value = getattr(cls.Config, name, None)
+        return default if value is None else value
+
     @classmethod
     def get_use_vector_index(cls: Type[T]) -> bool:
         if not hasattr(cls, "Config") or not hasattr(cls.Config, "use_vector_index"):
@@ -148,8 +296,11 @@ class VectorBaseDocument(BaseModel, Generic[T], ABC):
         return cls.Config.use_sparse_vector_index
 
     @classmethod
-    def _bulk_insert(cls: Type[T], documents):
-        points = [doc.to_point() for doc in documents]
+    def _bulk_insert(cls: Type[T], documents, vectors: NDArray[np.float32] | None = None):
+        if vectors is not None:
+            points = cls.to_batch(documents, vectors)
+        else:
+            points = [doc.to_point() for doc in documents]
         connection.upsert(collection_name=cls.get_collection_name(), points=points)
 
     @classmethod
@@ -191,6 +342,29 @@ class VectorBaseDocument(BaseModel, Generic[T], ABC):
             next_offset = UUID(next_offset, version=4)
         return documents, next_offset
 
+    @classmethod
+    def bulk_retrieve(cls: Type[T], ids: list[str], **kwargs) -> list[T]:
+        try:
+            documents = cls._bulk_retrieve(ids=ids, **kwargs)
+        except exceptions.UnexpectedResponse:
+            logger.error(f"Failed to retrieve documents from '{cls.get_collection_name()}'.")
+            documents = []
+        return documents
+
+    @classmethod
+    def _bulk_retrieve(cls: Type[T], ids: list[str], **kwargs) -> list[T]:
+        records = connection.retrieve(
+            collection_name=cls.get_collection_name(),
+            ids=ids,
+            with_payload=kwargs.pop("with_payload", True),
+            with_vectors=kwargs.pop("with_vectors", False),
+            **kwargs,
+        )
+
+        # Qdrant does not keep the request order, callers rely on it for ranked ids
+        documents_by_id = {str(record.id): cls.from_record(record) for record in records}
+        return [documents_by_id[_id] for _id in ids if _id in documents_by_id]
+
     @classmethod
     def search(cls: Type[T], query_vector: list, limit: int = 10, **kwargs) -> list[T]:
         try:
@@ -237,6 +411,10 @@ class VectorBaseDocument(BaseModel, Generic[T], ABC):
         if use_sparse:
             query_params["using"] = "dense"
 
+        search_params = kwargs.pop("search_params", cls.get_search_params())
+        if search_params is not None:
+            query_params["search_params"] = search_params
+
         if query_filter is not None:
             query_params["filter"] = query_filter
 
@@ -252,6 +430,7 @@ class VectorBaseDocument(BaseModel, Generic[T], ABC):
         collection_name = cls.get_collection_name()
         needs_vectors = hasattr(cls, 'model_fields') and 'embedding' in cls.model_fields
         query_filter = kwargs.pop("query_filter", None)
+        search_params = kwargs.pop("search_params", cls.get_search_params())
 
         records = connection.query_points(
             collection_name=collection_name,
@@ -269,7 +448,8 @@ class VectorBaseDocument(BaseModel, Generic[T], ABC):
                     query=query_vector,
                     using="dense",
                     limit=limit,
-                    filter=query_filter
+                    filter=query_filter,
+                    params=search_params,
                 )
             ],
             query=FusionQuery(fusion=Fusion.RRF),
@@ -1,13 +1,27 @@
 from typing import Optional
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
+import secrets
+import threading
 import traceback
+from pathlib import Path
 from loguru import logger
 
+from llm_engineering.application.networks import EmbeddingModelSingleton, sparse_encoder_registry
+from llm_engineering.application.networks.chunk_token_cache import get_chunk_token_cache
+from llm_engineering.application.networks.cross_encoder import CrossEncoderModelSingleton
+from llm_engineering.application.networks.query_embedding_cache import get_query_embedding_cache
+from llm_engineering.application.networks.sparse_encoder.reloader import SparseModelWatcher
+from llm_engineering.application.networks.sparse_encoder.storage import is_array_model
+from llm_engineering.application.networks.warmup import ModelWarmup
 from llm_engineering.application.rag.qa import CohereInference
+from llm_engineering.application.rag.cascade import get_rerank_cascade
+from llm_engineering.application.rag.score_cache import get_rerank_score_cache
 from llm_engineering.application.evaluation.llm_judge import LLMJudge
 from llm_engineering.domain.evaluation import JudgmentScore
 from llm_engineering.infrastructure.openapi_config import apply_custom_openapi
+from llm_engineering.settings import settings
 
 app = FastAPI(title="Legal Q&A API")
 
@@ -17,6 +31,7 @@ class QueryRequest(BaseModel):
     temperature: float = Field(0.3, ge=0.0, le=1.0)
     use_sparse: bool = Field(True, description="Enable hybrid search with sparse embeddings")
     expand_to_n_queries: int = Field(3, ge=1, le=5, description="Number of expanded queries")
+    rerank_budget_ms: float | None = Field(None, gt=0, description="Reranking latency budget when the rerank cascade is enabled")
 
 class EvaluateRequest(BaseModel):
     query: str
@@ -38,15 +53,136 @@ class QueryResponse(BaseModel):
     sources: list[SourceInfo]
     metadata: dict
 
+class ReloadRequest(BaseModel):
+    model_path: str | None = Field(None, description="Switch to this model directory (under models/), defaults to reloading the active one")
+    allow_vocabulary_change: bool = Field(False, description="Accept a model that changes active term ids (re-index the collection)")
+
+class SparseModelInfo(BaseModel):
+    algorithm: str
+    version: str
+    model_path: str
+
 qa_service = CohereInference(mock=False)
 llm_judge = LLMJudge()
 
 app = apply_custom_openapi(app)
 
+sparse_model_watcher = (
+    SparseModelWatcher(sparse_encoder_registry, settings.SPARSE_ALGORITHM, interval=settings.SPARSE_MODEL_WATCH_INTERVAL)
+    if settings.SPARSE_MODEL_WATCH_INTERVAL
+    else None
+)
+
+model_warmup = ModelWarmup(sparse_algorithm=settings.SPARSE_ALGORITHM)
+
+@app.on_event("startup")
+def start_model_warmup():
+    # In the background: "/" answers at once, "/ready" once every model has served a forward pass
+    if settings.WARMUP_ON_STARTUP:
+        threading.Thread(target=model_warmup.run, name="model-warmup", daemon=True).start()
+
+@app.on_event("startup")
+def start_sparse_model_watcher():
+    if sparse_model_watcher is not None:
+        sparse_model_watcher.start()
+
+@app.on_event("shutdown")
+def stop_sparse_model_watcher():
+    if sparse_model_watcher is not None:
+        sparse_model_watcher.stop()
+
+def _check_admin_token(token: str | None) -> None:
+    # Fail closed: without a configured token the admin endpoints are disabled
+    if not settings.ADMIN_API_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled, set ADMIN_API_TOKEN")
+    if token is None or not secrets.compare_digest(token, settings.ADMIN_API_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+def _resolve_sparse_model_path(model_path: str | None) -> str:
+    """Requested (or active) model directory, only accepted under models/ and in the array format."""
+    if model_path is None:
+        model_path = sparse_encoder_registry.active(settings.SPARSE_ALGORITHM).model_path
+
+    models_dir = Path(settings.SPARSE_MODEL_PATH).parent
+    resolved = Path(model_path).resolve()
+    if not resolved.is_relative_to(models_dir):
+        raise HTTPException(status_code=422, detail=f"Model path must be under {models_dir}")
+    # Never unpickle from the API: legacy .pkl models have to be converted first
+    if not is_array_model(resolved):
+        raise HTTPException(status_code=422, detail=f"No array-format model directory at {resolved}")
+
+    return str(resolved)
+
+def _sparse_model_info() -> SparseModelInfo:
+    encoder = sparse_encoder_registry.active(settings.SPARSE_ALGORITHM)
+    return SparseModelInfo(algorithm=encoder.name, version=encoder.version, model_path=encoder.model_path)
+
 @app.get("/")
 def health_check():
     return {"status": "ok"}
 
+@app.get("/ready")
+def readiness_check():
+    # From the models actually loaded: without the warmup the first requests load them
+    status = model_warmup.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+@app.get("/admin/sparse-model", response_model=SparseModelInfo)
+def sparse_model_endpoint(x_admin_token: str | None = Header(None)):
+    _check_admin_token(x_admin_token)
+    return _sparse_model_info()
+
+@app.get("/admin/metrics")
+def metrics_endpoint(x_admin_token: str | None = Header(None)):
+    _check_admin_token(x_admin_token)
+    query_embedding_cache = get_query_embedding_cache()
+    rerank_score_cache = get_rerank_score_cache()
+    rerank_token_cache = get_chunk_token_cache()
+    rerank_cascade = get_rerank_cascade()
+    # Only models already loaded: constructing them here would block the endpoint on the load
+    embedding_model = EmbeddingModelSingleton.instance()
+    cross_encoder = CrossEncoderModelSingleton.instance()
+    return {
+        "query_embedding_batcher": embedding_model.query_batcher.stats() if embedding_model is not None else None,
+        "query_embedding_cache": query_embedding_cache.stats() if query_embedding_cache is not None else None,
+        "rerank_batcher": cross_encoder.rerank_batcher.stats() if cross_encoder is not None else None,
+        "rerank_cascade": rerank_cascade.stats() if rerank_cascade is not None else None,
+        "rerank_score_cache": rerank_score_cache.stats() if rerank_score_cache is not None else None,
+        "rerank_token_cache": rerank_token_cache.stats() if rerank_token_cache is not None else None,
+    }
+
+@app.post("/admin/caches/clear")
+def clear_caches_endpoint(x_admin_token: str | None = Header(None)):
+    # After re-ingesting the collection: cached query encodings and scores may refer to the old index
+    _check_admin_token(x_admin_token)
+    cleared = []
+    caches = (
+        ("query_embedding_cache", get_query_embedding_cache()),
+        ("rerank_score_cache", get_rerank_score_cache()),
+        ("rerank_token_cache", get_chunk_token_cache()),
+    )
+    for name, cache in caches:
+        if cache is not None:
+            cache.clear()
+            cleared.append(name)
+    logger.info(f"Cleared {', '.join(cleared) or 'no caches'}")
+    return {"cleared": cleared}
+
+@app.post("/admin/sparse-model/reload", response_model=SparseModelInfo)
+def reload_sparse_model_endpoint(request: ReloadRequest, x_admin_token: str | None = Header(None)):
+    # Sync endpoint: the load runs in the threadpool while other requests keep using the current model
+    _check_admin_token(x_admin_token)
+    model_path = _resolve_sparse_model_path(request.model_path)
+    try:
+        sparse_encoder_registry.reload(
+            settings.SPARSE_ALGORITHM, model_path=model_path, allow_vocabulary_change=request.allow_vocabulary_change
+        )
+    except (ValueError, FileNotFoundError) as e:
+        logger.error(f"Sparse model reload rejected: {str(e)}")
+        raise HTTPException(status_code=422, detail=str(e)) from e
+
+    return _sparse_model_info()
+
 @app.post("/rag", response_model=QueryResponse)
 def rag_endpoint(request: QueryRequest):
     try:
@@ -55,7 +191,8 @@ def rag_endpoint(request: QueryRequest):
             k=request.k,
             temperature=request.temperature,
             use_sparse=request.use_sparse,
-            expand_to_n_queries=request.expand_to_n_queries
+            expand_to_n_queries=request.expand_to_n_queries,
+            rerank_budget_ms=request.rerank_budget_ms,
         )
         return QueryResponse(
             answer=result["answer"],
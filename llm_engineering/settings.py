@@ -16,6 +16,75 @@ class Settings(BaseSettings):
     RERANKING_CROSS_ENCODER_MODEL_ID: str = "cross-encoder/ms-marco-MiniLM-L-4-v2"
     RAG_MODEL_DEVICE: str = "cpu"
 
+    # "torch" or "onnx" (ONNX Runtime on CPU, needs the onnx extra); the ONNX export is written once to EMBEDDING_ONNX_DIR
+    EMBEDDING_BACKEND: str = "torch"
+    # Dynamic int8 quantization of the ONNX model for this CPU: "avx512_vnni", "avx512", "avx2" or "arm64"
+    EMBEDDING_ONNX_QUANTIZATION: str | None = None
+    EMBEDDING_ONNX_INTRA_OP_THREADS: int | None = None
+    EMBEDDING_ONNX_INTER_OP_THREADS: int | None = None
+
+    @property
+    def EMBEDDING_ONNX_DIR(self) -> str:
+        """Return absolute path to the directory of exported ONNX embedding models."""
+        project_root = Path(__file__).parent.parent
+        return str((project_root / "models/onnx").resolve())
+
+    # Chunks are embedded in length-sorted batches of at most this many padded tokens (batch size x longest chunk)
+    EMBEDDING_MAX_BATCH_TOKENS: int = 8192
+    EMBEDDING_MAX_BATCH_SIZE: int = 64
+    # Worker processes embedding chunks during feature engineering (1 = in-process); threads per worker
+    # default to the CPU count split evenly between them
+    EMBEDDING_NUM_WORKERS: int = 1
+    EMBEDDING_WORKER_THREADS: int | None = None
+
+    # Concurrent query embeddings are batched on one inference thread (disable to call the model per request)
+    QUERY_EMBEDDING_BATCHING: bool = True
+    QUERY_EMBEDDING_MAX_BATCH_SIZE: int = 32
+    QUERY_EMBEDDING_MAX_WAIT_MS: float = 2.0
+
+    # In-process LRU cache of query encodings keyed by normalised text and model version
+    QUERY_EMBEDDING_CACHE_ENABLED: bool = True
+    QUERY_EMBEDDING_CACHE_MAX_ENTRIES: int = 10_000
+    QUERY_EMBEDDING_CACHE_TTL_SECONDS: float | None = 3600.0
+
+    # Cross-encoder on "torch" or "onnx" (int8 with RERANKER_ONNX_QUANTIZATION, exported next to the embedding model)
+    RERANKER_BACKEND: str = "torch"
+    RERANKER_ONNX_QUANTIZATION: str | None = None
+    RERANKER_ONNX_INTRA_OP_THREADS: int | None = None
+    RERANKER_ONNX_INTER_OP_THREADS: int | None = None
+
+    # Pairs of concurrent rerank requests are batched on one inference thread (disable to call the model per request)
+    RERANK_BATCHING: bool = True
+    RERANK_MAX_BATCH_SIZE: int = 64
+    RERANK_MAX_WAIT_MS: float = 2.0
+
+    # Cascade: rank candidates by cosine (or fused rank) and send only the promising ones to the cross-encoder,
+    # at least max(k, RERANK_CASCADE_MIN_CANDIDATES) and at most what RERANK_LATENCY_BUDGET_MS affords
+    RERANK_CASCADE_ENABLED: bool = False
+    RERANK_CASCADE_MIN_CANDIDATES: int = 5
+    RERANK_CASCADE_MARGIN: float = 0.25
+    RERANK_LATENCY_BUDGET_MS: float | None = 100.0
+
+    # In-process LRU cache of the cross-encoder's chunk token ids, so reranking only tokenizes the query (torch backend only)
+    RERANK_TOKEN_CACHE_ENABLED: bool = True
+    RERANK_TOKEN_CACHE_MAX_ENTRIES: int = 50_000
+
+    # In-process LRU cache of cross-encoder scores keyed by normalised query, chunk id and chunk text checksum
+    RERANK_SCORE_CACHE_ENABLED: bool = True
+    RERANK_SCORE_CACHE_MAX_ENTRIES: int = 100_000
+    RERANK_SCORE_CACHE_TTL_SECONDS: float | None = 3600.0
+
+    # On-disk cache of chunk embeddings keyed by (model id, sha256 of the text)
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_DTYPE: str = "float32"  # or "float16", half the size
+    EMBEDDING_CACHE_MAX_MB: int | None = 2048
+
+    @property
+    def EMBEDDING_CACHE_PATH(self) -> str:
+        """Return absolute path to the SQLite embedding cache."""
+        project_root = Path(__file__).parent.parent
+        return str((project_root / "models/embedding_cache.sqlite").resolve())
+
     # Hugging face
     HF_TOKEN: str | None = None
     HF_REPO_ID: str | None = None
@@ -24,13 +93,40 @@ class Settings(BaseSettings):
     COHERE_MODEL_ID: str = "command-r-08-2024"
     COHERE_API_KEY: str | None = None
 
+    # "bm25" / "tfidf" (fitted model) or "stateless_bm25" (hashed term frequencies, IDF left to Qdrant)
     SPARSE_ALGORITHM: str = "bm25"
 
     @property
     def SPARSE_MODEL_PATH(self) -> str:
-        """Return absolute path to sparse model."""
+        """Return absolute path to the sparse model directory (memory-mapped array format)."""
+        project_root = Path(__file__).parent.parent
+        return str((project_root / f"models/sparse_{self.SPARSE_ALGORITHM}_model").resolve())
+
+    # Sparse encoders kept loaded at once (per algorithm, parameters and model version)
+    SPARSE_ENCODER_CACHE_SIZE: int = 4
+    SPARSE_ENCODER_CACHE_MAX_MB: int | None = None
+    # Poll the active sparse model every N seconds and hot-reload it when retrained (None disables)
+    SPARSE_MODEL_WATCH_INTERVAL: float | None = None
+
+    # Required in the X-Admin-Token header of /admin endpoints, which are disabled while it is unset
+    ADMIN_API_TOKEN: str | None = None
+
+    # Load and warm up the embedding, reranking and sparse models concurrently when the API starts; /ready
+    # answers 200 once all of them have run a forward pass (disabled: models load on first request, and /ready
+    # answers 200 once requests have loaded all of them)
+    WARMUP_ON_STARTUP: bool = True
+
+    # Storage type of sparse weights in new Qdrant collections: None (float32), "float16" or "uint8"
+    SPARSE_VECTOR_DATATYPE: str | None = None
+
+    # "qdrant" scores sparse vectors in the collection, "local" uses the in-process inverted index
+    SPARSE_RETRIEVAL_BACKEND: str = "qdrant"
+
+    @property
+    def SPARSE_INDEX_PATH(self) -> str:
+        """Return absolute path to the local inverted index built from the sparse vectors in Qdrant."""
         project_root = Path(__file__).parent.parent
-        return str((project_root / f"models/sparse_{self.SPARSE_ALGORITHM}_model.pkl").resolve())
+        return str((project_root / f"models/sparse_{self.SPARSE_ALGORITHM}_index").resolve())
 
     # QdrantDB Vector DB
     USE_QDRANT_CLOUD: bool = False
@@ -4,15 +4,16 @@ import steps.feature_engineering as fe_steps
 @pipeline
 def feature_engineering(
     query_limit: int | None = None,
-    batch_size: int = 10,
-    sparse_model_path: str = "models/sparse_bm25_model.pkl",
+    batch_size: int = 256,
+    sparse_model_path: str = "models/sparse_bm25_model",
 ) -> None:
     """Feature engineering pipeline for Vietnamese legal documents.
 
     Args:
         query_limit: Maximum number of documents to process (None = all)
-        batch_size: Number of chunks to embed per batch
-        sparse_model_path: Path to pre-trained sparse model
+        batch_size: Number of chunks (across documents) handed to the embedder at once; they are
+            split into length-sorted batches under settings.EMBEDDING_MAX_BATCH_TOKENS
+        sparse_model_path: Path to pre-trained sparse model directory (or legacy .pkl)
     """
     # Step 1: Query raw documents from MongoDB
     raw_documents = fe_steps.query_data_warehouse(query_limit=query_limit)
@@ -21,13 +22,13 @@ def feature_engineering(
     cleaned_documents = fe_steps.clean_documents(raw_documents)
 
     # Step 3: Chunk and embed documents (always generate both dense + sparse for flexibility)
-    embedded_documents = fe_steps.chunk_and_embed(
+    embedded_documents, dense_embeddings = fe_steps.chunk_and_embed(
         cleaned_documents,
         batch_size=batch_size,
         sparse_model_path=sparse_model_path,
     )
 
     # Step 4: Load embedded chunks to Qdrant (search mode chosen at query time)
-    last_step = fe_steps.load_to_vector_db(embedded_documents)
+    last_step = fe_steps.load_to_vector_db(embedded_documents, dense_embeddings)
 
     return last_step.invocation_id
\ No newline at end of file
@@ -5,6 +5,15 @@ import steps.sparse_encoder_training as sparse_steps
 @pipeline
 def train_sparse_model(
     query_limit: int | None = None,
+    n_jobs: int = 1,
+    incremental: bool = False,
+    min_df: int = 1,
+    max_df: float = 1.0,
+    max_vocab: int | None = None,
+    n_features: int | None = None,
+    weight_mass: float | None = None,
+    min_terms: int | None = None,
+    quantization: str | None = None,
 ) -> None:
 
     raw_documents = sparse_steps.query_data_warehouse(query_limit=query_limit)
@@ -13,6 +22,15 @@ def train_sparse_model(
 
     model_info = sparse_steps.train(
         cleaned_documents,
+        n_jobs=n_jobs,
+        incremental=incremental,
+        min_df=min_df,
+        max_df=max_df,
+        max_vocab=max_vocab,
+        n_features=n_features,
+        weight_mass=weight_mass,
+        min_terms=min_terms,
+        quantization=quantization,
     )
 
     return model_info
@@ -0,0 +1,74 @@
+"""
+Build the local sparse inverted index from the sparse vectors stored in Qdrant.
+
+Usage:
+    python scripts/build_sparse_index.py [--output models/sparse_bm25_index]
+
+The index mirrors the ``text`` sparse vectors of the embedded chunks collection
+and is used by the retriever when ``SPARSE_RETRIEVAL_BACKEND=local``. Rebuild it
+after every feature engineering run.
+"""
+
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import click
+from loguru import logger
+
+from llm_engineering.application.networks import get_sparse_encoder
+from llm_engineering.application.networks.sparse_encoder import InvertedIndex
+from llm_engineering.application.networks.sparse_encoder.batch import SparseBatch
+from llm_engineering.domain.embedded_chunks import EmbeddedChunk
+from llm_engineering.infrastructure.db.qdrant import connection
+from llm_engineering.settings import settings
+
+
+def scroll_sparse_vectors(page_size: int = 1000) -> tuple[list[str], list[dict]]:
+    doc_ids, vectors = [], []
+    offset = None
+
+    while True:
+        records, offset = connection.scroll(
+            collection_name=EmbeddedChunk.get_collection_name(),
+            limit=page_size,
+            with_payload=False,
+            with_vectors=["text"],
+            offset=offset,
+        )
+        for record in records:
+            sparse_vector = record.vector.get("text") if isinstance(record.vector, dict) else None
+            if sparse_vector is None:
+                continue
+            doc_ids.append(str(record.id))
+            vectors.append({"indices": sparse_vector.indices, "values": sparse_vector.values})
+
+        if offset is None:
+            break
+
+    return doc_ids, vectors
+
+
+@click.command()
+@click.option("--output", default=None, help="Index directory (defaults to settings.SPARSE_INDEX_PATH).")
+@click.option("--page-size", default=1000, show_default=True, help="Points fetched per scroll request.")
+def main(output: str | None, page_size: int) -> None:
+    output = output or settings.SPARSE_INDEX_PATH
+
+    doc_ids, vectors = scroll_sparse_vectors(page_size=page_size)
+    logger.info(f"Fetched {len(doc_ids)} sparse vectors from '{EmbeddedChunk.get_collection_name()}'")
+
+    sparse_encoder = get_sparse_encoder(algorithm=settings.SPARSE_ALGORITHM)
+    index = InvertedIndex.build(
+        doc_ids,
+        SparseBatch.from_dicts(vectors),
+        num_terms=sparse_encoder.dim,
+        encoder_version=sparse_encoder.version,
+    )
+    index.save(output)
+
+    logger.info(f"Saved inverted index to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Convert pickled sparse encoder models to the memory-mapped array format.
+
+Usage:
+    python scripts/convert_sparse_models.py [models/sparse_bm25_model.pkl ...]
+
+Without arguments every ``models/sparse_*_model.pkl`` is converted into a
+sibling directory with the same name minus the ``.pkl`` suffix.
+"""
+
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from loguru import logger
+
+from llm_engineering.application.networks.sparse_encoder.storage import convert_pickle_model, load_model
+
+
+def _algorithm_from_path(pickle_path: Path) -> str:
+    # models/sparse_<algorithm>_model.pkl
+    return pickle_path.stem.removeprefix("sparse_").removesuffix("_model")
+
+
+def convert_models(pickle_paths: list[Path]) -> None:
+    for pickle_path in pickle_paths:
+        model_path = pickle_path.with_suffix("")
+        algorithm = _algorithm_from_path(pickle_path)
+
+        convert_pickle_model(pickle_path, model_path, algorithm=algorithm)
+        state = load_model(model_path)
+
+        logger.info(
+            f"Converted {pickle_path} -> {model_path} "
+            f"(algorithm={algorithm}, terms={len(state.vocab)}, version={state.version})"
+        )
+
+
+if __name__ == "__main__":
+    models_dir = Path(__file__).parent.parent / "models"
+    paths = [Path(arg) for arg in sys.argv[1:]] or sorted(models_dir.glob("sparse_*_model.pkl"))
+
+    if not paths:
+        logger.warning(f"No pickled sparse models found in {models_dir}")
+
+    convert_models(paths)
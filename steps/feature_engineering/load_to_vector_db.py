@@ -1,3 +1,4 @@
+import numpy as np
 from loguru import logger
 from typing_extensions import Annotated
 from zenml import step
@@ -7,16 +8,29 @@ from llm_engineering.domain.orm import VectorBaseDocument
 
 @step
 def load_to_vector_db(
-    documents: Annotated[list, "cleaned documents"]
+    documents: Annotated[list, "cleaned documents"],
+    dense_embeddings: np.ndarray | None = None,
+    batch_size: int = 256,
 ) -> Annotated[bool, 'successful']:
+    """Upsert documents into their collections, taking dense vectors from the rows of ``dense_embeddings`` when given."""
     logger.info(f"Loading {len(documents)} documents into the vector database.")
 
-    group_documents = VectorBaseDocument.group_by_class(documents)
-    for document_cls, documents in group_documents.items():
+    if dense_embeddings is not None and len(dense_embeddings) != len(documents):
+        logger.error(f"Got {len(dense_embeddings)} dense embeddings for {len(documents)} documents")
+        return False
+
+    # Positions rather than documents, so each batch can pick its rows of dense_embeddings
+    positions: dict[type[VectorBaseDocument], list[int]] = {}
+    for i, document in enumerate(documents):
+        positions.setdefault(document.__class__, []).append(i)
+
+    for document_cls, indices in positions.items():
         logger.info(f"Loading documents into {document_cls.get_collection_name()}")
-        for document_batch in utils.misc.batch(documents, size=4):
+        for batch_indices in utils.misc.batch(indices, size=batch_size):
+            document_batch = [documents[i] for i in batch_indices]
+            vectors = dense_embeddings[batch_indices] if dense_embeddings is not None else None
             try:
-                document_cls.bulk_insert(document_batch)
+                document_cls.bulk_insert(document_batch, vectors=vectors)
             except Exception as e:
                 logger.exception(f"Failed to insert documents into {document_cls.get_collection_name()}: {e}")
                 return False
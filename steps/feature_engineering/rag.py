@@ -1,10 +1,12 @@
+import numpy as np
 from typing_extensions import Annotated
 from zenml import get_step_context, step
 from tqdm.auto import tqdm
 
-from llm_engineering.application import utils
 from llm_engineering.application.preprocessing.dispatchers import ChunkingDispatcher, EmbeddingDispatcher
-from llm_engineering.application.networks import get_sparse_encoder
+from llm_engineering.application.networks import EmbeddingModelSingleton, sparse_encoder_registry
+from llm_engineering.application.networks.embedding_cache import get_embedding_cache
+from llm_engineering.application.networks.embedding_pool import get_embedding_pool, shutdown_embedding_pool
 from llm_engineering import settings
 from llm_engineering.domain.chunks import Chunk
 from llm_engineering.domain.embedded_chunks import EmbeddedChunk
@@ -13,16 +15,20 @@ from llm_engineering.domain.embedded_chunks import EmbeddedChunk
 @step
 def chunk_and_embed(
     cleaned_documents: Annotated[list, "cleaned_documents"],
-    batch_size: int = 10,
+    batch_size: int = 256,
     sparse_model_path: str | None = None,
-) -> Annotated[list, "embedded_documents"]:
+) -> tuple[Annotated[list, "embedded_documents"], Annotated[np.ndarray, "dense_embeddings"]]:
+    """Chunk and embed documents.
+
+    The chunks are returned without ``embedding``: their dense vectors are the rows
+    of ``dense_embeddings``, one float32 array stored as a single NumPy artifact.
+    """
     from loguru import logger
 
-    # Load pre-trained sparse model into global singleton instance
+    # Make the pre-trained sparse model the one the embedding handlers pick up
     if sparse_model_path:
         logger.info(f"Loading sparse model from {sparse_model_path}")
-        sparse_encoder = get_sparse_encoder(algorithm=settings.SPARSE_ALGORITHM)
-        loaded_encoder = sparse_encoder.__class__.load(sparse_model_path)
+        loaded_encoder = sparse_encoder_registry.activate(settings.SPARSE_ALGORITHM, sparse_model_path)
         logger.info(f"Loaded sparse model with vocab size: {len(loaded_encoder.vocab)}")
 
     chunking_dispatcher = ChunkingDispatcher()
@@ -32,32 +38,82 @@ def chunk_and_embed(
         "chunking": {},
         "embedding": {
             "batch_size": batch_size,
+            "max_batch_tokens": settings.EMBEDDING_MAX_BATCH_TOKENS,
+            "num_workers": settings.EMBEDDING_NUM_WORKERS,
             "sparse_model_path": sparse_model_path,
-        }
+        },
+        "failed_documents": 0,
     }
 
+    # Chunks of several documents are embedded together, so the embedder can group
+    # chunks of similar length across documents instead of padding within one
     embedded_chunks = []
+    embedding_arrays = []
+    pending_chunks: list[Chunk] = []
+    pending_documents: set = set()
+
+    def embed_pending() -> None:
+        try:
+            batch_embedded_chunks, batch_embeddings = embedding_dispatcher.embed_chunks_array(pending_chunks)
+            embedded_chunks.extend(batch_embedded_chunks)
+            embedding_arrays.append(batch_embeddings)
+        except Exception:
+            logger.exception(f"Failed to embed {len(pending_chunks)} chunks of {len(pending_documents)} documents")
+            metadata["failed_documents"] += len(pending_documents)
+        pending_chunks.clear()
+        pending_documents.clear()
+
     for document in tqdm(cleaned_documents, desc="Processing documents", unit="doc"):
         try:
             chunks = chunking_dispatcher.chunk(document)
-            metadata["chunking"] = _add_chunks_metadata(chunks, metadata["chunking"])
-
-            for batched_chunks in utils.misc.batch(chunks, batch_size):
-                batched_embedded_chunks = embedding_dispatcher.embed_chunks(batched_chunks)
-                embedded_chunks.extend(batched_embedded_chunks)
         except Exception:
             logger.exception(f"Failed to process document {document.id}")
             metadata["failed_documents"] += 1
             continue
 
+        metadata["chunking"] = _add_chunks_metadata(chunks, metadata["chunking"])
+        pending_chunks.extend(chunks)
+        pending_documents.add(document.id)
+        # Enough batches per call to keep every embedding worker busy
+        if len(pending_chunks) >= batch_size * max(1, settings.EMBEDDING_NUM_WORKERS):
+            embed_pending()
+
+    if pending_chunks:
+        embed_pending()
+
+    # Read without loading a model: with worker processes the pool did the encoding and has the counters
+    pool = get_embedding_pool()
+    embedding_model = EmbeddingModelSingleton.instance()
+    if pool is not None:
+        batching_stats = pool.bucketing_stats()
+    else:
+        batching_stats = embedding_model.bucketing_stats() if embedding_model is not None else None
+    shutdown_embedding_pool()
+
+    dense_embeddings = (
+        np.concatenate(embedding_arrays) if embedding_arrays else np.zeros((0, 0), dtype=np.float32)
+    )
+
     metadata["embedding"] = _add_embeddings_metadata(embedded_chunks, metadata["embedding"])
+    metadata["embedding"]["batching"] = batching_stats
+    if batching_stats is not None:
+        logger.info(
+            f"Dense embedding: {batching_stats['texts']} chunks in {batching_stats['batches']} batches, "
+            f"padding efficiency {batching_stats['padding_efficiency']:.1%}, "
+            f"{batching_stats['texts_per_second']:.1f} chunks/s, {batching_stats['tokens_per_second']:.0f} tokens/s"
+        )
+    embedding_cache = get_embedding_cache()
+    if embedding_cache is not None:
+        metadata["embedding"]["cache"] = embedding_cache.stats()
+        logger.info(f"Embedding cache: {embedding_cache.stats()}")
     metadata["num_chunks"] = len(embedded_chunks)
     metadata["num_embedded_chunks"] = len(embedded_chunks)
+    metadata["embedding"]["dense_embeddings_mb"] = dense_embeddings.nbytes / 1024 / 1024
 
     step_context = get_step_context()
     step_context.add_output_metadata(output_name="embedded_documents", metadata=metadata)
 
-    return embedded_chunks
+    return embedded_chunks, dense_embeddings
 
 
 def _add_chunks_metadata(chunks: list[Chunk], metadata: dict) -> dict:
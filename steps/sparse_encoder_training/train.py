@@ -1,57 +1,128 @@
+import json
+from collections.abc import Iterator
+from pathlib import Path
+
 from typing_extensions import Annotated
 from llm_engineering import settings
 from zenml import step, get_step_context
 from loguru import logger
 
 from llm_engineering.application.preprocessing.dispatchers import ChunkingDispatcher
-from llm_engineering.application.networks import get_sparse_encoder
+from llm_engineering.application.networks import create_sparse_encoder
+
+FITTED_DOCUMENTS_FILE = "fitted_documents.json"
 
 
 @step
 def train(
     cleaned_documents: Annotated[list, "cleaned_documents"],
+    n_jobs: int = 1,
+    incremental: bool = False,
+    min_df: int = 1,
+    max_df: float = 1.0,
+    max_vocab: int | None = None,
+    n_features: int | None = None,
+    weight_mass: float | None = None,
+    min_terms: int | None = None,
+    quantization: str | None = None,
 ) -> Annotated[int, "num_trained"]:
 
     algorithm = settings.SPARSE_ALGORITHM
+    model_path = settings.SPARSE_MODEL_PATH
 
-    chunking_dispatcher = ChunkingDispatcher()
+    # A private instance: fitting must not mutate encoders cached for serving.
+    # Pruning options left as None keep the ones stored with an existing model.
+    sparse_encoder = create_sparse_encoder(
+        algorithm=algorithm,
+        model_path=model_path,
+        weight_mass=weight_mass,
+        min_terms=min_terms,
+        quantization=quantization,
+    )
 
-    logger.info(f"Chunking {len(cleaned_documents)} documents for corpus...")
-    corpus = []
-    failed_count = 0
-    for document in cleaned_documents:
-        try:
-            chunks = chunking_dispatcher.chunk(document)
-            corpus.extend([chunk.content for chunk in chunks])
-        except Exception:
-            logger.exception(f"Failed to chunk document {document.id}")
-            failed_count += 1
-            continue
+    if sparse_encoder.stateless:
+        logger.info(f"{algorithm.upper()} is stateless (Qdrant maintains IDF), nothing to train")
+        return 0
 
-    logger.info(f"Collected {len(corpus)} chunks for training")
+    if incremental and sparse_encoder.df is None:
+        logger.warning("Existing sparse model has no document frequencies, falling back to a full fit")
+        incremental = False
 
-    sparse_encoder = get_sparse_encoder(algorithm=algorithm)
+    fitted_document_ids = _load_fitted_document_ids(model_path) if incremental else set()
+    documents = [document for document in cleaned_documents if str(document.id) not in fitted_document_ids]
 
-    logger.info(f"Fitting {algorithm.upper()} sparse encoder...")
-    sparse_encoder.fit(corpus)
+    chunking_dispatcher = ChunkingDispatcher()
+    corpus_info = {"corpus_size": 0, "failed_documents": 0, "document_ids": []}
+
+    logger.info(f"Streaming chunks of {len(documents)} documents into the corpus...")
+    corpus = _iter_chunk_contents(documents, chunking_dispatcher, corpus_info)
+
+    if incremental:
+        logger.info(f"Updating {algorithm.upper()} sparse encoder with {n_jobs} worker(s)...")
+        new_terms = sparse_encoder.partial_fit(corpus, n_jobs=n_jobs)
+    else:
+        logger.info(f"Fitting {algorithm.upper()} sparse encoder with {n_jobs} worker(s)...")
+        sparse_encoder.fit(
+            corpus, n_jobs=n_jobs, min_df=min_df, max_df=max_df, max_vocab=max_vocab, n_features=n_features
+        )
+        new_terms = len(sparse_encoder.vocab)
 
     vocab_size = len(sparse_encoder.vocab)
-    logger.info(f"Training complete! Vocabulary size: {vocab_size}")
+    logger.info(f"Training complete! Chunks: {corpus_info['corpus_size']}, vocabulary size: {vocab_size}")
 
-    logger.info(f"Saving model to {settings.SPARSE_MODEL_PATH}")
-    sparse_encoder.save(settings.SPARSE_MODEL_PATH)
+    logger.info(f"Saving model to {model_path}")
+    sparse_encoder.save(model_path)
+    _save_fitted_document_ids(model_path, fitted_document_ids.union(corpus_info["document_ids"]))
 
     step_context = get_step_context()
     step_context.add_output_metadata(
         output_name="num_trained",
         metadata={
             "algorithm": algorithm,
+            "incremental": incremental,
             "vocab_size": vocab_size,
-            "corpus_size": len(corpus),
-            "num_documents": len(cleaned_documents),
-            "failed_documents": failed_count,
-            "save_path": settings.SPARSE_MODEL_PATH,
+            "new_terms": new_terms,
+            "corpus_size": corpus_info["corpus_size"],
+            "num_documents": len(documents),
+            "skipped_documents": len(cleaned_documents) - len(documents),
+            "failed_documents": corpus_info["failed_documents"],
+            "n_jobs": n_jobs,
+            **sparse_encoder.vocab_params,
+            **sparse_encoder.pruning_params,
+            "save_path": model_path,
         }
     )
 
-    return len(corpus)
+    return corpus_info["corpus_size"]
+
+
+def _iter_chunk_contents(
+    cleaned_documents: list, chunking_dispatcher: ChunkingDispatcher, corpus_info: dict
+) -> Iterator[str]:
+    """Yield chunk texts one document at a time, recording chunks, failures and fitted ids in ``corpus_info``."""
+    for document in cleaned_documents:
+        try:
+            chunks = chunking_dispatcher.chunk(document)
+        except Exception:
+            logger.exception(f"Failed to chunk document {document.id}")
+            corpus_info["failed_documents"] += 1
+            continue
+
+        for chunk in chunks:
+            corpus_info["corpus_size"] += 1
+            yield chunk.content
+
+        corpus_info["document_ids"].append(str(document.id))
+
+
+def _load_fitted_document_ids(model_path: str) -> set[str]:
+    path = Path(model_path) / FITTED_DOCUMENTS_FILE
+    if not path.is_file():
+        return set()
+
+    return set(json.loads(path.read_text(encoding="utf-8")))
+
+
+def _save_fitted_document_ids(model_path: str, document_ids: set[str]) -> None:
+    path = Path(model_path) / FITTED_DOCUMENTS_FILE
+    path.write_text(json.dumps(sorted(document_ids)), encoding="utf-8")
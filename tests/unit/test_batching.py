@@ -0,0 +1,33 @@
+import numpy as np
+
+from llm_engineering.application.networks.batching import BucketingTotals, encode_token_budget_batches
+
+
+def _encode_batches(text_batches):
+    for batch in text_batches:
+        yield np.array([[float(text[1:]), 0.0] for text in batch], dtype=np.float32)
+
+
+def test_encode_token_budget_batches_keeps_input_order():
+    texts = [f"t{i}" for i in range(10)]
+    lengths = np.array([5, 1, 9, 3, 3, 7, 2, 8, 4, 6])
+
+    embeddings, batches = encode_token_budget_batches(texts, lengths, 2, _encode_batches, max_tokens=16, max_batch_size=4)
+
+    assert embeddings[:, 0].tolist() == list(range(10))
+    assert sorted(np.concatenate(batches).tolist()) == list(range(10))
+
+
+def test_bucketing_totals_count_real_and_padded_tokens():
+    totals = BucketingTotals()
+    lengths = np.array([2, 4, 3, 8])
+
+    totals.record(lengths, [np.array([0, 2, 1]), np.array([3])], seconds=0.5)
+    stats = totals.stats()
+
+    assert stats["texts"] == 4
+    assert stats["batches"] == 2
+    assert stats["tokens"] == 17
+    assert stats["padded_tokens"] == 3 * 4 + 8
+    assert stats["padding_efficiency"] == 17 / 20
+    assert stats["texts_per_second"] == 8.0
@@ -0,0 +1,32 @@
+from llm_engineering.application.rag.score_cache import RerankScoreCache
+from llm_engineering.domain.embedded_chunks import EmbeddedChunk
+
+
+def _chunk(content: str) -> EmbeddedChunk:
+    return EmbeddedChunk(
+        content=content,
+        embedding=None,
+        document_id="doc",
+        document_number="01/2024/ND-CP",
+        document_type="Nghị định",
+        link="https://example.com",
+        field="Lao động",
+    )
+
+
+def test_misses_are_scored_with_the_original_query():
+    cache = RerankScoreCache()
+    chunks = [_chunk("Điều 1"), _chunk("Điều 2")]
+    seen_queries = []
+
+    def score_chunks(query, missing):
+        seen_queries.append(query)
+        return [float(len(chunk.content)) for chunk in missing]
+
+    query = "  Thời giờ   làm việc?\n"
+    assert cache.score("model", query, chunks, score_chunks) == [6.0, 6.0]
+    assert seen_queries == [query]
+
+    # Same normalised query: served from the cache
+    assert cache.score("model", "Thời giờ làm việc?", chunks, score_chunks) == [6.0, 6.0]
+    assert seen_queries == [query]
@@ -0,0 +1,28 @@
+import pytest
+from qdrant_client.models import Datatype
+
+from llm_engineering.domain.embedded_chunks import EmbeddedChunk
+from llm_engineering.settings import settings
+
+
+@pytest.mark.parametrize("datatype", ["float16", "uint8"])
+def test_sparse_datatype_falls_back_to_settings(monkeypatch, datatype):
+    monkeypatch.setattr(settings, "SPARSE_VECTOR_DATATYPE", datatype)
+
+    params = EmbeddedChunk.get_sparse_vector_params()
+
+    assert params.index is not None
+    assert params.index.datatype == Datatype(datatype)
+
+
+def test_sparse_datatype_from_config_overrides_settings(monkeypatch):
+    monkeypatch.setattr(settings, "SPARSE_VECTOR_DATATYPE", "uint8")
+    monkeypatch.setattr(EmbeddedChunk.Config, "sparse_datatype", "float16")
+
+    assert EmbeddedChunk.get_sparse_vector_params().index.datatype == Datatype.FLOAT16
+
+
+def test_sparse_index_params_unset_without_datatype(monkeypatch):
+    monkeypatch.setattr(settings, "SPARSE_VECTOR_DATATYPE", None)
+
+    assert EmbeddedChunk.get_sparse_vector_params().index is None